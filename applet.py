@@ -1,30 +1,35 @@
 # First-party modules
-import openpyxl
-import pandas as pd
-from docx2pdf import convert as docx2pdf_convert
-from mailmerge import MailMerge
+from converters import CONVERTERS, DEFAULT_CONVERTER
+from engine import ContractBatch
+from filenames import (ILLEGAL_CHARACTER_LIST, check_columns, check_filename, contains_illegal_char, extract_columns,
+                       get_combined_filename, get_date_file)
+from mapping_table import MappingTable
+from parallel import RowResult, WORKER_COUNT_DEFAULT
+from profiles import ProfileStore
+from report import format_stage_totals
+from validation import ValidationReport
 
 # Third-party modules
+import concurrent.futures
 import datetime
 import os
-import re
-import shutil
+import queue
 import tkinter as tk
 import tkinter.filedialog as filedialog
 import tkinter.messagebox as messagebox
 import tkinter.ttk as ttk
-from typing import Optional
+from typing import Any, Callable, Optional
 
 
 GLOBAL_BG_COLOR = "White"
 FILENAME_DEFAULT_TEXT = "Enter filename... You may use information from columns by using {column_name}. Only exact matches work."
-TABLE_ROW_START = 8
-ILLEGAL_CHARACTER_LIST = ["<", ">", ":", "\"", "\\", "/", "|", "?", "*"]
-TEMP_DIR_NAME = ".temp"
+TABLE_ROW_START = 7
 LABEL_SETTINGS = {'bg': GLOBAL_BG_COLOR, 'fg': "Black", 'padx': 5, 'pady': 5}
 BUTTON_SETTINGS = {"width": 10}
-OPTION_MENU_SETTINGS = {"width": 50, 'padx': 5, 'pady': 5}
 BORDER_SIZE = 3
+FAILED_ROWS_SHOWN = 10
+# Milliseconds between two refreshes of the progress bar while a task runs in the background
+PROGRESS_REFRESH_MS = 100
 
 
 class ContractCreationTool:
@@ -55,15 +60,20 @@ class ContractCreationTool:
         self.word_file: str = str()
         self.excel_file: str = str()
         self.output_folder: str = str()
-        self.table_labels: list[tk.Label] = []
-        self.table_menu: list[tk.OptionMenu] = []
-        self.ws_dict: pd.DataFrame = pd.DataFrame()
+        self.batch: Optional[ContractBatch] = None
+        # mappings and file metadata of the template/data pairs used before
+        self.profiles: ProfileStore = ProfileStore()
         self.id: int = 0
+        # loading and generating run on a background thread, progress is reported through the queue
+        self.executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.progress_queue: queue.Queue = queue.Queue()
+        self.busy: bool = False
 
         self.create_widgets()
         # Update the scroll region of the canvas to include the frame
         self.frame.update_idletasks()
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
 
     def get_help(self) -> None:
@@ -74,72 +84,49 @@ class ContractCreationTool:
             None
         """
         help_msg: str = "Currently available Fields:\n "
-        for col in list(self.ws_dict):
+        columns: list[str] = self.batch.columns if self.batch is not None else []
+        for col in columns:
             if "Unnamed" not in col:
                 help_msg += f"\n {{{col}}}"
                 check_bool, check_list = contains_illegal_char(col)
                 if check_bool:
                     help_msg += f" <= Cannot be used due to illegal characters: {' '.join(check_list)}"
-        if self.ws_dict.empty:
+        if not columns:
             help_msg += "\n No Columns loaded/found!"
 
         help_msg += f"\n\n\n These characters cannot be used in the filename:\n {' '.join(ILLEGAL_CHARACTER_LIST)} "
 
         messagebox.showinfo("Help", help_msg)
 
-    def extract_columns(self) -> list[str]:
+    def get_filename_pattern(self) -> str:
         """
-        Extracts all column names from the filenames entry field.
+        Returns the filename pattern from the filenames entry field, empty if the default text is shown.
 
         Returns:
-        List: column names.
+            str: The filename pattern.
         """
         try:
-            columns_found_ck = [col.strip() for col in re.findall("{(.+?)}", self.filenames.get())]
+            pattern: str = self.filenames.get()
         except AttributeError:
-            columns_found_ck = []
-        return columns_found_ck
+            return ""
+        return "" if pattern == FILENAME_DEFAULT_TEXT else pattern
 
-    def generate_filename(self, row_id: int) -> str:
+    def extract_columns(self) -> list[str]:
         """
-        Generates a filename for the contract that includes the current date, an ID, and the provided filename (with variables if applicable).
-        Args:
-            row_id (int): The row number from the Excel spreadsheet that corresponds to the contract to be generated.
+        Extracts all column names from the filenames entry field.
+
         Returns:
-            str: Filename as a string.
-        """
-        id: str = f"{str(datetime.datetime.today().strftime('%H%M%S%f'))}{str(row_id)}"
-        file: str = self.filenames.get()
-        filetype: str = ".docx"
-        if file == FILENAME_DEFAULT_TEXT or not file:
-            return f"{get_date_file()} - Autocreation for {self.excel_file.split('/')[-1]}  - {id}{filetype}"
-
-        columns_found_fn: list[str] = list[str]
-        columns_found_fn = self.extract_columns()
-        if columns_found_fn != "":
-            for column in columns_found_fn:
-                if column in list(self.ws_dict):
-                    file: str = file.replace("{" + column + "}", self.ws_dict[column][row_id])
-        return f"{get_date_file()} - {file} - {id}{filetype}"
+        List: column names.
+        """
+        return extract_columns(self.get_filename_pattern())
 
     def check_columns(self) -> tuple[bool, Optional[list[str]]]:
         """
-        Checks if all column names in the filenames entry field match the column names in the worksheet dictionary.
+        Checks if all column names in the filenames entry field match the column names in the worksheet.
         Returns:
             Tuple: containing a boolean value indicating whether all columns are present, and a list of any missing column names.
         """
-        bool_check: bool = True
-        cols: list[str] = []
-        if self.filenames.get() == FILENAME_DEFAULT_TEXT:
-            return bool_check, None
-        for col in self.extract_columns():
-            if col not in list(self.ws_dict):
-                bool_check = False
-                if not cols:
-                    cols = [col]
-                else:
-                    cols.append(col)
-        return bool_check, cols
+        return check_columns(self.get_filename_pattern(), self.batch.columns if self.batch is not None else [])
 
     def check_filename(self) -> str:
         """
@@ -147,24 +134,7 @@ class ContractCreationTool:
         Returns:
           str: Error Message.
         """
-        return_msg: str = ""
-        col_check: bool
-        col_found: Optional[list[str]]
-        col_check, col_found = self.check_columns()
-        if not col_check:
-            for cols in col_found:
-                return_msg += f"Unknown column: {{{cols}}}\n"
-
-        try:
-            filename_check_bool, filename_check_list = contains_illegal_char(self.filenames.get())
-            if filename_check_bool:
-                for char in filename_check_list:
-                    return_msg += f"\nIllegal character found in filename: {char}"
-        except TypeError as e:
-            return f"Error: {str(e)}"
-        if return_msg != "":
-            return_msg += "\n\n See Help for more information."
-        return return_msg
+        return check_filename(self.get_filename_pattern(), self.batch.columns if self.batch is not None else [])
 
     def on_entry_click(self, event: tk.Event) -> None:
         """Function that gets called whenever the filenames entry is clicked.
@@ -190,6 +160,11 @@ class ContractCreationTool:
             self.filenames.insert(0, FILENAME_DEFAULT_TEXT)
             self.filenames.config(fg="grey", border=BORDER_SIZE)
 
+    def update_filename_prefix(self) -> None:
+        """Shows the date in front of the filename entry if the filenames start with the date."""
+        prefix: str = f"{get_date_file()} - " if self.date_prefix_var.get() else ""
+        self.filename_prefix_var.set(f"Filenames:                 \"{prefix}")
+
     def create_widgets(self) -> None:
         """
         Creates all the widgets for the GUI.
@@ -202,8 +177,10 @@ class ContractCreationTool:
         tk.Label(self.frame, text="Select Word file:", **LABEL_SETTINGS).grid(row=0, column=0, )
         tk.Label(self.frame, text="Select Excel file:", **LABEL_SETTINGS).grid(row=1, column=0,)
         tk.Label(self.frame, text="Select Output folder:", **LABEL_SETTINGS).grid(row=2, column=0,)
-        tk.Label(self.frame, text=f"Filenames:                 \"{get_date_file()} - ", **LABEL_SETTINGS).grid(row=6, column=0)
-        tk.Label(self.frame, text="- ID.pdf\"", **LABEL_SETTINGS).grid(row=6, column=2)
+        # shows the date prefix only while "Date in filenames" is ticked
+        self.filename_prefix_var = tk.StringVar(value="Filenames:                 \"")
+        tk.Label(self.frame, textvariable=self.filename_prefix_var, **LABEL_SETTINGS).grid(row=6, column=0)
+        tk.Label(self.frame, text=".pdf\"", **LABEL_SETTINGS).grid(row=6, column=2)
 
         # create text fields
         self.word_file_entry: tk.Entry = tk.Entry(self.frame, width=100, state="readonly")
@@ -222,6 +199,27 @@ class ContractCreationTool:
         self.filenames.bind("<FocusIn>", self.on_entry_click)
         self.filenames.bind("<FocusOut>", self.on_focusout)
 
+        # create worker count selection
+        workers_frame: tk.Frame = tk.Frame(self.frame, bg=GLOBAL_BG_COLOR)
+        workers_frame.grid(row=5, column=0)
+        tk.Label(workers_frame, text="Worker processes:", **LABEL_SETTINGS).pack(side="left")
+        self.workers_var = tk.IntVar(value=WORKER_COUNT_DEFAULT)
+        tk.Spinbox(workers_frame, from_=1, to=WORKER_COUNT_DEFAULT, textvariable=self.workers_var,
+                   width=5).pack(side="left")
+        tk.Label(workers_frame, text="PDF converter:", **LABEL_SETTINGS).pack(side="left")
+        self.converter_var = tk.StringVar(value=DEFAULT_CONVERTER)
+        tk.OptionMenu(workers_frame, self.converter_var, *CONVERTERS).pack(side="left")
+        self.incremental_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(workers_frame, text="Skip up-to-date files", variable=self.incremental_var,
+                       bg=GLOBAL_BG_COLOR).pack(side="left")
+        # off by default, the dated names would change every day and make every row out of date
+        self.date_prefix_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(workers_frame, text="Date in filenames", variable=self.date_prefix_var,
+                       command=self.update_filename_prefix, bg=GLOBAL_BG_COLOR).pack(side="left")
+        self.archive_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(workers_frame, text="Write into a ZIP file", variable=self.archive_var,
+                       bg=GLOBAL_BG_COLOR).pack(side="left")
+
         # create label for progress bar value
         self.progress_bar_value_label_var = tk.StringVar()
         self.progress_bar_value_label = tk.Label(
@@ -239,10 +237,15 @@ class ContractCreationTool:
                   **BUTTON_SETTINGS).grid(row=1, column=2, padx=10, pady=10)
         tk.Button(self.frame, text="Select", command=self.select_output_folder, padx=10,
                   **BUTTON_SETTINGS).grid(row=2, column=2, padx=10, pady=10)
-        tk.Button(self.frame, text="Load", command=self.load_data, padx=10,
-                  **BUTTON_SETTINGS).grid(row=3, column=2, padx=10, pady=10)
-        tk.Button(self.frame, text="Generate", command=self.generate_files, padx=10,
-                  **BUTTON_SETTINGS).grid(row=5, column=1, padx=10, pady=10)
+        self.load_button: tk.Button = tk.Button(self.frame, text="Load", command=self.load_data, padx=10,
+                                                **BUTTON_SETTINGS)
+        self.load_button.grid(row=3, column=2, padx=10, pady=10)
+        self.generate_button: tk.Button = tk.Button(self.frame, text="Generate", command=self.generate_files, padx=10,
+                                                    **BUTTON_SETTINGS)
+        self.generate_button.grid(row=5, column=1, padx=10, pady=10)
+        self.cancel_button: tk.Button = tk.Button(self.frame, text="Cancel", command=self.cancel_generation, padx=10,
+                                                  state="disabled", **BUTTON_SETTINGS)
+        self.cancel_button.grid(row=5, column=2, padx=10, pady=10)
         tk.Button(self.frame, text="Help", command=self.get_help, padx=10,
                   **BUTTON_SETTINGS).grid(row=3, column=0, padx=10, pady=10)
 
@@ -252,10 +255,8 @@ class ContractCreationTool:
         self.progress_bar["value"]: int = 0
 
         # create table
-        tk.Label(self.frame, text="Template Fields", font=("Segoe UI", 9, "bold",
-                                                           "roman", "underline"), **LABEL_SETTINGS).grid(row=7, column=0)
-        tk.Label(self.frame, text="Data Fields", font=("Segoe UI", 9, "bold",
-                                                       "roman", "underline"), **LABEL_SETTINGS).grid(row=7, column=1)
+        self.mapping_table: MappingTable = MappingTable(self.frame, bg=GLOBAL_BG_COLOR)
+        self.mapping_table.grid(row=TABLE_ROW_START, column=0, columnspan=3, padx=10, pady=10, sticky="nsew")
 
     def select_word_file(self) -> None:
         """
@@ -279,7 +280,9 @@ class ContractCreationTool:
             None
         """
         self.excel_file: filedialog = filedialog.askopenfilename(
-            initialdir=os.getcwd(), title="Select Excel file", filetypes=[("Excel files", "*.xlsx")])
+            initialdir=os.getcwd(), title="Select Excel file",
+            filetypes=[("Data files", "*.xlsx *.xlsm *.csv *.parquet"), ("Excel files", "*.xlsx *.xlsm"),
+                       ("CSV files", "*.csv"), ("Parquet files", "*.parquet")])
         self.excel_file_entry.configure(state="normal")
         self.excel_file_entry.delete(0, "end")
         self.excel_file_entry.insert(0, self.excel_file)
@@ -298,17 +301,6 @@ class ContractCreationTool:
         self.output_folder_entry.insert(0, self.output_folder)
         self.output_folder_entry.configure(state="readonly")
 
-    def reset_tables_menus(self):
-        # Reset table labels and menus
-        self.current_row: int = TABLE_ROW_START
-        if self.table_labels:
-            for label in self.table_labels:
-                label.destroy()
-            for menu in self.table_menu:
-                menu.destroy()
-        self.table_labels = []
-        self.table_menu = []
-
     def load_data(self) -> None:
         """Loads data from selected Word and Excel files, and creates dropdown menus for mail merge fields
 
@@ -320,46 +312,54 @@ class ContractCreationTool:
         if not self.word_file or not self.excel_file:
             messagebox.showerror("Error", "Please select Word and Excel files!")
             return
-        self.reset_tables_menus()
-
-        # Read the data from the Excel file
-        self.wb: openpyxl.Workbook = openpyxl.load_workbook(self.excel_file)
-        self.ws: openpyxl.Worksheet = self.wb.active
-        self.ws_dict = pd.read_excel(self.excel_file)
-
-        # Get the Excel file headings
-        excel_headings: list[str] = [cell.value for cell in next(self.ws.rows)]
-        excel_headings.append("Leave Empty")
-        excel_headings.append(f"EXTRA - Add Current Date => {get_date_field()}")
+        if self.busy:
+            return
 
-        self.excel_headings = ["Empty Column Name (This Column cannot be mapped)" if x == None else x for x in excel_headings]
+        # Parse the Word file, read the data from the Excel file and match the fields in the background
+        batch: ContractBatch = ContractBatch(self.word_file, self.excel_file)
+        self.current_task_var.set("Loading Word and Excel files...")
+        self.run_in_background(lambda: self.load_batch(batch), lambda future: self.on_data_loaded(batch, future))
 
-        # Read the merge fields from the Word file
-        document: MailMerge = MailMerge(self.word_file)
-        merge_fields: list[str] = sorted(document.get_merge_fields())
+    def load_batch(self, batch: ContractBatch) -> None:
+        """Loads the Word and Excel files of the batch and matches every merge field to a heading, a saved
+        profile keeps the last mapping. Runs on the background thread.
 
-        # Create a dropdown menu for each merge field
-        self.fields: dict[str, tk.StringVar] = {}
-        retrieved_elements: list[str] = list()
-        for field in merge_fields:
-            # Create a variable to store the selected option
-            self.fields[field] = tk.StringVar()
+        Args:
+            batch (ContractBatch): The batch to load.
 
-            # Set the default value of the variable
-            retrieved_elements = list(filter(lambda x: field.upper() in x.upper(), self.excel_headings))
-            self.fields[field].set(retrieved_elements[0] if retrieved_elements else self.excel_headings[0])
+        Returns:
+            None
+        """
+        batch.load(self.profiles)
+        saved: dict[str, str] = batch.profile["mappings"] if batch.profile is not None else {}
+        batch.mappings = {field: saved[field] for field in batch.merge_fields
+                          if saved.get(field) in batch.excel_headings}
+        batch.auto_map(default=batch.excel_headings[0])
 
-            # Create the drop-down menu
-            self.table_labels.append(tk.Label(self.frame, text=field, **LABEL_SETTINGS))
-            self.table_menu.append(tk.OptionMenu(self.frame, self.fields[field], *self.excel_headings))
+    def on_data_loaded(self, batch: ContractBatch, future: concurrent.futures.Future) -> None:
+        """Creates the dropdown menus for the mail merge fields once the files have been loaded.
 
-        for menu in self.table_menu:
-            menu.config(OPTION_MENU_SETTINGS)
+        Args:
+            batch (ContractBatch): The loaded batch.
+            future (Future): The finished load task.
 
-        for label in self.table_labels:
-            label.grid(row=self.current_row, column=0, padx=10, pady=10)
-            self.table_menu[self.current_row-TABLE_ROW_START].grid(row=self.current_row, column=1, padx=10, pady=10)
-            self.current_row += 1
+        Returns:
+            None
+        """
+        if future.exception() is not None:
+            self.current_task_var.set("")
+            messagebox.showerror("Error", f"The files could not be loaded: {future.exception()}")
+            return
+        self.current_task_var.set("")
+        self.batch = batch
+        self.excel_headings: list[str] = self.batch.excel_headings
+
+        # Show the merge fields with the headings matched in the background in the table
+        self.mapping_table.load(self.batch.merge_fields, self.excel_headings, self.batch.mappings)
+        if self.batch.profile is not None and self.batch.profile.get("filename"):
+            self.filenames.delete(0, "end")
+            self.filenames.insert(0, self.batch.profile["filename"])
+            self.filenames.config(fg="black", border=BORDER_SIZE)
 
         self.frame.update_idletasks()
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
@@ -371,13 +371,18 @@ class ContractCreationTool:
         Returns:
             None
         """
-        # check if an output folder has been selected
+        # check if the data has been loaded and an output folder has been selected
+        if self.busy:
+            return
+        if self.batch is None:
+            messagebox.showerror("Error", "Please load the Word and Excel files first!")
+            return
         if not self.output_folder:
             messagebox.showerror("Error", "Please select an output directory!")
             return
 
         # get the number of rows in the worksheet and check the validity of the filename
-        rows: int = len(self.ws_dict.index)
+        rows: int = self.batch.rows
         r_i_check: str = self.check_filename()
         if r_i_check != "":
             messagebox.showerror("Error", r_i_check)
@@ -385,101 +390,222 @@ class ContractCreationTool:
 
         # initialize variables for progress tracking and time measurements
         start_time: datetime = datetime.datetime.now()
-        end_time: datetime = datetime.datetime.min
-        time_taken: datetime = datetime.datetime.min
-        avg_time_per_file: float = float()
         self.progress_bar["value"]: int = 0  # reset progress bar
         # set the maximum value of the progress bar based on the number of rows
-        self.progress_bar["maximum"] = (rows) * 2 + 1
-        filename: str = str()
+        self.progress_bar["maximum"] = rows + 1
+        try:
+            workers: int = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = 1
 
         # create a mapping of field names to their values for each row
-        self.mappings: dict[str, str] = {}
-        for field, value in self.fields.items():
-            self.mappings[field] = value.get()
-
-        # iterate over each row in the worksheet and create a docx file for it
-        for row_id in range(rows):
-            temp: dict[str, str] = {}
-            for values in self.mappings:
-                # handle cases where the column is empty or the mapping is invalid
-                if self.mappings[values] == "Leave Empty" or self.mappings[values] == "Empty Column Name (This Column cannot be mapped)":
-                    temp[values] = str()
-                    continue
-                if self.mappings[values] in list(self.ws_dict) == "nan":
-                    if str(self.ws_dict[self.mappings[values]][row_id]) == "nan":
-                        temp[values] = str()
-                        continue
-
-                # handle cases where the field is a special value (e.g. a date field)
-                if self.mappings[values] == f"EXTRA - Add Current Date => {get_date_field()}":
-                    temp[values] = get_date_field()
-                    continue
-
-                temp[values] = str(self.ws_dict[self.mappings[values]][row_id])
-
-            # generate the filename for the current row and create a docx file for it
-            filename = self.generate_filename(row_id)
-            self.create_docx_file(temp, clean_filename(filename))
-
-        # convert all docx files to pdf and remove the docx files
-        docx2pdf_convert(self.docx_path, self.output_folder)
-        shutil.rmtree(self.docx_path)
+        self.mappings: dict[str, str] = self.mapping_table.get_mappings()
+
+        # render and convert the rows in parallel
+        self.batch.output_folder = self.output_folder
+        self.batch.filename_pattern = self.get_filename_pattern()
+        self.batch.mappings = self.mappings
+        self.batch.workers = workers
+        self.batch.converter = self.converter_var.get()
+        self.batch.incremental = self.incremental_var.get()
+        self.batch.date_prefix = self.date_prefix_var.get()
+        self.batch.archive = get_combined_filename(self.excel_file, "Contracts.zip", self.batch.date_prefix) \
+            if self.archive_var.get() else None
+        self.current_task_var.set(f"Validating {rows} rows...")
+        self.run_in_background(self.batch.validate, lambda future: self.on_data_validated(future, start_time))
+
+    def on_data_validated(self, future: concurrent.futures.Future, start_time: datetime.datetime) -> None:
+        """Starts the generation once all rows have been validated. Errors stop the generation, warnings
+        have to be confirmed.
+
+        Args:
+            future (Future): The finished validation task.
+            start_time (datetime): Time the generation has been started.
+
+        Returns:
+            None
+        """
+        self.current_task_var.set("")
+        if future.exception() is not None:
+            messagebox.showerror("Error", f"The data could not be validated: {future.exception()}")
+            return
+        validation: ValidationReport = future.result()
+        if validation.errors:
+            messagebox.showerror("Error", f"{len(validation.errors)} problems have to be fixed before the files can be "
+                                          f"created:\n\n{validation.format()}")
+            return
+        if validation.warnings and not messagebox.askyesno(
+                "Warning", f"{validation.format()}\n\nDo you want to create the files anyway?"):
+            return
+
+        self.update_progress_bar(f"Starting to create {self.batch.rows} files using {self.batch.workers} worker processes...")
+        self.cancel_button.configure(state="normal")
+        self.run_in_background(lambda: self.save_profile_and_run(self.batch),
+                               lambda future: self.on_files_generated(future, start_time))
+
+    def save_profile_and_run(self, batch: ContractBatch) -> list[RowResult]:
+        """Saves the mapping profile of the loaded files and generates the files (on the background thread).
+
+        Args:
+            batch (ContractBatch): The batch to run.
+
+        Returns:
+            List: The results of all rows.
+        """
+        try:
+            batch.save_profile(self.profiles)
+        except OSError:
+            pass  # the profile only saves time when loading the files again
+        return batch.run(progress=self.progress_queue.put)
+
+    def on_files_generated(self, future: concurrent.futures.Future, start_time: datetime.datetime) -> None:
+        """Displays the outcome of the generation once all rows have been rendered.
+
+        Args:
+            future (Future): The finished generation task.
+            start_time (datetime): Time the generation has been started.
+
+        Returns:
+            None
+        """
+        self.cancel_button.configure(state="disabled")
+        if future.exception() is not None:
+            self.current_task_var.set("")
+            messagebox.showerror("Error", f"The files could not be generated: {future.exception()}")
+            return
+        results: list[RowResult] = future.result()
+        failed: list[RowResult] = [result for result in results if result.error is not None]
+        skipped: list[RowResult] = [result for result in results if result.skipped]
 
         # update the progress bar and display a success message with time measurements
-        self.update_progress_bar("PDF Files created Succesfully")
-        end_time = datetime.datetime.now()
-        time_taken = end_time - start_time
-        avg_time_per_file = round(time_taken.total_seconds() / rows, 2)
-        tk.messagebox.showinfo("Success", f"{rows} PDF files successfully generated after {str(time_taken).split('.')[0]}."
-                               + f"\n (~{avg_time_per_file:2f} seconds per file) ")
+        end_time: datetime.datetime = datetime.datetime.now()
+        time_taken: datetime.timedelta = end_time - start_time
+        avg_time_per_file: float = round(time_taken.total_seconds() / max(len(results), 1), 2)
+        if self.batch.cancelled:
+            self.current_task_var.set("Cancelled")
+            tk.messagebox.showinfo("Cancelled", f"Generation cancelled after {len(results) - len(failed) - len(skipped)} PDF files.")
+        else:
+            self.current_task_var.set("PDF Files created Succesfully")
+            tk.messagebox.showinfo("Success", f"{len(results) - len(failed) - len(skipped)} PDF files successfully generated after {str(time_taken).split('.')[0]}."
+                                   + f"\n (~{avg_time_per_file:2f} seconds per file) "
+                                   + (f"\n {len(skipped)} files were already up to date." if skipped else "")
+                                   + (f"\n Time per stage: {format_stage_totals(self.batch.report.stage_totals)}"
+                                      if self.batch.report is not None else ""))
+        if failed:
+            error_msg: str = f"{len(failed)} files could not be generated:\n"
+            for result in failed[:FAILED_ROWS_SHOWN]:
+                error_msg += f"\n Row {result.row_id + 2} ({result.filename}): {result.error}"
+            if len(failed) > FAILED_ROWS_SHOWN:
+                error_msg += f"\n ... and {len(failed) - FAILED_ROWS_SHOWN} more."
+            messagebox.showerror("Error", error_msg)
 
         # reset the GUI elements and progress bar
         self.filenames.delete(0, "end")
         self.canvas.focus_set()
         self.update_progress_bar()
 
-    def create_docx_file(self, individ_mappings: dict[str, str], filename: str) -> None:
+    def cancel_generation(self) -> None:
+        """
+        Cancels the running generation, the rows already being rendered are finished.
+
+        Returns:
+            None
+        """
+        if self.busy and self.batch is not None:
+            self.batch.cancel()
+            self.cancel_button.configure(state="disabled")
+            self.current_task_var.set("Cancelling, waiting for the running rows to finish...")
+
+    def on_close(self) -> None:
         """
-        Create a Docx file with the given mappings and save it as a PDF file.
+        Cancels a running generation and closes the window.
+
+        Returns:
+            None
+        """
+        if self.batch is not None:
+            self.batch.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def run_in_background(self, task: Callable[[], Any], on_done: Callable[[concurrent.futures.Future], None]) -> None:
+        """
+        Runs a task on the background thread, so the window stays responsive. The progress queue is polled
+        every PROGRESS_REFRESH_MS milliseconds until the task is done, then on_done is called on the Tk thread.
 
         Args:
-            individ_mappings (Dict): A dictionary containing individual mappings for the given Docx file.
-            filename (str): Name of the output file.
+            task (Callable): The task to run.
+            on_done (Callable): Called with the finished future of the task.
 
         Returns:
             None
         """
+        self.busy = True
+        self.load_button.configure(state="disabled")
+        self.generate_button.configure(state="disabled")
+        future: concurrent.futures.Future = self.executor.submit(task)
+        self.root.after(PROGRESS_REFRESH_MS, self.poll_background, future, on_done)
+
+    def poll_background(self, future: concurrent.futures.Future,
+                        on_done: Callable[[concurrent.futures.Future], None]) -> None:
+        """
+        Applies the progress reported since the last poll and checks if the background task is done.
 
-        # Increment ID and update progress bar
-        self.id += 1
-        self.update_progress_bar(f"Starting to create Word File for {filename}...")
+        Args:
+            future (Future): The background task.
+            on_done (Callable): Called with the future once the task is done.
 
-        # Create temp directory if it doesn't exist
-        self.docx_path: Optional[str] = os.path.join(self.output_folder, TEMP_DIR_NAME)
-        os.makedirs(self.docx_path, exist_ok=True)
+        Returns:
+            None
+        """
+        self.process_progress_queue()
+        if not future.done():
+            self.root.after(PROGRESS_REFRESH_MS, self.poll_background, future, on_done)
+            return
+        self.process_progress_queue()
+        self.busy = False
+        self.load_button.configure(state="normal")
+        self.generate_button.configure(state="normal")
+        on_done(future)
 
-        # Merge templates and save as a Docx file
-        docx_file_path = os.path.join(self.docx_path, filename)
+    def process_progress_queue(self) -> None:
+        """
+        Takes all finished rows from the progress queue and updates the progress bar once for all of them.
 
-        with MailMerge(self.word_file) as new_document:
-            new_document.merge_templates([individ_mappings], separator="page_break")
-            new_document.write(docx_file_path)
+        Returns:
+            None
+        """
+        finished: int = 0
+        result: Optional[RowResult] = None
+        while True:
+            try:
+                result = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            finished += 1
+        if result is None:
+            return
 
-        # Update progress bar
-        self.update_progress_bar(f"Created Word File for {filename}...")
+        self.id += finished
+        if result.skipped:
+            self.update_progress_bar(f"{result.filename} is up to date...", finished)
+        elif result.error is None:
+            self.update_progress_bar(f"Created PDF File for {result.filename}...", finished)
+        else:
+            self.update_progress_bar(f"Failed to create {result.filename}: {result.error}", finished)
 
-    def update_progress_bar(self, label: str = None) -> None:
+    def update_progress_bar(self, label: str = None, steps: int = 1) -> None:
         """
         Updates the progress bar and sets the current task label.
 
         Args:
             label (str): Optional label to set for the current task.
+            steps (int): Number of steps the progress bar advances.
 
         Returns:
             None
         """
-        self.progress_bar["value"] += 1
+        self.progress_bar["value"] += steps
         if label is not None:
             self.current_task_var.set(label)
 
@@ -490,50 +616,6 @@ class ContractCreationTool:
         else:
             self.progress_bar_value_label.config(background="#e8e4e4", fg="Black")
 
-        self.frame.update_idletasks()
-        print(str(label))
-
-
-def get_date_file() -> str:
-    """
-    Returns the current date in yymmdd format as a string.
-    """
-    return str(datetime.datetime.today().strftime("%y%m%d"))
-
-
-def get_date_field() -> str:
-    """
-    Returns the current date in dd/mm/yyyy format as a string.
-    """
-    return str(datetime.datetime.today().strftime("%d/%m/%Y"))
-
-
-def clean_filename(input_text: str) -> str:
-    """
-    Cleans the an input string, removing ILLEGAL_CHARACTERS(["<", ">", ":", "\"", "\\", "/", "|", "?", "*"])
-
-
-    Args:
-        input_text (str): String that needs to be cleaned.
-
-    Returns:
-        str: cleaned input
-     """
-    for character in ILLEGAL_CHARACTER_LIST:
-        input_text = input_text.replace(character, "")
-    return input_text
-
-
-def contains_illegal_char(input_text: str) -> tuple[bool, Optional[list[str]]]:
-    check_bool: bool = False
-    illegal_chars: list[str] = []
-    for character in ILLEGAL_CHARACTER_LIST:
-        if character in input_text:
-            check_bool = True
-            illegal_chars.append(character)
-
-    return check_bool, illegal_chars
-
 
 if __name__ == '__main__':
     app = ContractCreationTool()
@@ -0,0 +1,132 @@
+# Third-party modules
+import csv
+import os
+import tarfile
+import zipfile
+from typing import Any, Optional
+
+
+# Archive extension => tarfile mode (None for ZIP archives)
+ARCHIVE_MODES = {
+    ".zip": None,
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.xz": "w:xz",
+}
+ARCHIVE_INDEX_SUFFIX = " - Index.csv"
+
+
+class ArchiveSink:
+    """
+    Writes the generated documents into a single ZIP or tar archive instead of the output folder. Every
+    document is added as soon as it is finished, so the archive is written in one pass while the run is
+    going on and no file is created per document on the (network) drive. An index csv next to the
+    archive lists the archive member of every row.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.mode: Optional[str] = get_archive_mode(path)
+        self.index_path: str = path[:-len(get_archive_extension(path))] + ARCHIVE_INDEX_SUFFIX
+        self.archive: Any = None
+        # (row id, archive member, error) of every row
+        self.entries: list[tuple[int, str, str]] = []
+
+    def open(self) -> None:
+        """
+        Creates the archive, an existing archive is replaced.
+
+        Returns:
+            None
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.mode is None:
+            self.archive = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(self.path, self.mode)
+
+    def add(self, file_path: str, member: str) -> None:
+        """
+        Copies a finished document into the archive.
+
+        Args:
+            file_path (str): Path of the document.
+            member (str): Name of the document in the archive.
+
+        Returns:
+            None
+        """
+        if self.mode is None:
+            self.archive.write(file_path, member)
+        else:
+            self.archive.add(file_path, member, recursive=False)
+
+    def record(self, row_id: int, member: str, error: Optional[str] = None) -> None:
+        """
+        Adds a row to the index.
+
+        Args:
+            row_id (int): The row.
+            member (str): Name of the document of the row in the archive, empty if it failed.
+            error (str): The error of the row, None if it was created.
+
+        Returns:
+            None
+        """
+        self.entries.append((row_id, member, error or ""))
+
+    def close(self) -> None:
+        """
+        Closes the archive and writes the index, ordered by row.
+
+        Returns:
+            None
+        """
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.archive = None
+        with open(self.index_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["row", "member", "error"])
+            for row_id, member, error in sorted(self.entries):
+                writer.writerow([row_id + 2, member, error])
+
+    def __enter__(self) -> "ArchiveSink":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def get_archive_extension(path: str) -> str:
+    """
+    Returns the archive extension of a path, e.g. ".zip" or ".tar.gz".
+
+    Args:
+        path (str): Path of the archive.
+
+    Returns:
+        str: The extension, empty if the path is not an archive.
+    """
+    lower: str = path.lower()
+    return next((extension for extension in sorted(ARCHIVE_MODES, key=len, reverse=True) if lower.endswith(extension)),
+                "")
+
+
+def get_archive_mode(path: str) -> Optional[str]:
+    """
+    Returns the tarfile mode of an archive by its extension.
+
+    Args:
+        path (str): Path of the archive.
+
+    Returns:
+        str: The tarfile mode, None for ZIP archives.
+    """
+    extension: str = get_archive_extension(path)
+    if not extension:
+        raise ValueError(f"Unknown archive type: {os.path.basename(path)} (available: {', '.join(ARCHIVE_MODES)})")
+    return ARCHIVE_MODES[extension]
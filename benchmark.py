@@ -0,0 +1,354 @@
+"""
+Benchmark of the contract pipeline. Creates a synthetic Word template (N merge fields on M pages) and a
+synthetic Excel sheet (R rows x C columns), times every stage of the pipeline separately and reports
+the throughput, the p50/p99 latency per document and the peak memory usage of this process and of its
+worker processes:
+
+    python benchmark.py --rows 5000 --columns 40 --fields 20 --pages 3 --workers 4
+
+The pdf conversion uses the stub converter by default, so the benchmark runs without Microsoft Word
+or LibreOffice.
+"""
+# First-party modules
+from converters import CONVERTERS, StubConverter, create_converter
+from engine import ContractBatch
+from filenames import FilenamePattern
+from loader import CHUNK_SIZE, compact_dtypes
+from mapping import ColumnPlan
+from parallel import RowResult
+
+# Third-party modules
+import argparse
+import datetime
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+# Filler paragraphs per page of the synthetic template
+PARAGRAPHS_PER_PAGE = 12
+FILLER_TEXT = ("The employee agrees to the terms and conditions set out in this contract, including all annexes "
+               "and the applicable collective agreements. ")
+
+
+class StageResult:
+    """Timings of a single pipeline stage."""
+
+    def __init__(self, name: str, items: int, total: float, latencies: Optional[list[float]] = None) -> None:
+        self.name: str = name
+        self.items: int = items
+        self.total: float = total
+        self.latencies: list[float] = latencies or []
+        # peak resident memory of this process and of the largest (finished) worker process in KB
+        self.peak_rss: Optional[int] = get_peak_rss(resource.RUSAGE_SELF) if resource is not None else None
+        self.peak_rss_workers: Optional[int] = get_peak_rss(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+    @property
+    def throughput(self) -> float:
+        """Items per second."""
+        return self.items / self.total if self.total else 0.0
+
+    def percentile(self, percent: int) -> Optional[float]:
+        """The given percentile of the latencies per item in seconds, None if there are none."""
+        if not self.latencies:
+            return None
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[percent - 1]
+
+    def to_dict(self) -> dict[str, Any]:
+        """The results as a dictionary (for the json report)."""
+        return {"stage": self.name, "items": self.items, "seconds": self.total, "per_second": self.throughput,
+                "p50_ms": to_ms(self.percentile(50)), "p99_ms": to_ms(self.percentile(99)),
+                "peak_rss_kb": self.peak_rss, "peak_rss_workers_kb": self.peak_rss_workers}
+
+
+def make_template(path: str, fields: list[str], pages: int) -> None:
+    """
+    Creates a synthetic Word template. The merge fields are spread over the pages, alternating between
+    simple and complex field codes, each page is filled with some paragraphs of text.
+
+    Args:
+        path (str): Path of the .docx file.
+        fields (List): Names of the merge fields.
+        pages (int): Number of pages.
+
+    Returns:
+        None
+    """
+    def simple_field(name: str) -> str:
+        return (f'<w:fldSimple w:instr=" MERGEFIELD {name} \\* MERGEFORMAT ">'
+                f'<w:r><w:t>«{name}»</w:t></w:r></w:fldSimple>')
+
+    def complex_field(name: str) -> str:
+        return (f'<w:r><w:fldChar w:fldCharType="begin"/></w:r>'
+                f'<w:r><w:instrText xml:space="preserve"> MERGEFIELD {name} </w:instrText></w:r>'
+                f'<w:r><w:fldChar w:fldCharType="separate"/></w:r><w:r><w:t>«{name}»</w:t></w:r>'
+                f'<w:r><w:fldChar w:fldCharType="end"/></w:r>')
+
+    body: list[str] = []
+    fields_per_page: int = -(-len(fields) // max(pages, 1))
+    for page in range(pages):
+        if page:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        for index, name in enumerate(fields[page * fields_per_page:(page + 1) * fields_per_page]):
+            field: str = simple_field(name) if index % 2 else complex_field(name)
+            body.append(f'<w:p><w:r><w:t xml:space="preserve">{name}: </w:t></w:r>{field}</w:p>')
+        body.extend(f'<w:p><w:r><w:t>{FILLER_TEXT * 3}</w:t></w:r></w:p>' for _ in range(PARAGRAPHS_PER_PAGE))
+
+    document: str = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     f'<w:document xmlns:w="{WORD_NAMESPACE}"><w:body>{"".join(body)}'
+                     f'<w:sectPr><w:pgSz w:w="11906" w:h="16838"/></w:sectPr></w:body></w:document>')
+    content_types: str = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+    relationships: str = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+        'officeDocument" Target="word/document.xml"/></Relationships>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", relationships)
+        archive.writestr("word/document.xml", document)
+
+
+def make_sheet(path: str, columns: list[str], rows: int) -> None:
+    """
+    Creates a synthetic Excel sheet with text, numbers, dates and empty cells.
+
+    Args:
+        path (str): Path of the .xlsx file.
+        columns (List): The column names.
+        rows (int): Number of data rows.
+
+    Returns:
+        None
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    start: datetime.datetime = datetime.datetime(2024, 1, 1)
+    for row in range(rows):
+        values: list[Any] = []
+        for column in range(len(columns)):
+            kind: int = (row + column) % 5
+            if kind == 0:
+                values.append(f"Text {row}-{column}")
+            elif kind == 1:
+                values.append(row * 10 + column)
+            elif kind == 2:
+                values.append(start + datetime.timedelta(days=row % 365))
+            elif kind == 3:
+                values.append(round(row / (column + 1), 2))
+            else:
+                values.append(None if row % 7 == 0 else f"Value {column}")
+        ws.append(values)
+    wb.save(path)
+
+
+def get_peak_rss(who: int) -> int:
+    """
+    Returns the peak resident memory in KB of this process (RUSAGE_SELF) or of the largest of its finished
+    child processes (RUSAGE_CHILDREN). The two peaks are reached at different times, so they are not added.
+    """
+    peak: int = resource.getrusage(who).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def to_ms(seconds: Optional[float]) -> Optional[float]:
+    """Converts seconds to milliseconds."""
+    return None if seconds is None else seconds * 1000
+
+
+def time_items(name: str, items: list[Any], function: Callable[[Any], Any]) -> StageResult:
+    """
+    Calls function for every item and measures the latency of every call.
+
+    Args:
+        name (str): Name of the stage.
+        items (List): The items.
+        function (Callable): Called with every item.
+
+    Returns:
+        StageResult: The timings.
+    """
+    latencies: list[float] = []
+    start: float = time.perf_counter()
+    for item in items:
+        item_start: float = time.perf_counter()
+        function(item)
+        latencies.append(time.perf_counter() - item_start)
+    return StageResult(name, len(items), time.perf_counter() - start, latencies)
+
+
+def run_benchmark(folder: str, rows: int, columns: int, fields: int, pages: int, workers: int,
+                  converter: str, sample: int) -> list[StageResult]:
+    """
+    Creates the synthetic files in folder and times every stage of the pipeline.
+
+    Args:
+        folder (str): Working folder for the synthetic files and the output.
+        rows (int): Number of rows of the sheet.
+        columns (int): Number of columns of the sheet.
+        fields (int): Number of merge fields of the template.
+        pages (int): Number of pages of the template.
+        workers (int): Number of worker processes for the end-to-end run.
+        converter (str): Name of the pdf converter backend.
+        sample (int): Number of documents rendered and converted in the single-document stages.
+
+    Returns:
+        List: The timings of all stages.
+    """
+    word_file: str = os.path.join(folder, "template.docx")
+    excel_file: str = os.path.join(folder, "data.xlsx")
+    field_names: list[str] = [f"Field{index}" for index in range(fields)]
+    # the first columns match the merge fields, the rest is not mapped
+    column_names: list[str] = [f"Field{index}" if index < fields else f"Column{index}" for index in range(columns)]
+    make_template(word_file, field_names, pages)
+    make_sheet(excel_file, column_names, rows)
+
+    filename_pattern: str = "{" + column_names[0] + "}"
+    if columns > fields:
+        filename_pattern += " - {" + column_names[-1] + "}"
+
+    results: list[StageResult] = []
+    batch: ContractBatch = ContractBatch(word_file, excel_file, os.path.join(folder, "output"),
+                                         filename_pattern=filename_pattern, workers=workers,
+                                         converter=converter, incremental=False)
+
+    start: float = time.perf_counter()
+    batch.load()
+    batch.auto_map()
+    results.append(StageResult("load (headers + template)", 1, time.perf_counter() - start))
+
+    # only the columns used by the mapping and the filename pattern are read, like in the run
+    plan: ColumnPlan = ColumnPlan(batch.mappings, batch.columns)
+    filenames: FilenamePattern = FilenamePattern(batch.filename_pattern, batch.columns, excel_file,
+                                                 date_prefix=batch.date_prefix)
+    start = time.perf_counter()
+    chunks: list[Any] = [compact_dtypes(chunk) for chunk in batch.data.iter_chunks(
+        CHUNK_SIZE, list(dict.fromkeys(plan.source_columns + filenames.source_columns)))]
+    results.append(StageResult("excel read", rows, time.perf_counter() - start))
+
+    merge_values: list[dict[str, str]] = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        merge_values.extend(plan.resolve(chunk))
+    results.append(StageResult("mapping", rows, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        filenames.format(chunk)
+    results.append(StageResult("filenames", rows, time.perf_counter() - start))
+    del chunks
+
+    # single documents, in this process
+    documents: list[bytes] = []
+
+    def render(values: dict[str, str]) -> None:
+        buffer: io.BytesIO = io.BytesIO()
+        batch.template.write(values, buffer)
+        documents.append(buffer.getvalue())
+
+    results.append(time_items("merge + write (in memory)", merge_values[:sample], render))
+    with create_converter(converter) as pdf_converter:
+        pdf_file: str = os.path.join(folder, "sample.pdf")
+        results.append(time_items(f"convert ({converter})", documents,
+                                  lambda document: pdf_converter.convert_stream(io.BytesIO(document), pdf_file)))
+    documents.clear()
+    merge_values.clear()
+
+    # end-to-end run including the worker processes, the latency of a document is the sum of its stages
+    # (reading, mapping and naming its share of the chunk, merging, writing and converting it)
+    latencies: list[float] = []
+
+    def progress(result: RowResult) -> None:
+        if result.timings:
+            latencies.append(sum(result.timings.values()))
+
+    start = time.perf_counter()
+    batch.run(progress=progress)
+    results.append(StageResult(f"end-to-end ({workers} workers)", rows, time.perf_counter() - start, latencies))
+    return results
+
+
+def print_report(results: list[StageResult]) -> None:
+    """
+    Prints the timings as a table.
+
+    Args:
+        results (List): The timings of all stages.
+
+    Returns:
+        None
+    """
+    def number(value: Optional[float], digits: int = 2) -> str:
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    def megabytes(kilobytes: Optional[int]) -> str:
+        return number(None if kilobytes is None else kilobytes / 1024, 1)
+
+    print(f"{'stage':<32}{'items':>8}{'seconds':>10}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'peak RSS MB':>13}{'worker RSS MB':>15}")
+    for result in results:
+        print(f"{result.name:<32}{result.items:>8}{number(result.total, 3):>10}{number(result.throughput, 1):>12}"
+              f"{number(to_ms(result.percentile(50))):>10}{number(to_ms(result.percentile(99))):>10}"
+              f"{megabytes(result.peak_rss):>13}{megabytes(result.peak_rss_workers):>15}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Runs the benchmark from the command line.
+
+    Args:
+        argv (List): Command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the contract pipeline with synthetic data.")
+    parser.add_argument("--rows", type=int, default=1000, help="rows of the synthetic sheet")
+    parser.add_argument("--columns", type=int, default=20, help="columns of the synthetic sheet")
+    parser.add_argument("--fields", type=int, default=10, help="merge fields of the synthetic template")
+    parser.add_argument("--pages", type=int, default=2, help="pages of the synthetic template")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes for the end-to-end run")
+    parser.add_argument("--converter", choices=list(CONVERTERS), default=StubConverter.name, help="pdf converter backend")
+    parser.add_argument("--sample", type=int, default=200, help="documents timed in the single-document stages")
+    parser.add_argument("--folder", help="keep the synthetic files and the output in this folder")
+    parser.add_argument("--json", dest="json_file", help="also write the results to this json file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="contract-benchmark-") as temp_folder:
+        folder: str = args.folder or temp_folder
+        os.makedirs(folder, exist_ok=True)
+        results: list[StageResult] = run_benchmark(folder, args.rows, args.columns, args.fields, args.pages,
+                                                   args.workers, args.converter, args.sample)
+    print_report(results)
+    if args.json_file:
+        with open(args.json_file, "w", encoding="utf-8") as file:
+            json.dump([result.to_dict() for result in results], file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
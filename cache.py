@@ -0,0 +1,159 @@
+# Third-party modules
+import collections
+import os
+import shutil
+from typing import Any
+
+
+CACHE_FOLDER = ".contract-cache"
+# Bytes the cached documents may use before the least recently used ones are evicted
+CACHE_BUDGET_DEFAULT = 512 * 1024 * 1024
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered documents. Rows with the same merge values produce the same
+    document, so a document is only rendered (and converted) once and copied or hard-linked for every
+    further row with the same content. The least recently used documents are evicted once the cache
+    exceeds its size budget; the order is kept in the modification times, so it survives between runs.
+
+    Documents are only added by hard-linking them into the cache. If the drive does not support hard
+    links (e.g. some network shares), the cache is disabled instead of copying every document.
+    """
+
+    def __init__(self, folder: str, max_bytes: int = CACHE_BUDGET_DEFAULT) -> None:
+        self.folder: str = folder
+        self.max_bytes: int = max_bytes
+        # set to False once a hard link into the cache folder has failed
+        self.enabled: bool = True
+        # cache entry filename => size, least recently used first
+        self.entries: collections.OrderedDict[str, int] = collections.OrderedDict()
+        self.size: int = 0
+        self.hits: int = 0
+
+    def open(self) -> None:
+        """
+        Reads the cached documents and their last use from the cache folder.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        found: list[tuple[float, str, int]] = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat: os.stat_result = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        self.entries = collections.OrderedDict((name, size) for _, name, size in sorted(found))
+        self.size = sum(self.entries.values())
+
+    def restore(self, key: str, file_path: str) -> bool:
+        """
+        Creates file_path from the cached document with the given key.
+
+        Args:
+            key (str): Content hash of the document.
+            file_path (str): Path of the output file.
+
+        Returns:
+            bool: True if the document was cached, False if it has to be rendered.
+        """
+        name: str = get_entry_name(key, file_path)
+        if not self.enabled or name not in self.entries:
+            return False
+        cache_path: str = os.path.join(self.folder, name)
+        try:
+            link_or_copy(cache_path, file_path)
+            os.utime(cache_path)
+        except FileNotFoundError:
+            # removed from outside the cache
+            self.size -= self.entries.pop(name)
+            return False
+        self.entries.move_to_end(name)
+        self.hits += 1
+        return True
+
+    def store(self, key: str, file_path: str) -> None:
+        """
+        Hard-links a rendered document into the cache and evicts the least recently used documents if
+        the cache exceeds its size budget. Documents larger than the whole budget are not cached.
+
+        Args:
+            key (str): Content hash of the document.
+            file_path (str): Path of the rendered output file.
+
+        Returns:
+            None
+        """
+        name: str = get_entry_name(key, file_path)
+        size: int = os.path.getsize(file_path)
+        if not self.enabled or name in self.entries or size > self.max_bytes:
+            return
+        while self.entries and self.size + size > self.max_bytes:
+            evicted, evicted_size = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            remove_file(os.path.join(self.folder, evicted))
+        cache_path: str = os.path.join(self.folder, name)
+        remove_file(cache_path)
+        try:
+            os.link(file_path, cache_path)
+        except OSError:
+            # copying every document would double the output written
+            self.enabled = False
+            return
+        self.entries[name] = size
+        self.size += size
+
+    def close(self) -> None:
+        """
+        Nothing to write, the cache folder is always up to date.
+
+        Returns:
+            None
+        """
+
+    def __enter__(self) -> "RenderCache":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def get_entry_name(key: str, file_path: str) -> str:
+    """
+    Returns the filename of a cache entry, the key with the extension of the output file.
+    """
+    return key + os.path.splitext(file_path)[1]
+
+
+def link_or_copy(source: str, target: str, link: bool = True) -> None:
+    """
+    Hard-links source to target, or copies it if links are disabled or not supported (e.g. across
+    drives). An existing target is replaced.
+
+    Args:
+        source (str): Path of the existing file.
+        target (str): Path of the new file.
+        link (bool): Whether to try a hard link first.
+
+    Returns:
+        None
+    """
+    remove_file(target)
+    if link:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, target)
+
+
+def remove_file(file_path: str) -> None:
+    """Removes a file, ignoring a missing file."""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,290 @@
+"""
+Headless entry point of the Contract Creation Tool. Runs a batch job described by a JSON or YAML job file
+without starting the GUI, e.g. for nightly jobs on a server:
+
+    python cli.py job.json
+
+Example job file:
+
+    {
+        "template": "contract.docx",
+        "data": "employees.xlsx",
+        "output_folder": "contracts",
+        "filename": "{Name} - Contract",
+        "mapping": {"FirstName": "First Name", "Salary": "Leave Empty"},
+        "workers": 4,
+        "convert_pdf": true,
+        "converter": "libreoffice",
+        "memory_budget_mb": 256,
+        "date_prefix": false,
+        "report": "jsonl",
+        "profile_every": 0,
+        "cache": true,
+        "cache_budget_mb": 512,
+        "combine": 0,
+        "page_index": true,
+        "validate": true,
+        "archive": null
+    }
+
+Relative paths are resolved against the folder of the job file. Merge fields that are not part of the
+mapping are matched automatically to the best matching column (same name, ignoring case and
+punctuation, containing the field name, sharing words or a similar spelling), or left empty.
+
+Rows whose output file is up to date (according to the manifest in the output folder) are skipped,
+use --force to generate all files again. "date_prefix" puts the current date in front of the
+filenames, since the names then change every day, the next day's run generates all files again.
+
+A run report with the time spent reading, mapping, naming, merging, writing and converting every row
+is written to the output folder ("report": "jsonl", "csv" or "none"). With "profile_every": n every
+n-th row is profiled with cProfile, the stats are written to the .contract-profiles folder.
+
+Rows with the same merge values as an already rendered row are hard-linked (or copied) from the cache
+in the .contract-cache folder instead of being rendered and converted again. The least recently used
+documents are removed once the cache exceeds "cache_budget_mb", use --no-cache to disable the cache.
+
+With "combine": K (or "all") the rows are merged into combined documents of K rows each, every row
+starting on a new page, instead of one document per row. An index csv lists the document and position
+of every row and the pages of every pdf document (disable with "page_index": false).
+
+Before anything is rendered all rows are validated: empty values in mapped columns, illegal characters
+in the filenames, duplicate filenames and filenames or paths that are too long are reported at once.
+The job stops if any row cannot be named (or, with --strict, on any issue). Disable the validation
+with "validate": false or --no-validate.
+
+With "archive": "contracts.zip" (or .tar, .tar.gz, .tgz, .tar.xz) every document is written into a
+single archive in the output folder as soon as it is finished, instead of one file per document. An
+index csv next to the archive lists the archive member of every row. All rows are generated, the
+manifest and the cache are not used for archives.
+"""
+# First-party modules
+from archive import get_archive_mode
+from cache import CACHE_BUDGET_DEFAULT
+from converters import CONVERTERS, DEFAULT_CONVERTER
+from engine import COMBINE_ALL, ContractBatch
+from parallel import MEMORY_BUDGET_DEFAULT, RowResult, WORKER_COUNT_DEFAULT, get_output_filename
+from report import REPORT_FORMATS, format_stage_totals
+from validation import ValidationReport
+
+# Third-party modules
+import argparse
+import datetime
+import json
+import os
+import sys
+from typing import Any, Optional
+
+
+MEGABYTE = 1024 * 1024
+
+
+def load_job_file(job_file: str) -> dict[str, Any]:
+    """
+    Reads a JSON or YAML (.yml/.yaml, requires PyYAML) job file.
+
+    Args:
+        job_file (str): Path to the job file.
+
+    Returns:
+        Dict: The job settings.
+    """
+    with open(job_file, encoding="utf-8") as file:
+        if os.path.splitext(job_file)[1].lower() in (".yml", ".yaml"):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("Error: PyYAML is required for YAML job files (pip install pyyaml).")
+            job: Any = yaml.safe_load(file)
+        else:
+            job = json.load(file)
+    if not isinstance(job, dict):
+        raise SystemExit(f"Error: {job_file} does not contain a job definition.")
+    return job
+
+
+def create_batch(job: dict[str, Any], base_folder: str) -> ContractBatch:
+    """
+    Creates a ContractBatch from the job settings.
+
+    Args:
+        job (Dict): The job settings.
+        base_folder (str): Folder relative paths are resolved against.
+
+    Returns:
+        ContractBatch: The configured batch.
+    """
+    missing: list[str] = [key for key in ("template", "data", "output_folder") if not job.get(key)]
+    if missing:
+        raise SystemExit(f"Error: Missing job settings: {', '.join(missing)}")
+
+    def resolve(path: str) -> str:
+        return os.path.join(base_folder, os.path.expanduser(path))
+
+    return ContractBatch(
+        resolve(job["template"]), resolve(job["data"]), resolve(job["output_folder"]),
+        filename_pattern=job.get("filename") or "",
+        mappings=job.get("mapping") or {},
+        workers=int(job.get("workers") or WORKER_COUNT_DEFAULT),
+        convert_pdf=bool(job.get("convert_pdf", True)),
+        converter=job.get("converter") or DEFAULT_CONVERTER,
+        memory_budget=int(job.get("memory_budget_mb", MEMORY_BUDGET_DEFAULT // MEGABYTE) * MEGABYTE),
+        date_prefix=bool(job.get("date_prefix", False)),
+        report_format=get_report_format(job.get("report", "jsonl")),
+        profile_every=int(job.get("profile_every") or 0),
+        cache=bool(job.get("cache", True)),
+        cache_budget=int(job.get("cache_budget_mb", CACHE_BUDGET_DEFAULT // MEGABYTE) * MEGABYTE),
+        combine=get_combine(job.get("combine")),
+        page_index=bool(job.get("page_index", True)),
+        archive=job.get("archive") or None)
+
+
+def get_combine(combine: Any) -> int:
+    """
+    Converts the number of rows per combined document of a job file or the command line.
+
+    Args:
+        combine (Any): Number of rows, "all" for a single document, empty for one document per row.
+
+    Returns:
+        int: Number of rows per combined document, 0 for one document per row.
+    """
+    if not combine:
+        return 0
+    if str(combine).lower() == "all":
+        return COMBINE_ALL
+    try:
+        return max(int(combine), 0)
+    except ValueError:
+        raise SystemExit(f"Error: Invalid number of rows per combined document: {combine}")
+
+
+def get_report_format(report: Optional[str]) -> Optional[str]:
+    """
+    Checks the report format of a job file or the command line, "none" disables the report.
+
+    Args:
+        report (str): The report format.
+
+    Returns:
+        str: The report format, None for no report.
+    """
+    if not report or report == "none":
+        return None
+    if report not in REPORT_FORMATS:
+        raise SystemExit(f"Error: Unknown report format: {report} (available: {', '.join(REPORT_FORMATS)}, none)")
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Runs a batch job from the command line.
+
+    Args:
+        argv (List): Command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: Exit code, 1 if the job is invalid or any row failed.
+    """
+    parser = argparse.ArgumentParser(description="Create contracts from a Word template and an Excel file without the GUI.")
+    parser.add_argument("job_file", help="JSON or YAML job file")
+    parser.add_argument("--workers", type=int, help="number of worker processes (overrides the job file)")
+    parser.add_argument("--no-pdf", action="store_true", help="keep the Word files instead of converting them to pdf")
+    parser.add_argument("--converter", choices=list(CONVERTERS), help="pdf converter backend (overrides the job file)")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="memory for buffering documents before using the disk (overrides the job file)")
+    parser.add_argument("--force", action="store_true", help="generate all files, even if they are up to date")
+    parser.add_argument("--no-cache", action="store_true", help="render every row, even if an identical row was rendered")
+    parser.add_argument("--combine", metavar="K", help="merge K rows (or all) into one document (overrides the job file)")
+    parser.add_argument("--report", choices=[*REPORT_FORMATS, "none"], help="format of the run report (overrides the job file)")
+    parser.add_argument("--profile-every", type=int, metavar="N", help="profile every N-th row with cProfile")
+    parser.add_argument("--no-validate", action="store_true", help="do not validate the rows before rendering")
+    parser.add_argument("--strict", action="store_true", help="stop on validation warnings, not only on errors")
+    parser.add_argument("--archive", metavar="FILE",
+                        help="write the documents into this ZIP or tar archive in the output folder (overrides the job file)")
+    args = parser.parse_args(argv)
+
+    job: dict[str, Any] = load_job_file(args.job_file)
+    batch: ContractBatch = create_batch(job, os.path.dirname(os.path.abspath(args.job_file)))
+    if args.workers is not None:
+        batch.workers = args.workers
+    if args.no_pdf:
+        batch.convert_pdf = False
+    if args.converter is not None:
+        batch.converter = args.converter
+    if args.memory_budget is not None:
+        batch.memory_budget = args.memory_budget * MEGABYTE
+    if args.force:
+        batch.incremental = False
+    if args.no_cache:
+        batch.cache = False
+    if args.combine is not None:
+        batch.combine = get_combine(args.combine)
+    if args.report is not None:
+        batch.report_format = get_report_format(args.report)
+    if args.profile_every is not None:
+        batch.profile_every = args.profile_every
+    if args.archive is not None:
+        batch.archive = args.archive or None
+    if batch.archive:
+        try:
+            get_archive_mode(batch.archive)
+        except ValueError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 1
+    if batch.convert_pdf and batch.converter not in CONVERTERS:
+        print(f"Error: Unknown pdf converter: {batch.converter} (available: {', '.join(CONVERTERS)})", file=sys.stderr)
+        return 1
+
+    start_time: datetime.datetime = datetime.datetime.now()
+    batch.load()
+    batch.auto_map()
+    error_msg: str = batch.check()
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+        return 1
+    if job.get("validate", True) and not args.no_validate:
+        validation: ValidationReport = batch.validate()
+        if validation.issues:
+            print(validation.format(), file=sys.stderr)
+        if validation.errors or (args.strict and validation.issues):
+            print(f"Error: {len(validation.issues)} validation issues found in {validation.rows} rows, "
+                  f"no files were generated.", file=sys.stderr)
+            return 1
+
+    finished: int = 0
+
+    def report(result: RowResult) -> None:
+        nonlocal finished
+        finished += 1
+        filename: str = get_output_filename(result.filename, batch.convert_pdf)
+        if result.skipped:
+            print(f"[{finished}/{batch.rows}] Up to date {filename}")
+        elif result.cached:
+            print(f"[{finished}/{batch.rows}] Copied {filename}")
+        elif result.error is None:
+            print(f"[{finished}/{batch.rows}] Created {filename}")
+        else:
+            print(f"[{finished}/{batch.rows}] Failed to create {filename}: {result.error}", file=sys.stderr)
+
+    results: list[RowResult] = batch.run(progress=report)
+    failed: int = len([result for result in results if result.error is not None])
+    skipped: int = len([result for result in results if result.skipped])
+    cached: int = len([result for result in results if result.cached])
+    time_taken: datetime.timedelta = datetime.datetime.now() - start_time
+    if batch.combine > 0:
+        documents: int = len({result.filename for result in results if result.error is None})
+        print(f"{len(results) - failed} rows merged into {documents} files, {failed} failed "
+              f"after {str(time_taken).split('.')[0]}.")
+    else:
+        print(f"{len(results) - failed - skipped} files generated ({cached} copied from identical rows), "
+              f"{skipped} up to date, {failed} failed after {str(time_taken).split('.')[0]}.")
+    if batch.archive:
+        print(f"Archive: {os.path.join(batch.output_folder, batch.archive)}")
+    if batch.report is not None:
+        print(f"Time per stage: {format_stage_totals(batch.report.stage_totals)}")
+        print(f"{batch.report.bytes_written} bytes written, report: {batch.report.path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
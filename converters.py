@@ -0,0 +1,277 @@
+# Third-party modules
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import IO, Any, Optional
+
+
+# Seconds to wait for a headless office process to accept connections
+OFFICE_START_TIMEOUT = 60
+# Word's file format id for pdf files (wdFormatPDF)
+WORD_FORMAT_PDF = 17
+
+
+class Converter:
+    """
+    Base class of the pdf conversion backends. A converter is started once per (worker) process and
+    reused for every document, so expensive backends only pay their start-up cost once.
+    """
+    name: str = ""
+
+    def start(self) -> None:
+        """
+        Starts the backend, called once before the first conversion.
+
+        Returns:
+            None
+        """
+
+    def convert(self, docx_file: str, pdf_file: str) -> None:
+        """
+        Converts a single docx file to pdf.
+
+        Args:
+            docx_file (str): Path of the docx file.
+            pdf_file (str): Path the pdf file is written to.
+
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    def convert_stream(self, document: IO[bytes], pdf_file: str) -> None:
+        """
+        Converts a docx document held in a (memory) buffer to pdf. Backends that can only read files
+        get a temporary copy in the local temp folder.
+
+        Args:
+            document (IO): Binary buffer of the docx document, positioned at the start.
+            pdf_file (str): Path the pdf file is written to.
+
+        Returns:
+            None
+        """
+        handle, docx_file = tempfile.mkstemp(suffix=".docx")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                shutil.copyfileobj(document, file)
+            self.convert(docx_file, pdf_file)
+        finally:
+            os.remove(docx_file)
+
+    def close(self) -> None:
+        """
+        Stops the backend, called once after the last conversion.
+
+        Returns:
+            None
+        """
+
+    def __enter__(self) -> "Converter":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class Docx2PdfConverter(Converter):
+    """Converts every file with a separate docx2pdf call (requires Microsoft Word, starts Word per file)."""
+    name: str = "docx2pdf"
+
+    def convert(self, docx_file: str, pdf_file: str) -> None:
+        from docx2pdf import convert as docx2pdf_convert
+        docx2pdf_convert(docx_file, pdf_file)
+
+
+class WordConverter(Converter):
+    """Converts the files with a single Microsoft Word instance that is kept open (Windows only, requires pywin32)."""
+    name: str = "word"
+
+    def __init__(self) -> None:
+        self.word: Any = None
+
+    def start(self) -> None:
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        # DispatchEx => every worker process gets its own Word instance
+        self.word = win32com.client.DispatchEx("Word.Application")
+        self.word.Visible = False
+        self.word.DisplayAlerts = 0
+
+    def convert(self, docx_file: str, pdf_file: str) -> None:
+        document: Any = self.word.Documents.Open(os.path.abspath(docx_file), ReadOnly=True)
+        try:
+            document.SaveAs(os.path.abspath(pdf_file), FileFormat=WORD_FORMAT_PDF)
+        finally:
+            document.Close(0)
+
+    def close(self) -> None:
+        if self.word is not None:
+            try:
+                self.word.Quit()
+            finally:
+                self.word = None
+
+
+class LibreOfficeConverter(Converter):
+    """
+    Converts the files with a headless LibreOffice process that is started once and reused for every file.
+    Requires LibreOffice and its Python UNO bindings (e.g. the python3-uno package).
+    """
+    name: str = "libreoffice"
+
+    def __init__(self, soffice: Optional[str] = None) -> None:
+        self.soffice: Optional[str] = soffice or shutil.which("soffice") or shutil.which("libreoffice")
+        self.process: Optional[subprocess.Popen] = None
+        self.profile_folder: Optional[str] = None
+        self.context: Any = None
+        self.desktop: Any = None
+
+    def start(self) -> None:
+        import uno
+        from com.sun.star.connection import NoConnectException
+
+        if not self.soffice:
+            raise RuntimeError("LibreOffice (soffice) could not be found")
+
+        # a separate profile per process, so several workers can run their own office process
+        self.profile_folder = tempfile.mkdtemp(prefix="contract-office-")
+        pipe_name: str = f"contractcreation{uuid.uuid4().hex}"
+        self.process = subprocess.Popen(
+            [self.soffice, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+             f"-env:UserInstallation={pathlib.Path(self.profile_folder).as_uri()}",
+             f"--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context: Any = uno.getComponentContext()
+        resolver: Any = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline: float = time.monotonic() + OFFICE_START_TIMEOUT
+        while True:
+            try:
+                context: Any = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except NoConnectException:
+                if time.monotonic() > deadline or self.process.poll() is not None:
+                    self.close()
+                    raise RuntimeError("LibreOffice did not start")
+                time.sleep(0.25)
+        self.context = context
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def convert(self, docx_file: str, pdf_file: str) -> None:
+        import uno
+
+        document: Any = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(docx_file)), "_blank", 0, office_properties(Hidden=True))
+        self.store_pdf(document, pdf_file)
+
+    def convert_stream(self, document: IO[bytes], pdf_file: str) -> None:
+        import uno
+
+        # hand the bytes to the office process directly instead of writing a temporary file
+        stream: Any = self.context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.io.SequenceInputStream", self.context)
+        stream.initialize((uno.ByteSequence(document.read()),))
+        office_document: Any = self.desktop.loadComponentFromURL(
+            "private:stream", "_blank", 0, office_properties(Hidden=True, InputStream=stream))
+        self.store_pdf(office_document, pdf_file)
+
+    def store_pdf(self, document: Any, pdf_file: str) -> None:
+        """
+        Exports a loaded office document as pdf and closes it.
+
+        Args:
+            document (Any): The loaded office document.
+            pdf_file (str): Path the pdf file is written to.
+
+        Returns:
+            None
+        """
+        import uno
+
+        try:
+            document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(pdf_file)),
+                                office_properties(FilterName="writer_pdf_Export"))
+        finally:
+            document.close(True)
+
+    def close(self) -> None:
+        try:
+            if self.desktop is not None:
+                self.desktop.terminate()
+        except Exception:
+            pass  # the process is killed below if it does not stop
+        finally:
+            self.context = None
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.profile_folder is not None:
+            shutil.rmtree(self.profile_folder, ignore_errors=True)
+            self.profile_folder = None
+
+
+class StubConverter(Converter):
+    """Does not convert anything but copies the docx file to the pdf path. Meant for tests and benchmarks."""
+    name: str = "stub"
+
+    def convert(self, docx_file: str, pdf_file: str) -> None:
+        shutil.copyfile(docx_file, pdf_file)
+
+    def convert_stream(self, document: IO[bytes], pdf_file: str) -> None:
+        with open(pdf_file, "wb") as file:
+            shutil.copyfileobj(document, file)
+
+
+CONVERTERS: dict[str, type[Converter]] = {
+    converter.name: converter for converter in (Docx2PdfConverter, WordConverter, LibreOfficeConverter, StubConverter)}
+
+if sys.platform == "win32":
+    DEFAULT_CONVERTER = WordConverter.name
+elif sys.platform == "darwin":
+    DEFAULT_CONVERTER = Docx2PdfConverter.name
+else:
+    DEFAULT_CONVERTER = LibreOfficeConverter.name
+
+
+def create_converter(name: str) -> Converter:
+    """
+    Creates the converter backend with the given name.
+
+    Args:
+        name (str): Name of the backend, one of CONVERTERS.
+
+    Returns:
+        Converter: The (not yet started) converter.
+    """
+    if name not in CONVERTERS:
+        raise ValueError(f"Unknown pdf converter: {name} (available: {', '.join(CONVERTERS)})")
+    return CONVERTERS[name]()
+
+
+def office_properties(**properties: Any) -> tuple[Any, ...]:
+    """
+    Creates a tuple of UNO PropertyValues from keyword arguments.
+    """
+    from com.sun.star.beans import PropertyValue
+
+    values: list[Any] = []
+    for name, value in properties.items():
+        property_value: Any = PropertyValue()
+        property_value.Name = name
+        property_value.Value = value
+        values.append(property_value)
+    return tuple(values)
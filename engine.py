@@ -0,0 +1,570 @@
+# First-party modules
+from archive import ArchiveSink
+from cache import CACHE_BUDGET_DEFAULT, CACHE_FOLDER, RenderCache, link_or_copy, remove_file
+from converters import DEFAULT_CONVERTER
+from filenames import FilenamePattern, check_filename, get_combined_filename
+from loader import CHUNK_SIZE, DataLoader, compact_dtypes, create_loader
+from manifest import Manifest, hash_job, hash_row, hash_template
+from mapping import EMPTY_COLUMN_NAME, LEAVE_EMPTY, ColumnPlan, HeadingIndex, get_date_extra
+from parallel import (MEMORY_BUDGET_DEFAULT, DocumentJob, DocumentResult, RowJob, RowResult, WORKER_COUNT_DEFAULT,
+                      generate_parallel, get_output_filename, render_combined)
+from profiles import ProfileStore
+from report import PROFILE_FOLDER, PageIndex, RunReport
+from template import CompiledTemplate
+from validation import DataValidator, ValidationReport
+
+# Third-party modules
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+# Value of ContractBatch.combine to merge all rows into a single document
+COMBINE_ALL = sys.maxsize
+
+
+class ContractBatch:
+    """
+    Creates contracts from a Word template and an Excel spreadsheet without any GUI. Used by the
+    ContractCreationTool as well as by the command line interface (cli.py).
+
+    openpyxl and pandas are only imported once the data is loaded.
+    """
+
+    def __init__(self, word_file: str, excel_file: str, output_folder: str = "", filename_pattern: str = "",
+                 mappings: Optional[dict[str, str]] = None, workers: int = WORKER_COUNT_DEFAULT,
+                 convert_pdf: bool = True, converter: str = DEFAULT_CONVERTER,
+                 memory_budget: int = MEMORY_BUDGET_DEFAULT, incremental: bool = True,
+                 date_prefix: bool = False, report_format: Optional[str] = "jsonl", profile_every: int = 0,
+                 cache: bool = True, cache_budget: int = CACHE_BUDGET_DEFAULT, combine: int = 0,
+                 page_index: bool = True, archive: Optional[str] = None) -> None:
+        self.word_file: str = word_file
+        self.excel_file: str = excel_file
+        self.output_folder: str = output_folder
+        self.filename_pattern: str = filename_pattern
+        self.mappings: dict[str, str] = dict(mappings or {})
+        self.workers: int = workers
+        self.convert_pdf: bool = convert_pdf
+        self.converter: str = converter
+        self.memory_budget: int = memory_budget
+        # skip rows whose output is up to date according to the manifest of the output folder
+        self.incremental: bool = incremental
+        # the current date in front of the filenames, changes the names (and so the manifest entries) every day
+        self.date_prefix: bool = date_prefix
+        # format of the run report written to the output folder ("jsonl" or "csv"), None for no report
+        self.report_format: Optional[str] = report_format
+        # profile every n-th row with cProfile (0 => no profiling)
+        self.profile_every: int = profile_every
+        # render rows with identical merge values only once, keep up to cache_budget bytes of documents
+        self.cache: bool = cache
+        self.cache_budget: int = cache_budget
+        # merge this many rows into one document (COMBINE_ALL for all rows), 0 => one document per row
+        self.combine: int = combine
+        # write an index of the documents the rows are merged into for combined documents
+        self.page_index: bool = page_index
+        # write the documents into this ZIP or tar archive (relative to the output folder) instead of the folder
+        self.archive: Optional[str] = archive
+        # local folder the documents are rendered into before they are added to the archive
+        self.staging_folder: Optional[str] = None
+        # report of the last run
+        self.report: Optional[RunReport] = None
+        # set by cancel() to stop a running generation (from another thread)
+        self.cancel_event: threading.Event = threading.Event()
+
+        self.template: Optional[CompiledTemplate] = None
+        self.data: Optional[DataLoader] = None
+        self.excel_headings: list[str] = []
+        # mapping profile the template and data file were loaded from (see ProfileStore)
+        self.profile: Optional[dict[str, Any]] = None
+
+    @property
+    def merge_fields(self) -> list[str]:
+        """The merge fields of the loaded template."""
+        if self.template is not None:
+            return self.template.merge_fields
+        return list(self.profile["merge_fields"]) if self.profile is not None else []
+
+    @property
+    def render_folder(self) -> str:
+        """The folder the documents are rendered into, a temporary folder while writing an archive."""
+        return self.staging_folder or self.output_folder
+
+    @property
+    def columns(self) -> list[str]:
+        """The column names of the loaded worksheet."""
+        return self.data.columns if self.data is not None else []
+
+    @property
+    def rows(self) -> int:
+        """The (estimated) number of rows of the loaded worksheet."""
+        return self.data.rows if self.data is not None else 0
+
+    def load(self, profiles: Optional[ProfileStore] = None) -> None:
+        """
+        Compiles the Word template and reads the headings of the Excel spreadsheet (or csv/Parquet file).
+        The rows are streamed later on while the contracts are generated. If the pair of files has a
+        mapping profile and both are unchanged, the cached merge fields and headings are used instead
+        and the template is only compiled once the contracts are generated.
+
+        Args:
+            profiles (ProfileStore): The saved mapping profiles, None to always read both files.
+
+        Returns:
+            None
+        """
+        self.template = None
+        self.profile = profiles.find(self.word_file, self.excel_file) if profiles is not None else None
+        self.data = create_loader(self.excel_file)
+        if self.profile is not None:
+            self.data.set_headers(tuple(self.profile["headers"]))
+            self.data.rows = self.profile["rows"]
+        else:
+            # Read the headings from the Excel file
+            self.data.load_headers()
+
+        # Get the Excel file headings
+        excel_headings: list[str] = [EMPTY_COLUMN_NAME if header is None else column
+                                     for header, column in zip(self.data.headers, self.data.columns)]
+        excel_headings.append(LEAVE_EMPTY)
+        excel_headings.append(get_date_extra())
+        self.excel_headings = excel_headings
+
+        if self.profile is None:
+            # Parse the Word file once and read its merge fields
+            self.template = CompiledTemplate(self.word_file)
+
+    def compile(self) -> CompiledTemplate:
+        """
+        Returns the compiled template, compiling it first if the merge fields came from a profile.
+
+        Returns:
+            CompiledTemplate: The compiled template.
+        """
+        if self.template is None:
+            self.template = CompiledTemplate(self.word_file)
+        return self.template
+
+    def save_profile(self, profiles: ProfileStore) -> None:
+        """
+        Saves the merge fields, headings, mappings and filename pattern as mapping profile of the
+        template and the data file.
+
+        Args:
+            profiles (ProfileStore): The saved mapping profiles.
+
+        Returns:
+            None
+        """
+        profiles.store(self.word_file, self.excel_file, self.merge_fields, self.data.headers, self.rows,
+                       self.mappings, self.filename_pattern)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the last generation has been cancelled."""
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """
+        Cancels a running generation: no further rows are started, the rows already handed to the
+        workers are finished. Can be called from any thread.
+
+        Returns:
+            None
+        """
+        self.cancel_event.set()
+
+    def auto_map(self, default: str = LEAVE_EMPTY) -> None:
+        """
+        Maps every merge field that has no mapping yet to the heading matching it best (see
+        HeadingIndex), or to the default heading if there is none.
+
+        Args:
+            default (str): Heading of the fields matching no heading, leave empty by default.
+
+        Returns:
+            None
+        """
+        index: HeadingIndex = HeadingIndex(self.excel_headings)
+        for field in self.merge_fields:
+            if field not in self.mappings:
+                self.mappings[field] = index.match(field) or default
+
+    def check(self) -> str:
+        """
+        Checks the filename pattern and the mappings.
+
+        Returns:
+            str: Error Message, empty if everything is valid.
+        """
+        return_msg: str = check_filename(self.filename_pattern, self.columns)
+        for field, column in self.mappings.items():
+            if column not in self.excel_headings:
+                return_msg += f"\nUnknown column mapped to {field}: {column}"
+        return return_msg
+
+    def validate(self) -> ValidationReport:
+        """
+        Checks the merge values and filenames of all rows before rendering anything (see DataValidator).
+        Only the columns used by the mapping and the filename pattern are read.
+
+        Returns:
+            ValidationReport: The issues found in the data.
+        """
+        plan: ColumnPlan = ColumnPlan(self.mappings, self.columns)
+        filenames: FilenamePattern = FilenamePattern(self.filename_pattern, self.columns, self.excel_file,
+                                                     date_prefix=self.date_prefix)
+        # combined documents are named after the rows they contain, not by the pattern
+        validator: DataValidator = DataValidator(plan, filenames if self.combine <= 0 else None, self.output_folder,
+                                                 self.convert_pdf)
+        columns: list[str] = list(dict.fromkeys(plan.source_columns + filenames.source_columns))
+        for chunk in self.data.iter_chunks(CHUNK_SIZE, columns):
+            validator.check_chunk(chunk)
+        return validator.finish()
+
+    def create_row_jobs(self, timings: Optional[dict[int, dict[str, float]]] = None) -> Iterator[RowJob]:
+        """Creates the mappings and the filename for each row of the worksheet.
+
+        Args:
+            timings (Dict): Filled with the seconds spent reading, mapping and naming every row. The
+                chunks are processed at once, so every row of a chunk gets an equal share.
+
+        Returns:
+            Iterator: One RowJob per row.
+        """
+        plan: ColumnPlan = ColumnPlan(self.mappings, self.columns)
+        filenames: FilenamePattern = FilenamePattern(self.filename_pattern, self.columns, self.excel_file,
+                                                     date_prefix=self.date_prefix)
+        # only read the columns used by the mapping and the filename pattern
+        columns: list[str] = list(dict.fromkeys(plan.source_columns + filenames.source_columns))
+        chunks: Iterator = self.data.iter_chunks(CHUNK_SIZE, columns)
+        while True:
+            start: float = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            chunk = compact_dtypes(chunk)
+            read_time: float = time.perf_counter() - start
+
+            # resolve the merge values and the filenames of all rows of the chunk at once
+            start = time.perf_counter()
+            merge_values: list[dict[str, str]] = plan.resolve(chunk)
+            mapping_time: float = time.perf_counter() - start
+            start = time.perf_counter()
+            chunk_filenames: list[str] = filenames.format(chunk)
+            filename_time: float = time.perf_counter() - start
+
+            row_timings: dict[str, float] = {"excel_read": read_time / len(chunk),
+                                             "mapping": mapping_time / len(chunk),
+                                             "filename": filename_time / len(chunk)}
+            for row_id, temp, filename in zip(chunk.index, merge_values, chunk_filenames):
+                if self.cancel_event.is_set():
+                    return
+                if timings is not None:
+                    timings[row_id] = row_timings
+                profile: bool = self.profile_every > 0 and row_id % self.profile_every == 0
+                yield RowJob(row_id, temp, filename, profile)
+
+    def skip_current_rows(self, jobs: Iterable[RowJob], manifest: Manifest, digests: dict[int, tuple[str, str]],
+                          skip: Callable[[RowResult], None]) -> Iterator[RowJob]:
+        """
+        Filters out the rows whose output file exists and was generated from the same content.
+
+        Args:
+            jobs (Iterable): The rows to render.
+            manifest (Manifest): The manifest of the output folder.
+            digests (Dict): Filled with the output filename and content hash of every row that is rendered.
+            skip (Callable): Called with the result of every skipped row.
+
+        Returns:
+            Iterator: The rows that have to be rendered.
+        """
+        output_type: str = self.converter if self.convert_pdf else "docx"
+        base = hash_job(self.word_file, self.mappings, self.filename_pattern, output_type)
+        for job in jobs:
+            output_filename: str = get_output_filename(job.filename, self.convert_pdf)
+            digest: str = hash_row(base, job.mappings, job.filename)
+            if manifest.is_current(output_filename, digest):
+                skip(RowResult(job.row_id, job.filename, None, True))
+                continue
+            digests[job.row_id] = (output_filename, digest)
+            yield job
+
+    def reuse_cached_rows(self, jobs: Iterable[RowJob], cache: RenderCache, keys: dict[int, str],
+                          waiting: dict[str, list[RowJob]], reuse: Callable[[RowResult], None]) -> Iterator[RowJob]:
+        """
+        Filters out the rows whose document is cached or is already being rendered for another row
+        with the same merge values. Cached documents are copied right away, the others are copied by
+        copy_duplicates once the first row with the same content has been rendered.
+
+        Args:
+            jobs (Iterable): The rows to render.
+            cache (RenderCache): The cache of rendered documents.
+            keys (Dict): Filled with the content hash of every row that is rendered.
+            waiting (Dict): Filled with the rows waiting for the document with the content hash.
+            reuse (Callable): Called with the result of every row copied from the cache.
+
+        Returns:
+            Iterator: The rows that have to be rendered.
+        """
+        base = hash_template(self.word_file, self.converter if self.convert_pdf else "docx")
+        for job in jobs:
+            key: str = hash_row(base, job.mappings, "")
+            if key in waiting:
+                waiting[key].append(job)
+                continue
+            file_path: str = os.path.join(self.render_folder, get_output_filename(job.filename, self.convert_pdf))
+            start: float = time.perf_counter()
+            try:
+                restored: bool = cache.restore(key, file_path)
+            except OSError:
+                restored = False
+            if restored:
+                reuse(RowResult(job.row_id, job.filename, None, size=os.path.getsize(file_path),
+                                timings={"write": time.perf_counter() - start}, cached=True))
+                continue
+            waiting[key] = []
+            keys[job.row_id] = key
+            yield job
+
+    def copy_duplicates(self, result: RowResult, cache: RenderCache, keys: dict[int, str],
+                        waiting: dict[str, list[RowJob]]) -> list[RowResult]:
+        """
+        Adds a rendered document to the cache and copies it for every row that waited for it (see
+        reuse_cached_rows). If the document could not be rendered, these rows fail with the same error.
+
+        Args:
+            result (RowResult): The outcome of the rendered row.
+            cache (RenderCache): The cache of rendered documents.
+            keys (Dict): The content hash of every rendered row.
+            waiting (Dict): The rows waiting for the document with the content hash.
+
+        Returns:
+            List: The results of the rows that waited for the document.
+        """
+        key: Optional[str] = keys.pop(result.row_id, None)
+        if key is None:
+            return []
+        duplicates: list[RowJob] = waiting.pop(key, [])
+        if result.error is not None:
+            return [RowResult(job.row_id, job.filename, result.error) for job in duplicates]
+
+        source: str = os.path.join(self.render_folder, get_output_filename(result.filename, self.convert_pdf))
+        try:
+            cache.store(key, source)
+        except OSError:
+            pass  # the cache is only an optimization
+        results: list[RowResult] = []
+        for job in duplicates:
+            file_path: str = os.path.join(self.render_folder, get_output_filename(job.filename, self.convert_pdf))
+            start: float = time.perf_counter()
+            try:
+                link_or_copy(source, file_path)
+            except OSError as e:
+                results.append(RowResult(job.row_id, job.filename, f"{type(e).__name__}: {str(e)}"))
+                continue
+            results.append(RowResult(job.row_id, job.filename, None, size=os.path.getsize(file_path),
+                                     timings={"write": time.perf_counter() - start}, cached=True))
+        return results
+
+    def open_archive(self, stack: contextlib.ExitStack) -> Optional[ArchiveSink]:
+        """
+        Opens the archive (if enabled) and a temporary folder the documents are rendered into until they
+        are added to the archive. Both are closed with the stack.
+
+        Args:
+            stack (ExitStack): The stack of the run.
+
+        Returns:
+            ArchiveSink: The archive, None if the documents are written to the output folder.
+        """
+        if not self.archive:
+            return None
+        sink: ArchiveSink = stack.enter_context(ArchiveSink(os.path.join(self.output_folder, self.archive)))
+        self.staging_folder = stack.enter_context(tempfile.TemporaryDirectory(prefix="contract-archive-"))
+        stack.callback(setattr, self, "staging_folder", None)
+        return sink
+
+    def add_to_archive(self, sink: ArchiveSink, filename: str, row_ids: list[int], error: Optional[str]) -> None:
+        """
+        Moves a finished document into the archive and records its rows in the index of the archive.
+
+        Args:
+            sink (ArchiveSink): The archive.
+            filename (str): Name of the rendered docx file.
+            row_ids (List): The rows of the document.
+            error (str): The error of the document, None if it was rendered successfully.
+
+        Returns:
+            None
+        """
+        member: str = get_output_filename(filename, self.convert_pdf)
+        if error is None:
+            sink.add(os.path.join(self.render_folder, member), member)
+        for row_id in row_ids:
+            sink.record(row_id, member if error is None else "", error)
+
+    def run(self, progress: Optional[Callable[[RowResult], None]] = None) -> list[RowResult]:
+        """
+        Renders all rows and converts them to pdf (if enabled). In incremental mode rows whose output
+        is up to date are skipped and every generated file is recorded in the manifest. Rows with the
+        same merge values as a cached or already rendered row are copied instead of rendered (if the
+        cache is enabled). The time spent in every stage is written to the run report (if enabled).
+        With an archive, every document is added to the archive as soon as it is finished; the manifest
+        and the cache are not used then (they keep one file per document in the output folder).
+
+        Args:
+            progress (Callable): Optional callback that is called with the result of every finished row.
+
+        Returns:
+            List: The results of all rows, ordered by row id.
+        """
+        if self.combine > 0:
+            return self.run_combined(progress)
+        self.cancel_event.clear()
+        template: CompiledTemplate = self.compile()
+        # results of the rows that were not rendered by the workers (skipped or copied)
+        reused: list[RowResult] = []
+        digests: dict[int, tuple[str, str]] = {}
+        timings: dict[int, dict[str, float]] = {}
+        keys: dict[int, str] = {}
+        waiting: dict[str, list[RowJob]] = {}
+        self.report = RunReport(self.output_folder, self.report_format) if self.report_format else None
+        profile_folder: Optional[str] = os.path.join(self.output_folder, PROFILE_FOLDER) if self.profile_every else None
+
+        with contextlib.ExitStack() as stack:
+            manifest: Optional[Manifest] = stack.enter_context(Manifest(self.output_folder)) \
+                if self.incremental and not self.archive else None
+            report: Optional[RunReport] = stack.enter_context(self.report) if self.report is not None else None
+            cache: Optional[RenderCache] = stack.enter_context(RenderCache(
+                os.path.join(self.output_folder, CACHE_FOLDER), self.cache_budget)) \
+                if self.cache and not self.archive else None
+            sink: Optional[ArchiveSink] = self.open_archive(stack)
+
+            def complete(result: RowResult) -> None:
+                # the stages of the main process are measured per chunk, those of the workers per row
+                result = result._replace(timings={**timings.pop(result.row_id, {}), **(result.timings or {})})
+                if manifest is not None and result.error is None and result.row_id in digests:
+                    manifest.record(*digests.pop(result.row_id))
+                if sink is not None:
+                    self.add_to_archive(sink, result.filename, [result.row_id], result.error)
+                if report is not None:
+                    report.record(result, self.convert_pdf)
+                if progress is not None:
+                    progress(result)
+
+            def discard(result: RowResult) -> None:
+                # the document is in the archive now
+                if sink is not None:
+                    remove_file(os.path.join(self.render_folder, get_output_filename(result.filename, self.convert_pdf)))
+
+            def reuse(result: RowResult) -> None:
+                reused.append(result)
+                complete(result)
+                discard(result)
+
+            def finish(result: RowResult) -> None:
+                complete(result)
+                if cache is not None:
+                    for duplicate in self.copy_duplicates(result, cache, keys, waiting):
+                        reuse(duplicate)
+                discard(result)
+
+            jobs: Iterable[RowJob] = self.create_row_jobs(timings)
+            if manifest is not None:
+                jobs = self.skip_current_rows(jobs, manifest, digests, reuse)
+            if cache is not None:
+                jobs = self.reuse_cached_rows(jobs, cache, keys, waiting, reuse)
+            results: list[RowResult] = generate_parallel(
+                template, jobs, self.render_folder, workers=self.workers,
+                converter=self.converter if self.convert_pdf else None, memory_budget=self.memory_budget,
+                progress=finish, profile_folder=profile_folder)
+        return sorted(results + reused, key=lambda result: result.row_id)
+
+    def create_document_jobs(self, timings: Optional[dict[int, dict[str, float]]] = None) -> Iterator[DocumentJob]:
+        """
+        Groups the rows of the worksheet into combined documents of at most combine rows.
+
+        Args:
+            timings (Dict): Filled with the seconds spent reading, mapping and naming every row.
+
+        Returns:
+            Iterator: One DocumentJob per combined document.
+        """
+        rows: list[RowJob] = []
+        for job in self.create_row_jobs(timings):
+            rows.append(job)
+            if len(rows) >= self.combine:
+                yield self.create_document_job(rows)
+                rows = []
+        if rows:
+            yield self.create_document_job(rows)
+
+    def create_document_job(self, rows: list[RowJob]) -> DocumentJob:
+        """
+        Creates a combined document named after the Excel file and its first and last row.
+
+        Args:
+            rows (List): The rows of the document.
+
+        Returns:
+            DocumentJob: The combined document.
+        """
+        filename: str = get_combined_filename(self.excel_file, f"Rows {rows[0].row_id + 2}-{rows[-1].row_id + 2}.docx",
+                                              self.date_prefix)
+        return DocumentJob(rows[0].row_id, rows, filename)
+
+    def run_combined(self, progress: Optional[Callable[[RowResult], None]] = None) -> list[RowResult]:
+        """
+        Merges the rows into combined documents of combine rows each (one MailMerge.merge_templates call
+        and one conversion per document) and writes the page index (if enabled). The manifest and the
+        cache are not used for combined documents. With an archive, the documents are added to the archive.
+
+        Args:
+            progress (Callable): Optional callback that is called with the result of every finished row.
+
+        Returns:
+            List: The results of all rows, ordered by row id.
+        """
+        self.cancel_event.clear()
+        template: CompiledTemplate = self.compile()
+        timings: dict[int, dict[str, float]] = {}
+        documents: dict[int, DocumentJob] = {}
+        results: list[RowResult] = []
+        self.report = RunReport(self.output_folder, self.report_format) if self.report_format else None
+        index: Optional[PageIndex] = PageIndex(os.path.join(self.output_folder, get_combined_filename(
+            self.excel_file, "Index.csv", self.date_prefix)), self.convert_pdf) if self.page_index else None
+
+        def track(jobs: Iterable[DocumentJob]) -> Iterator[DocumentJob]:
+            for job in jobs:
+                documents[job.row_id] = job
+                yield job
+
+        with contextlib.ExitStack() as stack:
+            report: Optional[RunReport] = stack.enter_context(self.report) if self.report is not None else None
+            sink: Optional[ArchiveSink] = self.open_archive(stack)
+
+            def finish(document: DocumentResult) -> None:
+                job: DocumentJob = documents.pop(document.row_id)
+                if index is not None:
+                    index.record(job, document)
+                if sink is not None:
+                    self.add_to_archive(sink, document.filename, [row.row_id for row in job.rows], document.error)
+                    remove_file(os.path.join(self.render_folder, get_output_filename(document.filename, self.convert_pdf)))
+                for result in document.rows:
+                    result = result._replace(timings={**timings.pop(result.row_id, {}), **(result.timings or {})})
+                    results.append(result)
+                    if report is not None:
+                        report.record(result, self.convert_pdf)
+                    if progress is not None:
+                        progress(result)
+
+            generate_parallel(template, track(self.create_document_jobs(timings)), self.render_folder,
+                              workers=self.workers, converter=self.converter if self.convert_pdf else None,
+                              memory_budget=self.memory_budget, progress=finish, render=render_combined)
+        if index is not None:
+            index.write()
+        return sorted(results, key=lambda result: result.row_id)
@@ -0,0 +1,228 @@
+# First-party modules
+from loader import to_text_frame
+
+# Third-party modules
+import datetime
+import os
+import re
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+ILLEGAL_CHARACTER_LIST = ["<", ">", ":", "\"", "\\", "/", "|", "?", "*"]
+ILLEGAL_CHARACTER_REGEX = "[" + re.escape("".join(ILLEGAL_CHARACTER_LIST)) + "]"
+FILETYPE = ".docx"
+
+
+class FilenamePattern:
+    """
+    Filename pattern compiled once into literal text and pre-resolved columns. Creates the filenames of
+    a whole chunk of rows at once. The names are deterministic, so a rerun produces the same names:
+    collisions get a " (2)", " (3)", ... suffix in row order instead of a timestamp.
+    """
+
+    def __init__(self, pattern: str, columns: list[str], excel_file: str = "", date_prefix: bool = False) -> None:
+        self.pattern: str = pattern
+        # the current date in front of every name, leave it out to keep the names stable across days
+        self.prefix: str = f"{get_date_file()} - " if date_prefix else ""
+        # literal text and column names (as one-element tuples) in the order of the pattern
+        self.segments: list[Union[str, tuple[str]]] = []
+        # lower case names that have already been used, Windows file names are case-insensitive
+        self.used_names: set[str] = set()
+
+        if not pattern:
+            # default name, made unique by the row number
+            self.prefix += f"Autocreation for {os.path.basename(excel_file)} - "
+            return
+
+        for index, part in enumerate(re.split("({.+?})", pattern)):
+            column: str = part[1:-1].strip() if index % 2 else ""
+            if column in columns:
+                self.segments.append((column,))
+            elif part:
+                self.segments.append(part)
+
+    @property
+    def source_columns(self) -> list[str]:
+        """The columns used by the pattern (each one only once)."""
+        return list(dict.fromkeys(segment[0] for segment in self.segments if isinstance(segment, tuple)))
+
+    def format(self, chunk: "pd.DataFrame") -> list[str]:
+        """
+        Creates the filenames for all rows of a chunk. Illegal characters are removed from the
+        inserted values, spaces around the name and dots at its end are removed (see strip_filenames),
+        duplicate names are made unique.
+
+        Args:
+            chunk (DataFrame): Rows of the worksheet, the index is the row number.
+
+        Returns:
+            List: One filename (including the file extension) per row.
+        """
+        names: pd.Series = strip_filenames(self.substitute(chunk).str.replace(ILLEGAL_CHARACTER_REGEX, "", regex=True))
+        return [self.make_unique(self.prefix + name) for name in names.tolist()]
+
+    def substitute(self, chunk: "pd.DataFrame") -> "pd.Series":
+        """
+        Inserts the values of all rows of a chunk into the pattern, without the prefix, removing illegal
+        characters or making the names unique.
+
+        Args:
+            chunk (DataFrame): Rows of the worksheet, the index is the row number.
+
+        Returns:
+            Series: One filename (without extension) per row.
+        """
+        import pandas as pd
+
+        if not self.pattern:
+            names: pd.Series = pd.Series([str(row_id + 1) for row_id in chunk.index], index=chunk.index, dtype=object)
+        else:
+            text: pd.DataFrame = to_text_frame(chunk, self.source_columns)
+            names = pd.Series("", index=chunk.index, dtype=object)
+            for segment in self.segments:
+                names = names + (text[segment[0]] if isinstance(segment, tuple) else segment)
+        return names
+
+    def make_unique(self, name: str) -> str:
+        """
+        Adds a counter to the name if it has been used before and appends the file extension.
+
+        Args:
+            name (str): Filename without extension.
+
+        Returns:
+            str: The unique filename.
+        """
+        unique_name: str = name
+        count: int = 1
+        while unique_name.lower() in self.used_names:
+            count += 1
+            unique_name = f"{name} ({count})"
+        self.used_names.add(unique_name.lower())
+        return unique_name + FILETYPE
+
+
+def strip_filenames(names: "pd.Series") -> "pd.Series":
+    """
+    Removes spaces from the start and end of filenames and dots from their end, which Windows drops
+    from file names (e.g. a pattern starting with a space or a value ending with "Ltd.").
+
+    Args:
+        names (Series): Filenames without extension.
+
+    Returns:
+        Series: The stripped filenames.
+    """
+    return names.str.strip().str.rstrip(". ")
+
+
+def get_date_file() -> str:
+    """
+    Returns the current date in yymmdd format as a string.
+    """
+    return str(datetime.datetime.today().strftime("%y%m%d"))
+
+
+def get_combined_filename(excel_file: str, suffix: str, date_prefix: bool = False) -> str:
+    """
+    Returns the name of a file belonging to the whole Excel file, e.g. a combined document.
+
+    Args:
+        excel_file (str): Path of the Excel file.
+        suffix (str): Appended to the name of the Excel file, e.g. "Rows 2-101.docx".
+        date_prefix (bool): Whether the name starts with the current date.
+
+    Returns:
+        str: The filename.
+    """
+    prefix: str = f"{get_date_file()} - " if date_prefix else ""
+    return clean_filename(f"{prefix}{os.path.splitext(os.path.basename(excel_file))[0]} - {suffix}")
+
+
+def extract_columns(pattern: str) -> list[str]:
+    """
+    Extracts all column names from a filename pattern.
+
+    Args:
+        pattern (str): The filename pattern.
+
+    Returns:
+        List: column names.
+    """
+    return [col.strip() for col in re.findall("{(.+?)}", pattern)]
+
+
+def check_columns(pattern: str, columns: list[str]) -> tuple[bool, Optional[list[str]]]:
+    """
+    Checks if all column names in the filename pattern match the column names of the worksheet.
+
+    Args:
+        pattern (str): The filename pattern.
+        columns (List): The column names of the worksheet.
+
+    Returns:
+        Tuple: containing a boolean value indicating whether all columns are present, and a list of any missing column names.
+    """
+    cols: list[str] = [col for col in extract_columns(pattern) if col not in columns]
+    return not cols, cols
+
+
+def check_filename(pattern: str, columns: list[str]) -> str:
+    """
+    Checks if the filename pattern contains any unknown columns or illegal characters.
+
+    Args:
+        pattern (str): The filename pattern.
+        columns (List): The column names of the worksheet.
+
+    Returns:
+        str: Error Message.
+    """
+    return_msg: str = ""
+    col_check: bool
+    col_found: Optional[list[str]]
+    col_check, col_found = check_columns(pattern, columns)
+    if not col_check:
+        for cols in col_found:
+            return_msg += f"Unknown column: {{{cols}}}\n"
+
+    try:
+        filename_check_bool, filename_check_list = contains_illegal_char(pattern)
+        if filename_check_bool:
+            for char in filename_check_list:
+                return_msg += f"\nIllegal character found in filename: {char}"
+    except TypeError as e:
+        return f"Error: {str(e)}"
+    if return_msg != "":
+        return_msg += "\n\n See Help for more information."
+    return return_msg
+
+
+def clean_filename(input_text: str) -> str:
+    """
+    Cleans the an input string, removing ILLEGAL_CHARACTERS(["<", ">", ":", "\"", "\\", "/", "|", "?", "*"])
+
+
+    Args:
+        input_text (str): String that needs to be cleaned.
+
+    Returns:
+        str: cleaned input
+     """
+    for character in ILLEGAL_CHARACTER_LIST:
+        input_text = input_text.replace(character, "")
+    return input_text
+
+
+def contains_illegal_char(input_text: str) -> tuple[bool, Optional[list[str]]]:
+    check_bool: bool = False
+    illegal_chars: list[str] = []
+    for character in ILLEGAL_CHARACTER_LIST:
+        if character in input_text:
+            check_bool = True
+            illegal_chars.append(character)
+
+    return check_bool, illegal_chars
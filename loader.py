@@ -0,0 +1,379 @@
+# Third-party modules
+import abc
+import csv
+import os
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Number of rows that are resolved together while generating
+CHUNK_SIZE = 1000
+# Bytes read at once when counting the lines of a csv file
+COUNT_BLOCK_SIZE = 1024 * 1024
+# Text columns with at most this share of distinct values are converted to categoricals
+CATEGORY_RATIO = 0.5
+# Delimiters recognized in csv files
+CSV_DELIMITERS = ",;\t|"
+
+
+class DataLoader(abc.ABC):
+    """
+    Base class of the data sources. The first row (or the schema) provides the headers, the rows are
+    streamed as chunks by iter_chunks, so the memory usage does not depend on the size of the file.
+    Only the requested columns are read where the file format allows it.
+
+    The libraries of a backend are only imported once the file is read.
+    """
+    extensions: tuple[str, ...] = ()
+
+    def __init__(self, excel_file: str) -> None:
+        self.excel_file: str = excel_file
+        # headings as found in the file, None for empty heading cells
+        self.headers: list[Optional[str]] = []
+        # unique column names used as keys of the rows (like pandas: "Unnamed: 3", "Name.1")
+        self.columns: list[str] = []
+        # (estimated) number of data rows
+        self.rows: int = 0
+
+    def set_headers(self, header_row: tuple[Any, ...]) -> None:
+        """
+        Sets the headers and unique column names from the first row of the file.
+
+        Args:
+            header_row (Tuple): The values of the first row.
+
+        Returns:
+            None
+        """
+        self.headers = [None if value is None or value == "" else str(value) for value in header_row]
+        self.columns = unique_columns(self.headers)
+
+    @abc.abstractmethod
+    def load_headers(self) -> None:
+        """
+        Reads the headers and the (estimated) number of rows without reading the rest of the file.
+
+        Returns:
+            None
+        """
+
+    @abc.abstractmethod
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, columns: Optional[list[str]] = None) -> Iterator["pd.DataFrame"]:
+        """
+        Streams the rows as DataFrames of at most chunk_size rows. Empty cells are None (or NaN), the
+        index is the row number.
+
+        Args:
+            chunk_size (int): Maximum number of rows per chunk.
+            columns (List): The columns to read, None for all columns.
+
+        Returns:
+            Iterator: The chunks of the file.
+        """
+
+
+class ExcelLoader(DataLoader):
+    """
+    Streams an Excel spreadsheet in openpyxl's read-only mode. The first row is used as header, all
+    following rows are returned one by one by iter_rows.
+    """
+    extensions: tuple[str, ...] = (".xlsx", ".xlsm")
+
+    def open(self) -> Any:
+        """
+        Opens the workbook in read-only mode.
+
+        Returns:
+            openpyxl.Workbook: The workbook, must be closed by the caller.
+        """
+        import openpyxl
+        return openpyxl.load_workbook(self.excel_file, read_only=True, data_only=True)
+
+    def load_headers(self) -> None:
+        wb = self.open()
+        try:
+            ws = wb.active
+            self.set_headers(next(ws.iter_rows(max_row=1, values_only=True), ()))
+            if ws.max_row is not None:
+                self.rows = max(ws.max_row - 1, 0)
+            else:
+                # no dimensions stored in the file => count the rows
+                self.rows = sum(1 for _ in ws.iter_rows(min_row=2, values_only=True))
+        finally:
+            wb.close()
+
+    def iter_values(self, columns: Optional[list[str]] = None) -> Iterator[tuple[int, tuple[Any, ...]]]:
+        """
+        Streams the rows of the sheet in a single pass, completely empty rows are skipped (judged by all
+        cells of the row, not only the requested ones). Without columns the header is re-read from the
+        same pass, with columns the headers of load_headers are used.
+
+        Args:
+            columns (List): The columns to read, None for all columns.
+
+        Returns:
+            Iterator: The row number (0 for the first row below the header, i.e. Excel row 2) and a tuple
+                of cell values per row, in the order of the columns.
+        """
+        if columns is not None and not self.columns:
+            self.load_headers()
+        indices: list[int] = [self.columns.index(column) for column in columns or []]
+        wb = self.open()
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header_row: tuple[Any, ...] = next(rows, ())
+            if columns is None:
+                self.set_headers(header_row)
+                indices = list(range(len(self.columns)))
+            for row_id, values in enumerate(rows):
+                if all(value is None for value in values):
+                    continue
+                yield row_id, tuple(values[index] if index < len(values) else None for index in indices)
+        finally:
+            wb.close()
+
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        """
+        Streams the rows of the sheet in a single pass.
+
+        Returns:
+            Iterator: One dictionary per row mapping the column names to the cell values.
+        """
+        for _, values in self.iter_values():
+            yield dict(zip(self.columns, values))
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, columns: Optional[list[str]] = None) -> Iterator["pd.DataFrame"]:
+        """
+        Streams the rows of the sheet as DataFrames of at most chunk_size rows. The values keep their
+        Excel types (object dtype, None for empty cells), the index is the row number in the sheet
+        (see iter_values), so skipped empty rows leave gaps.
+
+        Args:
+            chunk_size (int): Maximum number of rows per chunk.
+            columns (List): The columns to keep, None for all columns.
+
+        Returns:
+            Iterator: The chunks of the sheet.
+        """
+        import pandas as pd
+
+        selected: list[str] = columns if columns is not None else self.columns
+        row_ids: list[int] = []
+        chunk: list[tuple[Any, ...]] = []
+        for row_id, values in self.iter_values(columns):
+            row_ids.append(row_id)
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=selected, index=row_ids, dtype=object)
+                row_ids = []
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=selected, index=row_ids, dtype=object)
+
+
+class CsvLoader(DataLoader):
+    """
+    Reads a csv file in chunks with pandas, only the requested columns are parsed. The delimiter is
+    detected from the header line, all values are read as text (empty cells as empty strings).
+    """
+    extensions: tuple[str, ...] = (".csv", ".txt")
+
+    def __init__(self, excel_file: str) -> None:
+        super().__init__(excel_file)
+        # detected by load_headers
+        self.delimiter: Optional[str] = None
+
+    def load_headers(self) -> None:
+        # utf-8-sig => the byte order mark written by Excel is not part of the first heading
+        with open(self.excel_file, encoding="utf-8-sig", newline="") as file:
+            header_line: str = file.readline()
+        try:
+            self.delimiter = csv.Sniffer().sniff(header_line, delimiters=CSV_DELIMITERS).delimiter
+        except csv.Error:
+            self.delimiter = ","
+        self.set_headers(tuple(next(csv.reader([header_line], delimiter=self.delimiter), [])))
+
+        # count the lines instead of parsing them (quoted line breaks are counted as rows)
+        lines: int = 0
+        last_block: bytes = b""
+        with open(self.excel_file, "rb") as file:
+            for block in iter(lambda: file.read(COUNT_BLOCK_SIZE), b""):
+                lines += block.count(b"\n")
+                last_block = block
+        if last_block and not last_block.endswith(b"\n"):
+            lines += 1
+        self.rows = max(lines - 1, 0)
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, columns: Optional[list[str]] = None) -> Iterator["pd.DataFrame"]:
+        import pandas as pd
+
+        if self.delimiter is None:
+            # the headers may have been restored from a mapping profile
+            columns_known: list[str] = self.columns
+            self.load_headers()
+            if columns_known and columns_known != self.columns:
+                raise ValueError(f"The columns of {os.path.basename(self.excel_file)} have changed")
+        # without any column pandas would not return any rows either => read the first column
+        usecols: Optional[list[str]] = self.columns[:1] if columns == [] else columns
+        reader = pd.read_csv(self.excel_file, sep=self.delimiter, header=None, skiprows=1, names=self.columns,
+                             usecols=usecols, dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                             chunksize=chunk_size)
+        start: int = 0
+        with reader:
+            for chunk in reader:
+                chunk.index = range(start, start + len(chunk))
+                start += len(chunk)
+                yield chunk if columns is None else chunk[columns]
+
+
+class ParquetLoader(DataLoader):
+    """
+    Reads a Parquet file batch by batch with pyarrow, only the requested columns are read from the file.
+    Requires pyarrow.
+    """
+    extensions: tuple[str, ...] = (".parquet", ".pq")
+
+    def open(self) -> Any:
+        """
+        Opens the Parquet file.
+
+        Returns:
+            pyarrow.parquet.ParquetFile: The file, must be closed by the caller.
+        """
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(self.excel_file)
+
+    def load_headers(self) -> None:
+        parquet_file = self.open()
+        try:
+            self.set_headers(tuple(parquet_file.schema_arrow.names))
+            self.rows = parquet_file.metadata.num_rows
+        finally:
+            parquet_file.close()
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE, columns: Optional[list[str]] = None) -> Iterator["pd.DataFrame"]:
+        parquet_file = self.open()
+        try:
+            self.set_headers(tuple(parquet_file.schema_arrow.names))
+            start: int = 0
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+                # integers with empty cells stay integers (and None) instead of becoming floats
+                chunk: pd.DataFrame = batch.to_pandas(integer_object_nulls=True, date_as_object=True)
+                chunk.index = range(start, start + len(chunk))
+                start += len(chunk)
+                yield chunk
+        finally:
+            parquet_file.close()
+
+
+LOADERS: dict[str, type[DataLoader]] = {
+    extension: loader for loader in (ExcelLoader, CsvLoader, ParquetLoader) for extension in loader.extensions}
+
+
+def create_loader(excel_file: str) -> DataLoader:
+    """
+    Creates the data source for a file based on its extension.
+
+    Args:
+        excel_file (str): Path of the .xlsx, .csv or .parquet file.
+
+    Returns:
+        DataLoader: The (not yet loaded) data source.
+    """
+    extension: str = os.path.splitext(excel_file)[1].lower()
+    if extension not in LOADERS:
+        raise ValueError(f"Unsupported data file: {os.path.basename(excel_file)} "
+                         f"(supported: {', '.join(LOADERS)})")
+    return LOADERS[extension](excel_file)
+
+
+def unique_columns(headers: list[Optional[str]]) -> list[str]:
+    """
+    Creates unique column names for the headers the same way pandas does: empty headers become
+    "Unnamed: <index>", duplicates get a ".<count>" suffix.
+
+    Args:
+        headers (List): The headings of the sheet.
+
+    Returns:
+        List: The unique column names.
+    """
+    columns: list[str] = []
+    seen: dict[str, int] = {}
+    for index, header in enumerate(headers):
+        column: str = f"Unnamed: {index}" if header is None else header
+        if column in seen:
+            seen[column] += 1
+            column = f"{column}.{seen[column]}"
+        seen.setdefault(column, 0)
+        columns.append(column)
+    return columns
+
+
+def to_text(value: Any) -> str:
+    """
+    Converts a cell value to the text used in the contracts, empty cells become an empty string.
+
+    Args:
+        value (Any): The cell value.
+
+    Returns:
+        str: The text.
+    """
+    return "" if value is None else str(value)
+
+
+def compact_dtypes(chunk: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Converts the text columns of a chunk with repeated values (e.g. departments or contract terms) to
+    categoricals, so every distinct value is stored and converted to text only once.
+
+    Args:
+        chunk (DataFrame): Rows of the data source.
+
+    Returns:
+        DataFrame: The chunk with compact columns.
+    """
+    import pandas as pd
+
+    for column in chunk.columns:
+        values: pd.Series = chunk[column]
+        if len(values) < 2 or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.infer_dtype(values, skipna=True) != "string":
+            continue
+        if values.nunique(dropna=False) <= len(values) * CATEGORY_RATIO:
+            chunk[column] = values.astype("category")
+    return chunk
+
+
+def to_text_frame(chunk: "pd.DataFrame", columns: list[str]) -> "pd.DataFrame":
+    """
+    Converts the given columns of a chunk to the text used in the contracts, empty cells become an
+    empty string (None, NaN, NaT and pd.NA alike). Categorical columns are converted once per category.
+
+    Args:
+        chunk (DataFrame): Rows of the data source.
+        columns (List): The columns to convert.
+
+    Returns:
+        DataFrame: The text of the columns, with the index of the chunk.
+    """
+    import numpy as np
+    import pandas as pd
+
+    text: dict[str, Any] = {}
+    for column in columns:
+        values: pd.Series = chunk[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # the last entry is used for empty cells (code -1)
+            categories: np.ndarray = np.array([to_text(value) for value in values.cat.categories] + [""], dtype=object)
+            text[column] = categories[values.cat.codes.to_numpy()]
+        else:
+            # object first, so nullable (Int64, boolean, ...) and datetime columns keep their missing values
+            cells: np.ndarray = values.astype(object).to_numpy()
+            text[column] = np.array(["" if missing else to_text(value) for value, missing in zip(cells, pd.isna(cells))],
+                                    dtype=object)
+    return pd.DataFrame(text, index=chunk.index, columns=columns, dtype=object)
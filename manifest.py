@@ -0,0 +1,167 @@
+# Third-party modules
+import hashlib
+import json
+import os
+from typing import IO, Any, Optional
+
+
+MANIFEST_NAME = ".contract-manifest.jsonl"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class Manifest:
+    """
+    Records a content hash for every file generated in an output folder, so a rerun can skip the rows
+    whose output already exists and is up to date. New entries are appended (and flushed) as soon as a
+    row is finished, so the progress of an interrupted run is not lost.
+    """
+
+    def __init__(self, output_folder: str) -> None:
+        self.output_folder: str = output_folder
+        self.path: str = os.path.join(output_folder, MANIFEST_NAME)
+        # output filename => content hash
+        self.entries: dict[str, str] = {}
+        self.file: Optional[IO[str]] = None
+
+    def open(self) -> None:
+        """
+        Reads the existing manifest and opens it for appending new entries. Incomplete lines (e.g. of
+        an interrupted run) are ignored.
+
+        Returns:
+            None
+        """
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry: dict[str, str] = json.loads(line)
+                        self.entries[entry["file"]] = entry["hash"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def is_current(self, filename: str, digest: str) -> bool:
+        """
+        Checks if the output file exists and was generated from the same content.
+
+        Args:
+            filename (str): Name of the output file.
+            digest (str): Content hash of the row.
+
+        Returns:
+            bool: True if the file does not have to be generated again.
+        """
+        return self.entries.get(filename) == digest and os.path.exists(os.path.join(self.output_folder, filename))
+
+    def record(self, filename: str, digest: str) -> None:
+        """
+        Records a generated output file.
+
+        Args:
+            filename (str): Name of the output file.
+            digest (str): Content hash of the row.
+
+        Returns:
+            None
+        """
+        self.entries[filename] = digest
+        if self.file is not None:
+            self.file.write(json.dumps({"file": filename, "hash": digest}) + "\n")
+            self.file.flush()
+
+    def close(self) -> None:
+        """
+        Closes the manifest and rewrites it with one entry per file, so it does not grow with every run.
+
+        Returns:
+            None
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        temp_path: str = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for filename, digest in self.entries.items():
+                file.write(json.dumps({"file": filename, "hash": digest}) + "\n")
+        os.replace(temp_path, self.path)
+
+    def __enter__(self) -> "Manifest":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def hash_job(word_file: str, mappings: dict[str, str], filename_pattern: str, output_type: str) -> "hashlib._Hash":
+    """
+    Creates the base hash of a batch from everything that affects every row: the template content,
+    the mapping, the filename pattern and the output type.
+
+    Args:
+        word_file (str): Path of the Word template.
+        mappings (Dict): The mapping of merge fields to columns.
+        filename_pattern (str): The filename pattern.
+        output_type (str): Output type, e.g. the name of the pdf converter.
+
+    Returns:
+        hashlib._Hash: The base hash, copied for every row by hash_row.
+    """
+    digest = hash_template(word_file, output_type)
+    digest.update(json.dumps([mappings, filename_pattern], sort_keys=True).encode("utf-8"))
+    return digest
+
+
+def hash_template(word_file: str, output_type: str) -> "hashlib._Hash":
+    """
+    Creates the hash of the template content and the output type. Together with the merge values of a
+    row (see hash_row) it identifies the content of a rendered document.
+
+    Args:
+        word_file (str): Path of the Word template.
+        output_type (str): Output type, e.g. the name of the pdf converter.
+
+    Returns:
+        hashlib._Hash: The hash.
+    """
+    digest = hash_file(word_file)
+    digest.update(output_type.encode("utf-8"))
+    return digest
+
+
+def hash_file(file_path: str) -> "hashlib._Hash":
+    """
+    Creates the sha256 hash of a file's content, reading it block by block.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Returns:
+        hashlib._Hash: The hash.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest
+
+
+def hash_row(base: "hashlib._Hash", merge_values: dict[str, str], filename: str) -> str:
+    """
+    Creates the content hash of a single row.
+
+    Args:
+        base (hashlib._Hash): The base hash of the batch (see hash_job).
+        merge_values (Dict): The resolved merge values of the row.
+        filename (str): The filename of the row.
+
+    Returns:
+        str: The content hash.
+    """
+    digest = base.copy()
+    digest.update(json.dumps([merge_values, filename], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,246 @@
+# First-party modules
+from loader import to_text_frame
+
+# Third-party modules
+import collections
+import datetime
+import difflib
+import re
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+LEAVE_EMPTY = "Leave Empty"
+EMPTY_COLUMN_NAME = "Empty Column Name (This Column cannot be mapped)"
+# Words of a name: upper case abbreviations, capitalized or lower case words and numbers
+TOKEN_REGEX = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# Share of common words a heading needs to be matched by its words
+TOKEN_MATCH_MIN = 0.5
+# Similarity a heading needs to be matched as a misspelling (see difflib.SequenceMatcher.ratio)
+FUZZY_MATCH_CUTOFF = 0.85
+# Length of the character n-grams the headings are indexed by (contains and similarity match)
+NGRAM_LENGTH = 3
+# Headings sharing the most n-grams with a field that are compared by similarity
+FUZZY_CANDIDATES = 10
+
+
+class ColumnPlan:
+    """
+    Precompiled mapping of merge fields to worksheet columns. Resolves the merge values of a whole
+    chunk of rows column-wise instead of looking up every field of every row.
+    """
+
+    def __init__(self, mappings: dict[str, str], columns: list[str]) -> None:
+        # merge fields filled from a column
+        self.fields: dict[str, str] = {}
+        # merge fields with the same value for every row ("Leave Empty", current date, ...)
+        self.constants: dict[str, str] = {}
+
+        date_extra: str = get_date_extra()
+        for field, column in mappings.items():
+            if column == date_extra:
+                self.constants[field] = get_date_field()
+            elif column in columns:
+                self.fields[field] = column
+            else:
+                # LEAVE_EMPTY, EMPTY_COLUMN_NAME
+                self.constants[field] = str()
+
+        # columns that have to be read from the worksheet (each one only once)
+        self.source_columns: list[str] = list(dict.fromkeys(self.fields.values()))
+
+    def resolve(self, chunk: "pd.DataFrame") -> list[dict[str, str]]:
+        """
+        Resolves the merge values for all rows of a chunk in one batched step. Empty cells are left empty.
+
+        Args:
+            chunk (DataFrame): Rows of the worksheet (object dtype, None for empty cells).
+
+        Returns:
+            List: One dictionary per row mapping the merge fields to their values.
+        """
+        if not self.fields and not self.constants:
+            return [{} for _ in range(len(chunk.index))]
+
+        text: pd.DataFrame = to_text_frame(chunk, self.source_columns)
+        merged: pd.DataFrame = text[list(self.fields.values())].set_axis(list(self.fields), axis="columns")
+        for field, value in self.constants.items():
+            merged[field] = value
+        return merged.to_dict("records")
+
+
+def get_date_field() -> str:
+    """
+    Returns the current date in dd/mm/yyyy format as a string.
+    """
+    return str(datetime.datetime.today().strftime("%d/%m/%Y"))
+
+
+def get_date_extra() -> str:
+    """
+    Returns the heading of the extra column that inserts the current date.
+    """
+    return f"EXTRA - Add Current Date => {get_date_field()}"
+
+
+class HeadingIndex:
+    """
+    Index of the headings for matching merge fields to columns. The headings are normalized once, so
+    every field is matched with a few lookups instead of comparing it with every heading. A field is
+    matched, in this order, to the heading
+        - with exactly the same name,
+        - with the same name ignoring the case,
+        - with the same letters and digits ignoring the case ("First_Name" => "First Name"),
+        - containing the field name (ignoring the case), the first one in the order of the headings,
+        - sharing the most words with the field ("FirstName" => "Name (first)"),
+        - with the most similar name (misspellings).
+    The extra headings (leave empty, current date) are only matched by name, not by words or similarity.
+
+    The contains match only checks the headings containing every n-gram of the field, and only the
+    FUZZY_CANDIDATES headings sharing the most n-grams with the field are compared by similarity, so
+    matching many fields to many headings does not compare every field with every heading.
+    """
+
+    def __init__(self, headings: list[str]) -> None:
+        self.headings: list[str] = [heading for heading in headings if heading != EMPTY_COLUMN_NAME]
+        self.exact: set[str] = set(self.headings)
+        self.folded: dict[str, str] = {}
+        self.compact: dict[str, str] = {}
+        # heading folded to lower case, in the order of the headings (for the contains match)
+        self.folded_list: list[tuple[str, str]] = []
+        # n-gram => indices of the folded headings containing it
+        self.folded_ngrams: dict[str, list[int]] = {}
+        # word => indices of the headings containing it
+        self.tokens: dict[str, list[int]] = {}
+        self.token_counts: list[int] = []
+
+        extras: set[str] = {LEAVE_EMPTY, get_date_extra()}
+        for index, heading in enumerate(self.headings):
+            folded: str = heading.casefold()
+            self.folded.setdefault(folded, heading)
+            self.compact.setdefault(compact_name(heading), heading)
+            for ngram in get_ngrams(folded):
+                self.folded_ngrams.setdefault(ngram, []).append(len(self.folded_list))
+            self.folded_list.append((folded, heading))
+            heading_tokens: set[str] = set() if heading in extras else tokenize(heading)
+            self.token_counts.append(len(heading_tokens))
+            for token in heading_tokens:
+                self.tokens.setdefault(token, []).append(index)
+        self.fuzzy_keys: list[str] = [key for key, heading in self.compact.items() if heading not in extras and key]
+        # n-gram => indices of the fuzzy keys containing it
+        self.fuzzy_ngrams: dict[str, list[int]] = {}
+        for index, key in enumerate(self.fuzzy_keys):
+            for ngram in get_ngrams(key):
+                self.fuzzy_ngrams.setdefault(ngram, []).append(index)
+
+    def match(self, field: str) -> Optional[str]:
+        """
+        Returns the heading matching the merge field best.
+
+        Args:
+            field (str): Name of the merge field.
+
+        Returns:
+            str: The matching heading, None if there is none.
+        """
+        if field in self.exact:
+            return field
+        folded: str = field.casefold()
+        if folded in self.folded:
+            return self.folded[folded]
+        compact: str = compact_name(field)
+        if compact and compact in self.compact:
+            return self.compact[compact]
+        containing: Optional[str] = self.find_containing(folded)
+        if containing is not None:
+            return containing
+
+        # rank the headings sharing words with the field
+        field_tokens: set[str] = tokenize(field)
+        common: dict[int, int] = {}
+        for token in field_tokens:
+            for index in self.tokens.get(token, []):
+                common[index] = common.get(index, 0) + 1
+        best: Optional[int] = None
+        best_score: float = 0.0
+        for index in sorted(common):
+            score: float = common[index] / (len(field_tokens) + self.token_counts[index] - common[index])
+            if score > best_score:
+                best, best_score = index, score
+        if best is not None and best_score >= TOKEN_MATCH_MIN:
+            return self.headings[best]
+
+        # names shorter than an n-gram are only similar enough if they are the same (see compact match)
+        shared: collections.Counter[int] = collections.Counter()
+        for ngram in get_ngrams(compact):
+            shared.update(self.fuzzy_ngrams.get(ngram, ()))
+        candidates: list[str] = [self.fuzzy_keys[index] for index, _ in shared.most_common(FUZZY_CANDIDATES)]
+        similar: list[str] = difflib.get_close_matches(compact, candidates, n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        return self.compact[similar[0]] if similar else None
+
+    def find_containing(self, folded: str) -> Optional[str]:
+        """
+        Returns the first heading (in the order of the headings) containing the folded field name. Only the
+        headings containing every n-gram of the name are checked.
+
+        Args:
+            folded (str): Name of the merge field folded to lower case.
+
+        Returns:
+            str: The heading, None if no heading contains the name.
+        """
+        ngrams: set[str] = get_ngrams(folded)
+        if not ngrams:
+            # shorter than an n-gram
+            candidates: list[int] = list(range(len(self.folded_list)))
+        else:
+            postings: list[list[int]] = sorted((self.folded_ngrams.get(ngram, []) for ngram in ngrams), key=len)
+            found: set[int] = set(postings[0])
+            for indices in postings[1:]:
+                if not found:
+                    break
+                found.intersection_update(indices)
+            candidates = sorted(found)
+        for index in candidates:
+            folded_heading, heading = self.folded_list[index]
+            if folded in folded_heading:
+                return heading
+        return None
+
+
+def tokenize(name: str) -> set[str]:
+    """
+    Splits a name into its words (lower case), also at case changes ("FirstName" => first, name).
+    """
+    return {token.casefold() for token in TOKEN_REGEX.findall(name)}
+
+
+def get_ngrams(text: str) -> set[str]:
+    """
+    Returns the character n-grams of a text ("name" => "nam", "ame"), none if it is shorter than NGRAM_LENGTH.
+    """
+    return {text[index:index + NGRAM_LENGTH] for index in range(len(text) - NGRAM_LENGTH + 1)}
+
+
+def compact_name(name: str) -> str:
+    """
+    Returns the letters and digits of a name in lower case ("First_Name" => "firstname").
+    """
+    return "".join(character for character in name.casefold() if character.isalnum())
+
+
+def match_field(field: str, headings: list[str]) -> Optional[str]:
+    """
+    Returns the heading matching the merge field best (see HeadingIndex). Use a HeadingIndex directly to
+    match several fields.
+
+    Args:
+        field (str): Name of the merge field.
+        headings (List): The available headings.
+
+    Returns:
+        str: The matching heading, None if there is none.
+    """
+    return HeadingIndex(headings).match(field)
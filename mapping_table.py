@@ -0,0 +1,191 @@
+# Third-party modules
+import tkinter as tk
+import tkinter.ttk as ttk
+from typing import Any, Optional
+
+
+# Number of visible rows of the table
+TABLE_HEIGHT = 20
+# Keys that move inside the combobox instead of changing its text
+NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Return", "Escape", "Tab", "Home", "End", "Prior", "Next"}
+
+
+class MappingTable(tk.Frame):
+    """
+    Table of the merge fields and the columns they are mapped to. The rows are items of a ttk.Treeview,
+    which only draws the visible rows, so large templates do not create any widgets per field. The
+    column of a field is chosen with a single combobox that is placed over the selected row and filters
+    the headings while typing. The fields can be filtered with the search entry above the table.
+    """
+
+    def __init__(self, master: Any, height: int = TABLE_HEIGHT, **kwargs: Any) -> None:
+        super().__init__(master, **kwargs)
+        self.headings: list[str] = []
+        # merge field => heading, in the order of the template
+        self.mappings: dict[str, str] = {}
+        self.editing: Optional[str] = None
+
+        search_frame: tk.Frame = tk.Frame(self, bg=self["bg"])
+        search_frame.pack(side="top", fill="x")
+        tk.Label(search_frame, text="Search fields:", bg=self["bg"]).pack(side="left", padx=5, pady=5)
+        self.search_var: tk.StringVar = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.show_rows())
+        tk.Entry(search_frame, textvariable=self.search_var, width=40).pack(side="left", padx=5, pady=5)
+
+        self.tree: ttk.Treeview = ttk.Treeview(self, columns=("field", "column"), show="headings", height=height,
+                                               selectmode="browse")
+        self.tree.heading("field", text="Template Fields")
+        self.tree.heading("column", text="Data Fields")
+        self.tree.column("field", width=300)
+        self.tree.column("column", width=500)
+        self.scrollbar: tk.Scrollbar = tk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.editor: ttk.Combobox = ttk.Combobox(self.tree)
+        self.editor.bind("<KeyRelease>", self.on_editor_key)
+        self.editor.bind("<<ComboboxSelected>>", lambda event: self.close_editor(True))
+        self.editor.bind("<Return>", lambda event: self.close_editor(True))
+        self.editor.bind("<Escape>", lambda event: self.close_editor(False))
+
+        self.tree.bind("<Button-1>", lambda event: self.close_editor(False))
+        self.tree.bind("<Double-1>", self.on_double_click)
+        self.tree.bind("<Return>", lambda event: self.open_editor(self.tree.focus()))
+
+    def load(self, fields: list[str], headings: list[str], mappings: dict[str, str]) -> None:
+        """
+        Shows the merge fields of a template with their mapped headings.
+
+        Args:
+            fields (List): The merge fields.
+            headings (List): The headings that can be chosen.
+            mappings (Dict): The heading of every merge field.
+
+        Returns:
+            None
+        """
+        self.close_editor(False)
+        self.headings = headings
+        self.mappings = {field: mappings.get(field, headings[0] if headings else "") for field in fields}
+        self.editor.configure(values=self.headings)
+        self.show_rows()
+
+    def clear(self) -> None:
+        """
+        Removes all merge fields.
+
+        Returns:
+            None
+        """
+        self.load([], [], {})
+
+    def get_mappings(self) -> dict[str, str]:
+        """
+        Returns the heading chosen for every merge field.
+
+        Returns:
+            Dict: The mapping of merge fields to headings.
+        """
+        return dict(self.mappings)
+
+    def show_rows(self) -> None:
+        """
+        Shows the merge fields matching the search text.
+
+        Returns:
+            None
+        """
+        self.close_editor(False)
+        search: str = self.search_var.get().casefold()
+        self.tree.delete(*self.tree.get_children())
+        for field, heading in self.mappings.items():
+            if search in field.casefold() or search in heading.casefold():
+                self.tree.insert("", "end", iid=field, values=(field, heading))
+
+    def on_double_click(self, event: tk.Event) -> None:
+        """Opens the combobox for the row that has been double-clicked.
+
+        Args:
+            event (tkinter.Event): The event object passed by tkinter.
+
+        Returns:
+            None
+        """
+        item: str = self.tree.identify_row(event.y)
+        if item:
+            self.tree.selection_set(item)
+            self.open_editor(item)
+
+    def on_scroll(self, first: str, last: str) -> None:
+        """Updates the scrollbar when the table has been scrolled and closes the combobox, it would
+        stay at its position otherwise."""
+        self.close_editor(False)
+        self.scrollbar.set(first, last)
+
+    def open_editor(self, item: str) -> None:
+        """
+        Places the combobox over the heading of a row.
+
+        Args:
+            item (str): The row (merge field).
+
+        Returns:
+            None
+        """
+        if not item:
+            return
+        self.tree.see(item)
+        self.tree.update_idletasks()
+        bbox: Any = self.tree.bbox(item, "column")
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        self.close_editor(False)
+        self.editing = item
+        self.editor.configure(values=self.headings)
+        self.editor.set(self.mappings[item])
+        self.editor.place(x=x, y=y, width=width, height=height)
+        self.editor.focus_set()
+        self.editor.select_range(0, "end")
+
+    def on_editor_key(self, event: tk.Event) -> None:
+        """Filters the headings of the combobox by the typed text.
+
+        Args:
+            event (tkinter.Event): The event object passed by tkinter.
+
+        Returns:
+            None
+        """
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        text: str = self.editor.get().casefold()
+        self.editor.configure(values=[heading for heading in self.headings if text in heading.casefold()])
+
+    def close_editor(self, save: bool) -> None:
+        """
+        Hides the combobox and stores its heading, if it is one of the headings (or the typed text
+        only matches a single heading).
+
+        Args:
+            save (bool): Whether to store the chosen heading.
+
+        Returns:
+            None
+        """
+        if self.editing is None:
+            return
+        item: str = self.editing
+        self.editing = None
+        self.editor.place_forget()
+        if save:
+            value: str = self.editor.get()
+            if value not in self.headings:
+                candidates: list[str] = [heading for heading in self.headings if value.casefold() in heading.casefold()]
+                value = candidates[0] if len(candidates) == 1 else ""
+            if value:
+                self.mappings[item] = value
+                if self.tree.exists(item):
+                    self.tree.set(item, "column", value)
+        self.tree.focus_set()
@@ -0,0 +1,371 @@
+# First-party modules
+from converters import Converter, create_converter
+from mailmerge import MailMerge
+from template import CompiledTemplate, write_members
+
+# Third-party modules
+import concurrent.futures
+import cProfile
+import mmap
+import multiprocessing.util
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import IO, Any, Callable, Iterable, NamedTuple, Optional, Union
+
+
+WORKER_COUNT_DEFAULT = os.cpu_count() or 1
+# Number of rows that may be queued per worker before the producer waits for results
+QUEUE_SIZE_PER_WORKER = 2
+# Memory (in bytes) all workers together may use to buffer rendered documents before spilling to disk
+MEMORY_BUDGET_DEFAULT = 256 * 1024 * 1024
+# Separator between the rows of a combined document (see MailMerge.merge_templates)
+COMBINED_SEPARATOR = "page_break"
+# Page objects of a pdf file (but not the /Pages tree nodes)
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+# Template and pdf converter of the current worker process, set once by init_worker
+worker_template: Optional[CompiledTemplate] = None
+worker_converter_name: Optional[str] = None
+worker_converter: Optional[Converter] = None
+worker_memory_limit: int = MEMORY_BUDGET_DEFAULT
+# Folder the profiles of sampled rows are written to, None if no rows are profiled
+worker_profile_folder: Optional[str] = None
+
+
+class RowJob(NamedTuple):
+    """
+    A single row to render: its mappings and the filename of the resulting document. Rows with profile
+    set are rendered under cProfile.
+    """
+    row_id: int
+    mappings: dict[str, str]
+    filename: str
+    profile: bool = False
+
+
+class RowResult(NamedTuple):
+    """
+    Outcome of a rendered row, error is None if the row was rendered successfully. Skipped rows were
+    not rendered because their output is up to date, cached rows were copied from an identical document.
+    size is the number of bytes written, timings the seconds spent in every stage (see report.STAGES).
+    """
+    row_id: int
+    filename: str
+    error: Optional[str]
+    skipped: bool = False
+    size: int = 0
+    timings: Optional[dict[str, float]] = None
+    cached: bool = False
+
+
+class DocumentJob(NamedTuple):
+    """Rows that are merged into one combined document, row_id is the id of the first row."""
+    row_id: int
+    rows: list[RowJob]
+    filename: str
+
+
+class DocumentResult(NamedTuple):
+    """
+    Outcome of a combined document: the results of its rows and the number of pages (None if unknown,
+    e.g. for docx files). error is None if the document was rendered successfully.
+    """
+    row_id: int
+    filename: str
+    rows: list[RowResult]
+    pages: Optional[int]
+    error: Optional[str]
+
+
+def init_worker(template: CompiledTemplate, converter_name: Optional[str] = None,
+                memory_limit: int = MEMORY_BUDGET_DEFAULT, profile_folder: Optional[str] = None) -> None:
+    """
+    Initializes a worker process with the compiled template, so it is only transferred once per process.
+
+    Args:
+        template (CompiledTemplate): The compiled Word template.
+        converter_name (str): Name of the pdf converter backend, None if no pdf files are created.
+        memory_limit (int): Size in bytes up to which a rendered document is kept in memory.
+        profile_folder (str): Folder the profiles of sampled rows are written to.
+
+    Returns:
+        None
+    """
+    global worker_template, worker_converter_name, worker_converter, worker_memory_limit, worker_profile_folder
+    worker_template = template
+    worker_converter_name = converter_name
+    worker_converter = None
+    worker_memory_limit = memory_limit
+    worker_profile_folder = profile_folder
+
+
+def get_worker_converter() -> Converter:
+    """
+    Returns the pdf converter of the current worker process. The converter is started on first use
+    and kept running for all following rows, it is closed when the process exits.
+
+    Returns:
+        Converter: The started converter.
+    """
+    global worker_converter
+    if worker_converter is None:
+        converter: Converter = create_converter(worker_converter_name)
+        converter.start()
+        worker_converter = converter
+        multiprocessing.util.Finalize(None, close_worker_converter, exitpriority=10)
+    return worker_converter
+
+
+def close_worker_converter() -> None:
+    """
+    Closes the pdf converter of the current worker process (if it has been started).
+
+    Returns:
+        None
+    """
+    global worker_converter
+    if worker_converter is not None:
+        try:
+            worker_converter.close()
+        finally:
+            worker_converter = None
+
+
+def render_row(job: RowJob, output_folder: str) -> RowResult:
+    """
+    Renders the docx file for a single row into a memory buffer and converts it to pdf right away
+    (pipelined, if a converter is set) or writes it to the output folder. The buffer is only moved to
+    a local temporary file if the document exceeds the memory limit of the worker. Errors are captured
+    per row instead of aborting the whole batch.
+
+    Args:
+        job (RowJob): The row to render.
+        output_folder (str): Folder the output file is written to.
+
+    Returns:
+        RowResult: The outcome of the row.
+    """
+    if not job.profile or worker_profile_folder is None:
+        return render_document(job, output_folder)
+
+    profiler: cProfile.Profile = cProfile.Profile()
+    try:
+        return profiler.runcall(render_document, job, output_folder)
+    finally:
+        os.makedirs(worker_profile_folder, exist_ok=True)
+        profiler.dump_stats(os.path.join(worker_profile_folder, f"row-{job.row_id + 2}.prof"))
+
+
+def render_document(job: RowJob, output_folder: str) -> RowResult:
+    """
+    Renders a single row (see render_row) and measures the time spent merging, writing and converting.
+
+    Args:
+        job (RowJob): The row to render.
+        output_folder (str): Folder the output file is written to.
+
+    Returns:
+        RowResult: The outcome of the row.
+    """
+    timings: dict[str, float] = {}
+    output_file_path: str = os.path.join(output_folder,
+                                         get_output_filename(job.filename, worker_converter_name is not None))
+    try:
+        start: float = time.perf_counter()
+        members: list[tuple[str, bytes]] = worker_template.merge(job.mappings)
+        timings["merge"] = time.perf_counter() - start
+
+        with tempfile.SpooledTemporaryFile(max_size=worker_memory_limit) as document:
+            start = time.perf_counter()
+            write_members(members, document)
+            del members
+            document.seek(0)
+            if worker_converter_name is not None:
+                timings["write"] = time.perf_counter() - start
+                start = time.perf_counter()
+                replace_output(output_file_path, lambda path: get_worker_converter().convert_stream(document, path))
+                timings["convert"] = time.perf_counter() - start
+            else:
+                replace_output(output_file_path, lambda path: copy_to_file(document, path))
+                timings["write"] = time.perf_counter() - start
+        size: int = os.path.getsize(output_file_path)
+    except Exception as e:
+        return RowResult(job.row_id, job.filename, f"{type(e).__name__}: {str(e)}", timings=timings)
+    return RowResult(job.row_id, job.filename, None, size=size, timings=timings)
+
+
+def render_combined(job: DocumentJob, output_folder: str) -> DocumentResult:
+    """
+    Merges all rows of the job into one document with a single MailMerge.merge_templates call, each
+    row starting on a new page, and converts it to pdf (if a converter is set) or writes it to the
+    output folder. The time spent in every stage is shared equally by the rows.
+
+    Args:
+        job (DocumentJob): The rows to merge.
+        output_folder (str): Folder the output file is written to.
+
+    Returns:
+        DocumentResult: The outcome of the document and its rows.
+    """
+    timings: dict[str, float] = {}
+    pdf: bool = worker_converter_name is not None
+    output_file_path: str = os.path.join(output_folder, get_output_filename(job.filename, pdf))
+    pages: Optional[int] = None
+    error: Optional[str] = None
+    size: int = 0
+    try:
+        start: float = time.perf_counter()
+        with MailMerge(worker_template.word_file) as document:
+            document.merge_templates([row.mappings for row in job.rows], separator=COMBINED_SEPARATOR)
+            timings["merge"] = time.perf_counter() - start
+
+            with tempfile.SpooledTemporaryFile(max_size=worker_memory_limit) as buffer:
+                start = time.perf_counter()
+                document.write(buffer)
+                buffer.seek(0)
+                if pdf:
+                    timings["write"] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    replace_output(output_file_path, lambda path: get_worker_converter().convert_stream(buffer, path))
+                    timings["convert"] = time.perf_counter() - start
+                    pages = count_pdf_pages(output_file_path)
+                else:
+                    replace_output(output_file_path, lambda path: copy_to_file(buffer, path))
+                    timings["write"] = time.perf_counter() - start
+        size = os.path.getsize(output_file_path)
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)}"
+
+    row_timings: dict[str, float] = {stage: seconds / len(job.rows) for stage, seconds in timings.items()}
+    # the size of the document is counted once, with its first row
+    rows: list[RowResult] = [RowResult(row.row_id, job.filename, error, size=size if index == 0 else 0,
+                                       timings=row_timings) for index, row in enumerate(job.rows)]
+    return DocumentResult(job.row_id, job.filename, rows, pages, error)
+
+
+def replace_output(output_file_path: str, write: Callable[[str], None]) -> None:
+    """
+    Writes an output file through a temporary file in the same folder that replaces the output file
+    once it is complete. An existing output file is never written in place: it may be hard-linked to a
+    cache entry or to the output of another row with the same content (see cache.link_or_copy).
+
+    Args:
+        output_file_path (str): Path of the output file.
+        write (Callable): Writes the document to the path it is called with.
+
+    Returns:
+        None
+    """
+    folder, filename = os.path.split(output_file_path)
+    stem, extension = os.path.splitext(filename)
+    # keep the extension, the converters choose the output format by it; the random part keeps the names of
+    # processes on different machines writing to a shared folder apart
+    temp_path: str = os.path.join(folder, f".{stem}.{uuid.uuid4().hex}.partial{extension}")
+    try:
+        write(temp_path)
+        os.replace(temp_path, output_file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def copy_to_file(document: IO[bytes], file_path: str) -> None:
+    """Copies a document from a buffer to a file."""
+    with open(file_path, "wb") as file:
+        shutil.copyfileobj(document, file)
+
+
+def count_pdf_pages(pdf_file: str) -> Optional[int]:
+    """
+    Counts the pages of a pdf file by its page objects.
+
+    Args:
+        pdf_file (str): Path of the pdf file.
+
+    Returns:
+        int: The number of pages, None if no page objects were found (e.g. in compressed object streams).
+    """
+    with open(pdf_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        pages: int = sum(1 for _ in PDF_PAGE_PATTERN.finditer(data))
+    return pages or None
+
+
+def get_output_filename(filename: str, pdf: bool) -> str:
+    """
+    Returns the name of the output file for a rendered docx file.
+
+    Args:
+        filename (str): Name of the docx file.
+        pdf (bool): Whether the docx file is converted to pdf.
+
+    Returns:
+        str: Name of the output file.
+    """
+    return os.path.splitext(filename)[0] + ".pdf" if pdf else filename
+
+
+def generate_parallel(template: CompiledTemplate, jobs: Iterable[Union[RowJob, DocumentJob]], output_folder: str,
+                      workers: int = WORKER_COUNT_DEFAULT, converter: Optional[str] = None,
+                      memory_budget: int = MEMORY_BUDGET_DEFAULT,
+                      progress: Optional[Callable[[Any], None]] = None,
+                      profile_folder: Optional[str] = None,
+                      render: Callable[[Any, str], Any] = render_row) -> list[Any]:
+    """
+    Renders and converts all rows using a pool of worker processes. Rows are pulled lazily from jobs,
+    at most QUEUE_SIZE_PER_WORKER rows per worker are in flight at any time. The same is used for
+    combined documents, with DocumentJobs and render_combined.
+
+    Args:
+        template (CompiledTemplate): The compiled Word template.
+        jobs (Iterable): The rows (or combined documents) to render.
+        output_folder (str): Folder the output files are written to.
+        workers (int): Number of worker processes, 1 renders in the current process.
+        converter (str): Name of the pdf converter backend, None to keep the docx files.
+        memory_budget (int): Bytes all workers together may use to buffer documents in memory.
+        progress (Callable): Optional callback that is called with the result of every finished row.
+        profile_folder (str): Folder the cProfile stats of the rows marked for profiling are written to.
+        render (Callable): Renders a single job in a worker, render_row or render_combined.
+
+    Returns:
+        List: The results of all jobs, ordered by row id.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    # every worker buffers one document at a time (a limit of 0 would mean unlimited)
+    memory_limit: int = max(memory_budget // max(workers, 1), 1)
+    results: list[Any] = []
+
+    def finish(result: Any) -> None:
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    if workers <= 1:
+        init_worker(template, converter, memory_limit, profile_folder)
+        try:
+            for job in jobs:
+                finish(render(job, output_folder))
+        finally:
+            close_worker_converter()
+        return sorted(results, key=lambda result: result.row_id)
+
+    max_pending: int = workers * QUEUE_SIZE_PER_WORKER
+    pending: set[concurrent.futures.Future] = set()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                initargs=(template, converter, memory_limit, profile_folder)) as executor:
+        for job in jobs:
+            if len(pending) >= max_pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    finish(future.result())
+            pending.add(executor.submit(render, job, output_folder))
+
+        for future in concurrent.futures.as_completed(pending):
+            finish(future.result())
+    return sorted(results, key=lambda result: result.row_id)
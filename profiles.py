@@ -0,0 +1,180 @@
+# First-party modules
+from manifest import hash_file
+from mapping import get_date_extra
+
+# Third-party modules
+import datetime
+import json
+import os
+from typing import Any, Optional
+
+
+PROFILES_FILE = os.path.join(os.path.expanduser("~"), ".contract-creation", "profiles.json")
+# Number of profiles kept, the least recently used ones are removed first
+PROFILES_MAX = 50
+# Stored instead of the current date heading, which changes every day
+DATE_EXTRA_MARKER = "<current date>"
+
+
+class ProfileStore:
+    """
+    Mapping profiles of known template/sheet pairs, stored as json file in the home folder. A profile
+    keeps the fingerprints of both files (size, modification time and content hash), their merge
+    fields and headers, the mapping and the filename pattern. While the fingerprints match, loading
+    the pair does not have to parse the template or read the sheet at all.
+
+    A file is recognized by its path, size and modification time without reading it. Only if those
+    differ (e.g. the file was copied or saved again) its content hash is compared.
+    """
+
+    def __init__(self, path: str = PROFILES_FILE) -> None:
+        self.path: str = path
+        self.profiles: list[dict[str, Any]] = []
+        # (path, size, mtime) => content hash, so every file is hashed at most once
+        self.hashes: dict[tuple[str, int, float], str] = {}
+        self.loaded: bool = False
+
+    def load(self) -> None:
+        """
+        Reads the profiles, a missing or damaged file is treated as empty.
+
+        Returns:
+            None
+        """
+        self.loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                profiles: Any = json.load(file)
+        except (OSError, ValueError):
+            profiles = []
+        self.profiles = [profile for profile in profiles if isinstance(profile, dict)] if isinstance(profiles, list) else []
+
+    def save(self) -> None:
+        """
+        Writes the profiles (replacing the file at once, so it is never left half-written).
+
+        Returns:
+            None
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path: str = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.profiles, file, indent=1)
+        os.replace(temp_path, self.path)
+
+    def find(self, word_file: str, excel_file: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the profile of a template/sheet pair if both files are unchanged.
+
+        Args:
+            word_file (str): Path of the Word template.
+            excel_file (str): Path of the data file.
+
+        Returns:
+            Dict: The profile, None if the pair is unknown or one of the files has changed.
+        """
+        if not self.loaded:
+            self.load()
+        for profile in self.profiles:
+            try:
+                if self.matches(word_file, profile["template"]) and self.matches(excel_file, profile["data"]):
+                    profile["mappings"] = restore_date_extra(profile.get("mappings") or {})
+                    return profile
+            except (KeyError, TypeError):
+                continue
+        return None
+
+    def store(self, word_file: str, excel_file: str, merge_fields: list[str], headers: list[Optional[str]], rows: int,
+              mappings: dict[str, str], filename_pattern: str) -> None:
+        """
+        Adds or replaces the profile of a template/sheet pair and saves the profiles.
+
+        Args:
+            word_file (str): Path of the Word template.
+            excel_file (str): Path of the data file.
+            merge_fields (List): The merge fields of the template.
+            headers (List): The headers of the data file (None for empty headers).
+            rows (int): The (estimated) number of rows of the data file.
+            mappings (Dict): The mapping of merge fields to headings.
+            filename_pattern (str): The filename pattern.
+
+        Returns:
+            None
+        """
+        if not self.loaded:
+            self.load()
+        profile: dict[str, Any] = {
+            "template": self.fingerprint(word_file),
+            "data": self.fingerprint(excel_file),
+            "merge_fields": merge_fields,
+            "headers": headers,
+            "rows": rows,
+            "mappings": {field: DATE_EXTRA_MARKER if column == get_date_extra() else column
+                         for field, column in mappings.items()},
+            "filename": filename_pattern,
+            "used": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        # one profile per pair of paths, the most recently used first
+        keys: tuple[str, str] = (profile["template"]["path"], profile["data"]["path"])
+        self.profiles = [profile] + [existing for existing in self.profiles
+                                     if (existing.get("template", {}).get("path"), existing.get("data", {}).get("path")) != keys]
+        del self.profiles[PROFILES_MAX:]
+        self.save()
+
+    def fingerprint(self, file_path: str) -> dict[str, Any]:
+        """
+        Returns the fingerprint of a file.
+
+        Args:
+            file_path (str): Path of the file.
+
+        Returns:
+            Dict: The absolute path, size, modification time and content hash.
+        """
+        path: str = os.path.abspath(file_path)
+        stat: os.stat_result = os.stat(path)
+        return {"path": path, "size": stat.st_size, "mtime": stat.st_mtime,
+                "hash": self.get_hash(path, stat.st_size, stat.st_mtime)}
+
+    def matches(self, file_path: str, fingerprint: dict[str, Any]) -> bool:
+        """
+        Checks if a file has the given fingerprint: the same path, size and modification time, or
+        otherwise the same size and content hash.
+
+        Args:
+            file_path (str): Path of the file.
+            fingerprint (Dict): The stored fingerprint.
+
+        Returns:
+            bool: True if the file is unchanged.
+        """
+        path: str = os.path.abspath(file_path)
+        try:
+            stat: os.stat_result = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != fingerprint["size"]:
+            return False
+        if path == fingerprint["path"] and stat.st_mtime == fingerprint["mtime"]:
+            return True
+        return self.get_hash(path, stat.st_size, stat.st_mtime) == fingerprint["hash"]
+
+    def get_hash(self, path: str, size: int, mtime: float) -> str:
+        """Returns the content hash of a file, hashing it only once per size and modification time."""
+        key: tuple[str, int, float] = (path, size, mtime)
+        if key not in self.hashes:
+            self.hashes[key] = hash_file(path).hexdigest()
+        return self.hashes[key]
+
+
+def restore_date_extra(mappings: dict[str, str]) -> dict[str, str]:
+    """
+    Replaces the stored marker of the current date heading with today's heading.
+
+    Args:
+        mappings (Dict): The stored mapping.
+
+    Returns:
+        Dict: The mapping with the current date heading.
+    """
+    return {field: get_date_extra() if column == DATE_EXTRA_MARKER else column for field, column in mappings.items()}
@@ -0,0 +1,205 @@
+# First-party modules
+from parallel import DocumentJob, DocumentResult, RowResult, get_output_filename
+
+# Third-party modules
+import csv
+import datetime
+import json
+import os
+from typing import IO, Any, Optional
+
+
+# Stages timed for every document, the first three run in the main process once per chunk
+STAGES = ("excel_read", "mapping", "filename", "merge", "write", "convert")
+REPORT_FORMATS = ("jsonl", "csv")
+REPORT_PREFIX = ".contract-report-"
+PROFILE_FOLDER = ".contract-profiles"
+
+
+class RunReport:
+    """
+    Writes a run report next to the generated files: one record per row with the time spent in every
+    stage, the bytes written and the error (if any), followed by a summary of the whole run. The
+    records are written as soon as a row is finished, so the report of an aborted run is not lost.
+    """
+
+    def __init__(self, output_folder: str, report_format: str = "jsonl") -> None:
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {report_format} (available: {', '.join(REPORT_FORMATS)})")
+        self.output_folder: str = output_folder
+        self.report_format: str = report_format
+        timestamp: str = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path: str = os.path.join(output_folder, f"{REPORT_PREFIX}{timestamp}.{report_format}")
+        self.file: Optional[IO[str]] = None
+        self.writer: Any = None
+
+        self.started: Optional[datetime.datetime] = None
+        self.created: int = 0
+        self.skipped: int = 0
+        self.cached: int = 0
+        self.failed: int = 0
+        self.bytes_written: int = 0
+        self.stage_totals: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    def open(self) -> None:
+        """
+        Creates the report file. If a report with the same timestamp exists (another run started in the
+        same second), a counter is added to the name instead of overwriting it.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.started = datetime.datetime.now()
+        base, extension = os.path.splitext(self.path)
+        count: int = 1
+        while self.file is None:
+            try:
+                self.file = open(self.path, "x", encoding="utf-8", newline="")
+            except FileExistsError:
+                count += 1
+                self.path = f"{base}-{count}{extension}"
+        if self.report_format == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["row", "file", "status", "bytes", *(f"{stage}_s" for stage in STAGES), "error"])
+
+    def record(self, result: RowResult, pdf: bool) -> None:
+        """
+        Adds a finished row to the report and the counters.
+
+        Args:
+            result (RowResult): The outcome of the row.
+            pdf (bool): Whether the documents are converted to pdf.
+
+        Returns:
+            None
+        """
+        if result.skipped:
+            status: str = "skipped"
+            self.skipped += 1
+        elif result.cached:
+            status = "cached"
+            self.cached += 1
+        elif result.error is None:
+            status = "created"
+            self.created += 1
+        else:
+            status = "failed"
+            self.failed += 1
+        self.bytes_written += result.size
+        timings: dict[str, float] = result.timings or {}
+        for stage, seconds in timings.items():
+            self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+
+        if self.file is None:
+            return
+        filename: str = get_output_filename(result.filename, pdf)
+        if self.writer is not None:
+            self.writer.writerow([result.row_id, filename, status, result.size,
+                                  *(format_seconds(timings.get(stage)) for stage in STAGES), result.error or ""])
+        else:
+            self.file.write(json.dumps({"row": result.row_id, "file": filename, "status": status,
+                                        "bytes": result.size, "seconds": timings, "error": result.error}) + "\n")
+        self.file.flush()
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Returns the counters of the run.
+
+        Returns:
+            Dict: Number of created, skipped, cached and failed rows, bytes written and seconds per stage.
+        """
+        duration: float = (datetime.datetime.now() - self.started).total_seconds() if self.started else 0.0
+        return {"created": self.created, "skipped": self.skipped, "cached": self.cached, "failed": self.failed,
+                "bytes": self.bytes_written, "duration": duration, "seconds": self.stage_totals}
+
+    def close(self) -> None:
+        """
+        Writes the summary and closes the report file.
+
+        Returns:
+            None
+        """
+        if self.file is None:
+            return
+        summary: dict[str, Any] = self.summary()
+        if self.writer is not None:
+            status: str = f"{self.created} created, {self.skipped} skipped, {self.cached} cached, {self.failed} failed"
+            self.writer.writerow(["total", "", status, self.bytes_written,
+                                  *(format_seconds(self.stage_totals[stage]) for stage in STAGES), ""])
+        else:
+            self.file.write(json.dumps({"summary": summary}) + "\n")
+        self.file.close()
+        self.file = None
+        self.writer = None
+
+    def __enter__(self) -> "RunReport":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class PageIndex:
+    """
+    Index of combined documents: lists for every row the document it was merged into and its position
+    in the document, and for pdf files the number of pages of the document. The pdf file does not tell
+    where a row starts, so the index has no page range per row.
+    """
+
+    def __init__(self, path: str, pdf: bool) -> None:
+        self.path: str = path
+        self.pdf: bool = pdf
+        # (row id, excel row, name, document, position, pages of the document)
+        self.entries: list[tuple[int, int, str, str, int, Optional[int]]] = []
+
+    def record(self, job: DocumentJob, result: DocumentResult) -> None:
+        """
+        Adds the rows of a finished combined document.
+
+        Args:
+            job (DocumentJob): The rows of the document.
+            result (DocumentResult): The outcome of the document.
+
+        Returns:
+            None
+        """
+        if result.error is not None:
+            return
+        document: str = get_output_filename(result.filename, self.pdf)
+        for position, row in enumerate(job.rows):
+            self.entries.append((row.row_id, row.row_id + 2, os.path.splitext(row.filename)[0], document,
+                                 position + 1, result.pages))
+
+    def write(self) -> None:
+        """
+        Writes the index as csv file, ordered by row.
+
+        Returns:
+            None
+        """
+        with open(self.path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["row", "name", "document", "position"] + (["document_pages"] if self.pdf else []))
+            for entry in sorted(self.entries):
+                values: list[Any] = ["" if value is None else value for value in entry[1:]]
+                writer.writerow(values if self.pdf else values[:-1])
+
+
+def format_stage_totals(stage_totals: dict[str, float]) -> str:
+    """
+    Formats the seconds spent in every stage for display, e.g. "excel_read 1.20s, mapping 0.10s, ...".
+
+    Args:
+        stage_totals (Dict): Seconds per stage (see RunReport.stage_totals).
+
+    Returns:
+        str: The stage times.
+    """
+    return ", ".join(f"{stage} {stage_totals.get(stage, 0.0):.2f}s" for stage in STAGES)
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    """Formats a stage time for the csv report, empty if the stage did not run."""
+    return "" if seconds is None else f"{seconds:.6f}"
@@ -0,0 +1,669 @@
+"""
+Sharded execution of large batch jobs on several machines. The rows of a job are split into shards that
+are written to a queue folder on a shared drive, together with a copy of the template. Every worker
+(on the same or any other machine that can reach the folder) claims a shard by creating its lock file,
+renders its rows and writes a completion record for the shard. No server or broker is needed:
+
+    python shards.py plan job.json \\\\server\\share\\queue --shard-size 500
+    python shards.py work \\\\server\\share\\queue --workers 4      (on every machine)
+    python shards.py status \\\\server\\share\\queue
+
+The mapping, filenames and merge values of all rows are resolved once by "plan", so the filenames are
+the same no matter which worker renders a row. Workers that stop without finishing a shard leave a lock
+that is taken over once it has not been updated for --lock-timeout seconds (a worker that lost its lock
+stops and leaves the shard to the new owner). "work --processes N" starts N independent workers on this
+machine, e.g. to try out a queue locally. Rows that failed are rendered again with "work --retry-failed".
+
+Every row is rendered into a file of its own: jobs with "combine" or "archive" are refused by "plan". The
+cache, the manifest, the run report and the profiling of the job are not used, the completion records
+in the done folder take the place of the run report.
+"""
+# First-party modules
+from cli import create_batch, load_job_file
+from converters import CONVERTERS
+from engine import ContractBatch
+from parallel import RowJob, RowResult, WORKER_COUNT_DEFAULT, generate_parallel, get_output_filename
+from report import STAGES
+from template import CompiledTemplate
+from validation import ValidationReport
+
+# Third-party modules
+import argparse
+import datetime
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Iterator, Optional
+
+
+QUEUE_SETTINGS = "queue.json"
+TEMPLATE_NAME = "template.docx"
+SHARD_FOLDER = "shards"
+LOCK_FOLDER = "locks"
+DONE_FOLDER = "done"
+SHARD_SIZE_DEFAULT = 500
+# Seconds without progress after which the lock of a shard is considered abandoned
+LOCK_TIMEOUT_DEFAULT = 15 * 60
+# Seconds between two updates of the lock of the shard being rendered
+HEARTBEAT_SECONDS = 30
+
+
+class ShardQueue:
+    """
+    Work queue in a (shared) folder:
+        queue.json            settings of the job (output folder, pdf converter, ...)
+        template.docx         copy of the Word template
+        shards/<name>.json    the rows of a shard with their merge values and filenames
+        locks/<name>.lock     created by the worker rendering the shard (exclusive create)
+        done/<name>.json      completion record written by the worker once the shard is rendered
+    The locks rely on exclusive file creation (O_EXCL), which local drives, SMB shares and NFS (v3 or later)
+    support. The modification time of a lock is updated while its shard is rendered. Every lock holds a
+    random token of its owner, so a worker only removes or completes shards whose lock is still its own.
+    """
+
+    def __init__(self, folder: str) -> None:
+        self.folder: str = folder
+        # shard name => token of the locks held by this worker
+        self.tokens: dict[str, str] = {}
+
+    def get_path(self, subfolder: str, name: str, extension: str) -> str:
+        """Returns the path of the file of a shard in one of the queue folders."""
+        return os.path.join(self.folder, subfolder, name + extension)
+
+    def create(self, batch: ContractBatch, shard_size: int = SHARD_SIZE_DEFAULT) -> int:
+        """
+        Splits the rows of a loaded and mapped batch into shards.
+
+        Args:
+            batch (ContractBatch): The batch, loaded and mapped.
+            shard_size (int): Number of rows per shard.
+
+        Returns:
+            int: The number of shards.
+        """
+        if os.path.isdir(os.path.join(self.folder, SHARD_FOLDER)) and self.get_shard_names():
+            raise ValueError(f"The queue {self.folder} already contains shards")
+        for subfolder in (SHARD_FOLDER, LOCK_FOLDER, DONE_FOLDER):
+            os.makedirs(os.path.join(self.folder, subfolder), exist_ok=True)
+        shutil.copyfile(batch.word_file, os.path.join(self.folder, TEMPLATE_NAME))
+
+        shards: int = 0
+        rows: list[RowJob] = []
+        for job in batch.create_row_jobs():
+            rows.append(job)
+            if len(rows) >= shard_size:
+                self.write_shard(f"shard-{shards:05d}", rows)
+                shards += 1
+                rows = []
+        if rows:
+            self.write_shard(f"shard-{shards:05d}", rows)
+            shards += 1
+
+        write_json(os.path.join(self.folder, QUEUE_SETTINGS), {
+            "template": os.path.abspath(batch.word_file),
+            "data": os.path.abspath(batch.excel_file),
+            "output_folder": os.path.abspath(batch.output_folder),
+            "convert_pdf": batch.convert_pdf,
+            "converter": batch.converter,
+            "memory_budget": batch.memory_budget,
+            "shards": shards,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        return shards
+
+    def write_shard(self, name: str, rows: list[RowJob]) -> None:
+        """
+        Writes the rows of a shard.
+
+        Args:
+            name (str): Name of the shard.
+            rows (List): The rows with their merge values and filenames.
+
+        Returns:
+            None
+        """
+        write_json(self.get_path(SHARD_FOLDER, name, ".json"), {
+            "shard": name,
+            "rows": [{"row": int(job.row_id), "filename": job.filename, "mappings": job.mappings} for job in rows],
+        })
+
+    def load_settings(self) -> dict[str, Any]:
+        """Returns the settings of the job."""
+        with open(os.path.join(self.folder, QUEUE_SETTINGS), encoding="utf-8") as file:
+            return json.load(file)
+
+    def load_shard(self, name: str) -> list[RowJob]:
+        """
+        Reads the rows of a shard.
+
+        Args:
+            name (str): Name of the shard.
+
+        Returns:
+            List: The rows of the shard.
+        """
+        with open(self.get_path(SHARD_FOLDER, name, ".json"), encoding="utf-8") as file:
+            shard: dict[str, Any] = json.load(file)
+        return [RowJob(row["row"], row["mappings"], row["filename"]) for row in shard["rows"]]
+
+    def load_record(self, name: str) -> Optional[dict[str, Any]]:
+        """Returns the completion record of a shard, None if the shard has not been completed."""
+        try:
+            with open(self.get_path(DONE_FOLDER, name, ".json"), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def get_shard_names(self) -> list[str]:
+        """Returns the names of all shards in the order of their rows."""
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(self.folder, SHARD_FOLDER))
+                      if name.endswith(".json"))
+
+    def is_pending(self, name: str, retry_failed: bool = False) -> bool:
+        """
+        Checks if a shard still has to be rendered.
+
+        Args:
+            name (str): Name of the shard.
+            retry_failed (bool): Whether completed shards with failed rows are rendered again.
+
+        Returns:
+            bool: True if the shard has not been completed (or has failed rows that are retried).
+        """
+        record: Optional[dict[str, Any]] = self.load_record(name)
+        return record is None or (retry_failed and record.get("failed", 0) > 0)
+
+    def claim(self, worker: str, lock_timeout: float = LOCK_TIMEOUT_DEFAULT, retry_failed: bool = False,
+              skip: Optional[set[str]] = None) -> Optional[str]:
+        """
+        Locks the first pending shard that is not locked by another worker.
+
+        Args:
+            worker (str): Name of the worker, written to the lock.
+            lock_timeout (float): Seconds after which the lock of another worker is taken over.
+            retry_failed (bool): Whether completed shards with failed rows are rendered again.
+            skip (Set): Shards that are not claimed, e.g. the ones already retried by this worker.
+
+        Returns:
+            str: Name of the claimed shard, None if there is nothing left to do.
+        """
+        for name in self.get_shard_names():
+            if name in (skip or set()) or not self.is_pending(name, retry_failed):
+                continue
+            if not self.lock(name, worker, lock_timeout):
+                continue
+            # the shard may have been completed between the check and the lock
+            if self.is_pending(name, retry_failed):
+                return name
+            self.release(name)
+        return None
+
+    def lock(self, name: str, worker: str, lock_timeout: float) -> bool:
+        """
+        Creates the lock of a shard. An existing lock that has not been updated for lock_timeout seconds
+        is taken over: it is renamed first, so only one of several workers can take it over. If the renamed
+        lock is not the one found stale (another worker took it over or its owner updated it in the
+        meantime), it is put back and the shard is left alone.
+
+        Args:
+            name (str): Name of the shard.
+            worker (str): Name of the worker.
+            lock_timeout (float): Seconds after which an existing lock is taken over.
+
+        Returns:
+            bool: True if the shard has been locked by this worker.
+        """
+        path: str = self.get_path(LOCK_FOLDER, name, ".lock")
+        token: str = uuid.uuid4().hex
+        try:
+            descriptor: int = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            owner: Optional[str] = read_token(path)
+            try:
+                if time.time() - os.stat(path).st_mtime < lock_timeout:
+                    return False
+                abandoned_path: str = f"{path}.{token}.abandoned"
+                os.rename(path, abandoned_path)
+            except FileNotFoundError:
+                return False  # released or taken over by another worker in the meantime
+            if read_token(abandoned_path) != owner or time.time() - os.stat(abandoned_path).st_mtime < lock_timeout:
+                try:
+                    # put the lock back unless another worker has created a new one
+                    os.link(abandoned_path, path)
+                except OSError:
+                    pass
+                os.remove(abandoned_path)
+                return False
+            os.remove(abandoned_path)
+            return self.lock(name, worker, lock_timeout)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump({"token": token, "worker": worker, "host": socket.gethostname(), "pid": os.getpid(),
+                       "claimed": datetime.datetime.now().isoformat(timespec="seconds")}, file)
+        self.tokens[name] = token
+        return True
+
+    def owns(self, name: str) -> bool:
+        """
+        Checks if the lock of a shard is still the one created by this worker.
+
+        Args:
+            name (str): Name of the shard.
+
+        Returns:
+            bool: False if the lock has been removed or taken over by another worker.
+        """
+        token: Optional[str] = self.tokens.get(name)
+        return token is not None and read_token(self.get_path(LOCK_FOLDER, name, ".lock")) == token
+
+    def heartbeat(self, name: str) -> bool:
+        """
+        Updates the lock of a shard, so it is not taken over while the shard is rendered.
+
+        Args:
+            name (str): Name of the shard.
+
+        Returns:
+            bool: False if the lock is no longer owned by this worker.
+        """
+        if not self.owns(name):
+            return False
+        try:
+            os.utime(self.get_path(LOCK_FOLDER, name, ".lock"))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, name: str) -> None:
+        """
+        Removes the lock of a shard, if it is owned by this worker.
+
+        Args:
+            name (str): Name of the shard.
+
+        Returns:
+            None
+        """
+        if self.owns(name):
+            try:
+                os.remove(self.get_path(LOCK_FOLDER, name, ".lock"))
+            except FileNotFoundError:
+                pass
+        self.tokens.pop(name, None)
+
+    def complete(self, name: str, record: dict[str, Any]) -> bool:
+        """
+        Writes the completion record of a shard and removes its lock. Nothing is written if the lock has
+        been taken over by another worker, which renders the shard again.
+
+        Args:
+            name (str): Name of the shard.
+            record (Dict): The outcome of the shard.
+
+        Returns:
+            bool: True if the record has been written.
+        """
+        if not self.owns(name):
+            self.tokens.pop(name, None)
+            return False
+        write_json(self.get_path(DONE_FOLDER, name, ".json"), record)
+        self.release(name)
+        return True
+
+    def status(self, lock_timeout: float = LOCK_TIMEOUT_DEFAULT) -> dict[str, int]:
+        """
+        Counts the shards and rows by their state.
+
+        Args:
+            lock_timeout (float): Seconds after which a lock is considered abandoned.
+
+        Returns:
+            Dict: Number of shards that are completed, being rendered, abandoned and pending, and the number
+                of created and failed rows.
+        """
+        counts: dict[str, int] = dict.fromkeys(("shards", "completed", "running", "abandoned", "pending",
+                                                "created", "failed"), 0)
+        for name in self.get_shard_names():
+            counts["shards"] += 1
+            record: Optional[dict[str, Any]] = self.load_record(name)
+            if record is not None:
+                counts["completed"] += 1
+                counts["created"] += record.get("created", 0)
+                counts["failed"] += record.get("failed", 0)
+                continue
+            try:
+                fresh: bool = time.time() - os.stat(self.get_path(LOCK_FOLDER, name, ".lock")).st_mtime < lock_timeout
+                counts["running" if fresh else "abandoned"] += 1
+            except FileNotFoundError:
+                counts["pending"] += 1
+        return counts
+
+
+class LockHeartbeat:
+    """
+    Updates the lock of the shard being rendered every HEARTBEAT_SECONDS from a background thread, so the
+    lock stays fresh even if a single row takes longer than the lock timeout. If the lock is lost to
+    another worker, no further rows of the shard are handed out (see jobs).
+    """
+
+    def __init__(self, queue: ShardQueue, name: str) -> None:
+        self.queue: ShardQueue = queue
+        self.name: str = name
+        self.stopped: threading.Event = threading.Event()
+        self.lost: threading.Event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def run(self) -> None:
+        """Updates the lock until the heartbeat is stopped or the lock is lost."""
+        while not self.stopped.wait(HEARTBEAT_SECONDS):
+            if not self.queue.heartbeat(self.name):
+                self.lost.set()
+                return
+
+    def jobs(self, rows: list[RowJob]) -> Iterator[RowJob]:
+        """
+        Hands out the rows of the shard until the lock is lost.
+
+        Args:
+            rows (List): The rows of the shard.
+
+        Returns:
+            Iterator: The rows to render.
+        """
+        for row in rows:
+            if self.lost.is_set():
+                return
+            yield row
+
+    def open(self) -> None:
+        """
+        Starts the background thread.
+
+        Returns:
+            None
+        """
+        self.thread = threading.Thread(target=self.run, name=f"heartbeat {self.name}", daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        """
+        Stops the background thread.
+
+        Returns:
+            None
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self) -> "LockHeartbeat":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def read_token(path: str) -> Optional[str]:
+    """
+    Reads the owner token of a lock.
+
+    Args:
+        path (str): Path of the lock.
+
+    Returns:
+        str: The token, None if the lock does not exist or is not written yet.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            content: Any = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return content.get("token") if isinstance(content, dict) else None
+
+
+def write_json(path: str, content: Any) -> None:
+    """
+    Writes a json file at once (through a temporary file), so other workers never read a half-written file.
+
+    Args:
+        path (str): Path of the file.
+        content (Any): The content.
+
+    Returns:
+        None
+    """
+    temp_path: str = f"{path}.{socket.gethostname()}-{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(content, file)
+    os.replace(temp_path, path)
+
+
+def get_worker_name() -> str:
+    """Returns the default name of a worker: the host name and the process id."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def work(queue: ShardQueue, worker: str, workers: int = WORKER_COUNT_DEFAULT, converter: Optional[str] = None,
+         output_folder: Optional[str] = None, lock_timeout: float = LOCK_TIMEOUT_DEFAULT, retry_failed: bool = False,
+         progress: Optional[Callable[[str, RowResult], None]] = None) -> int:
+    """
+    Claims and renders shards until no pending shard is left.
+
+    Args:
+        queue (ShardQueue): The queue.
+        worker (str): Name of the worker.
+        workers (int): Number of worker processes rendering the rows of a shard.
+        converter (str): Name of the pdf converter, None for the converter of the job.
+        output_folder (str): Folder the files are written to, None for the output folder of the job (e.g. if
+            the share is mounted at another path on this machine).
+        lock_timeout (float): Seconds after which the lock of another worker is taken over.
+        retry_failed (bool): Whether completed shards with failed rows are rendered again.
+        progress (Callable): Optional callback that is called with the shard and the result of every row.
+
+    Returns:
+        int: Number of shards rendered by this worker.
+    """
+    settings: dict[str, Any] = queue.load_settings()
+    output_folder = output_folder or settings["output_folder"]
+    convert_pdf: bool = settings["convert_pdf"]
+    template: CompiledTemplate = CompiledTemplate(os.path.join(queue.folder, TEMPLATE_NAME))
+    # every shard is rendered only once per worker, even if its rows fail again
+    rendered: set[str] = set()
+
+    while True:
+        name: Optional[str] = queue.claim(worker, lock_timeout, retry_failed, rendered)
+        if name is None:
+            return len(rendered)
+        started: datetime.datetime = datetime.datetime.now()
+
+        def finish(result: RowResult) -> None:
+            if progress is not None:
+                progress(name, result)
+
+        try:
+            with LockHeartbeat(queue, name) as heartbeat:
+                results: list[RowResult] = generate_parallel(
+                    template, heartbeat.jobs(queue.load_shard(name)), output_folder, workers=workers,
+                    converter=(converter or settings["converter"]) if convert_pdf else None,
+                    memory_budget=settings["memory_budget"], progress=finish)
+        except BaseException:
+            # leave the shard to another worker
+            queue.release(name)
+            raise
+
+        failed: list[RowResult] = [result for result in results if result.error is not None]
+        stage_totals: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        for result in results:
+            for stage, seconds in (result.timings or {}).items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+        queue.complete(name, {
+            "shard": name,
+            "worker": worker,
+            "host": socket.gethostname(),
+            "started": started.isoformat(timespec="seconds"),
+            "finished": datetime.datetime.now().isoformat(timespec="seconds"),
+            "rows": len(results),
+            "created": len(results) - len(failed),
+            "failed": len(failed),
+            "bytes": sum(result.size for result in results),
+            "seconds": stage_totals,
+            "errors": [{"row": result.row_id, "file": get_output_filename(result.filename, convert_pdf),
+                        "error": result.error} for result in failed],
+        })
+        rendered.add(name)
+
+
+def plan(job_file: str, queue_folder: str, shard_size: int, validate: bool = True) -> int:
+    """
+    Loads a job file and splits its rows into shards.
+
+    Args:
+        job_file (str): Path to the JSON or YAML job file (see cli.py).
+        queue_folder (str): The queue folder.
+        shard_size (int): Number of rows per shard.
+        validate (bool): Whether the rows are validated first.
+
+    Returns:
+        int: Exit code, 1 if the job is invalid.
+    """
+    job: dict[str, Any] = load_job_file(job_file)
+    batch: ContractBatch = create_batch(job, os.path.dirname(os.path.abspath(job_file)))
+    if batch.combine > 0 or batch.archive:
+        print("Error: Sharded jobs render one file per row, remove \"combine\" and \"archive\" from the job file.",
+              file=sys.stderr)
+        return 1
+    batch.load()
+    batch.auto_map()
+    error_msg: str = batch.check()
+    if error_msg:
+        print(error_msg, file=sys.stderr)
+        return 1
+    if validate:
+        validation: ValidationReport = batch.validate()
+        if validation.issues:
+            print(validation.format(), file=sys.stderr)
+        if validation.errors:
+            print("Error: The rows cannot be named, no shards were created.", file=sys.stderr)
+            return 1
+    try:
+        shards: int = ShardQueue(queue_folder).create(batch, shard_size)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"{batch.rows} rows split into {shards} shards in {queue_folder}.")
+    return 0
+
+
+def start_processes(argv: list[str], processes: int) -> int:
+    """
+    Starts independent workers on this machine and waits for them.
+
+    Args:
+        argv (List): Command line arguments of the workers.
+        processes (int): Number of workers.
+
+    Returns:
+        int: Exit code, the highest exit code of the workers.
+    """
+    commands: list[subprocess.Popen] = [subprocess.Popen([sys.executable, os.path.abspath(__file__), *argv])
+                                        for _ in range(processes)]
+    return max(command.wait() for command in commands)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Plans, renders or shows the state of a sharded job from the command line.
+
+    Args:
+        argv (List): Command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: Exit code, 1 if the job is invalid or any row failed.
+    """
+    parser = argparse.ArgumentParser(description="Render large batch jobs on several machines through a shared queue folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="split the rows of a job file into shards")
+    plan_parser.add_argument("job_file", help="JSON or YAML job file")
+    plan_parser.add_argument("queue", help="queue folder (on a drive shared by all workers)")
+    plan_parser.add_argument("--shard-size", type=int, default=SHARD_SIZE_DEFAULT, help="rows per shard")
+    plan_parser.add_argument("--no-validate", action="store_true", help="do not validate the rows first")
+
+    work_parser = commands.add_parser("work", help="render shards until none is left")
+    work_parser.add_argument("queue", help="queue folder")
+    work_parser.add_argument("--workers", type=int, default=WORKER_COUNT_DEFAULT,
+                             help="worker processes rendering the rows of a shard")
+    work_parser.add_argument("--converter", choices=list(CONVERTERS), help="pdf converter backend (overrides the job)")
+    work_parser.add_argument("--output-folder", help="output folder on this machine (overrides the job)")
+    work_parser.add_argument("--name", help="name of the worker (default: host name and process id)")
+    work_parser.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT_DEFAULT, metavar="SECONDS",
+                             help="take over shards whose lock has not been updated for this long")
+    work_parser.add_argument("--retry-failed", action="store_true", help="render shards with failed rows again")
+    work_parser.add_argument("--processes", type=int, default=1, help="start this many independent workers")
+
+    status_parser = commands.add_parser("status", help="show the progress of the shards")
+    status_parser.add_argument("queue", help="queue folder")
+    status_parser.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT_DEFAULT, metavar="SECONDS",
+                               help="locks not updated for this long are shown as abandoned")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        return plan(args.job_file, args.queue, max(args.shard_size, 1), not args.no_validate)
+
+    queue: ShardQueue = ShardQueue(args.queue)
+    if not os.path.exists(os.path.join(args.queue, QUEUE_SETTINGS)):
+        print(f"Error: {args.queue} is not a queue folder, create it with: shards.py plan", file=sys.stderr)
+        return 1
+
+    if args.command == "status":
+        counts: dict[str, int] = queue.status(args.lock_timeout)
+        print(f"{counts['completed']}/{counts['shards']} shards completed, {counts['running']} running, "
+              f"{counts['abandoned']} abandoned, {counts['pending']} pending; "
+              f"{counts['created']} files created, {counts['failed']} failed.")
+        for name in queue.get_shard_names():
+            record: Optional[dict[str, Any]] = queue.load_record(name)
+            for error in (record or {}).get("errors", []):
+                print(f"{name}: Row {error['row'] + 2} ({error['file']}): {error['error']}", file=sys.stderr)
+        return 1 if counts["failed"] else 0
+
+    if args.processes > 1:
+        worker_argv: list[str] = ["work", args.queue, "--workers", str(args.workers),
+                                  "--lock-timeout", str(args.lock_timeout)]
+        if args.converter:
+            worker_argv += ["--converter", args.converter]
+        if args.output_folder:
+            worker_argv += ["--output-folder", args.output_folder]
+        if args.retry_failed:
+            worker_argv.append("--retry-failed")
+        return start_processes(worker_argv, args.processes)
+
+    worker: str = args.name or get_worker_name()
+    convert_pdf: bool = queue.load_settings()["convert_pdf"]
+    failed: int = 0
+
+    def report(name: str, result: RowResult) -> None:
+        nonlocal failed
+        filename: str = get_output_filename(result.filename, convert_pdf)
+        if result.error is None:
+            print(f"[{worker} {name}] Created {filename}")
+        else:
+            failed += 1
+            print(f"[{worker} {name}] Failed to create {filename}: {result.error}", file=sys.stderr)
+
+    start_time: datetime.datetime = datetime.datetime.now()
+    shards: int = work(queue, worker, args.workers, args.converter, args.output_folder, args.lock_timeout,
+                       args.retry_failed, report)
+    time_taken: datetime.timedelta = datetime.datetime.now() - start_time
+    print(f"{worker}: {shards} shards rendered, {failed} rows failed after {str(time_taken).split('.')[0]}.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
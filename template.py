@@ -0,0 +1,162 @@
+# First-party modules
+from lxml import etree
+from mailmerge import MailMerge, NAMESPACES
+
+# Third-party modules
+import re
+import uuid
+import zipfile
+from typing import IO, Optional, Union
+
+
+# Characters that are not allowed in XML 1.0 documents (lxml refuses them as well)
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class CompiledTemplate:
+    """
+    Parses a Word template once and keeps the location of every merge field in memory, so that each row
+    only has to fill in those slots and stream out the zip archive instead of re-parsing the template.
+    """
+
+    def __init__(self, word_file: str) -> None:
+        self.word_file: str = word_file
+        self.merge_fields: list[str] = []
+        # (zip member, static content) for every member of the archive, in the original order.
+        # For XML parts containing merge fields the content is a list of alternating literal
+        # byte chunks and field names (the slots).
+        self.members: list[tuple[str, Union[bytes, list[Union[bytes, str]]]]] = []
+        # newline markup (end text, line break, start text) per XML part, depends on the namespace prefix
+        self.line_breaks: dict[str, bytes] = {}
+
+        self.compile()
+
+    def compile(self) -> None:
+        """
+        Parses the template with MailMerge, replaces every merge field with a unique placeholder and
+        splits the serialized XML parts at those placeholders.
+
+        Returns:
+            None
+        """
+        with MailMerge(self.word_file) as document:
+            self.merge_fields = sorted(document.get_merge_fields())
+
+            # Let MailMerge do the merge with placeholders, so the resulting markup is identical
+            placeholder_prefix: str = f"MERGEFIELD{uuid.uuid4().hex}"
+            placeholders: dict[str, str] = {
+                f"{placeholder_prefix}x{index}x": field for index, field in enumerate(self.merge_fields)}
+            for placeholder, field in placeholders.items():
+                document.merge(**{field: placeholder})
+            placeholder_regex: re.Pattern = re.compile(
+                f"({placeholder_prefix}x[0-9]+x)".encode("ascii"))
+
+            for zip_info in document.zip.filelist:
+                if zip_info in document.parts:
+                    root: etree._Element = document.parts[zip_info].getroot()
+                    xml: bytes = etree.tostring(root)
+                    chunks: list[Union[bytes, str]] = placeholder_regex.split(xml)
+                    # every odd chunk is a placeholder => replace with the field name
+                    for index in range(1, len(chunks), 2):
+                        chunks[index] = placeholders[chunks[index].decode("ascii")]
+                    self.members.append((zip_info.filename, chunks if len(chunks) > 1 else xml))
+                    self.line_breaks[zip_info.filename] = get_line_break(root)
+                elif zip_info == document._settings_info:
+                    self.members.append((zip_info.filename, etree.tostring(document.settings.getroot())))
+                else:
+                    self.members.append((zip_info.filename, document.zip.read(zip_info)))
+
+    def fill_part(self, filename: str, chunks: list[Union[bytes, str]], replacements: dict[str, str]) -> bytes:
+        """
+        Fills the slots of a single XML part with the escaped replacement values.
+
+        Args:
+            filename (str): Name of the zip member the chunks belong to.
+            chunks (List): Alternating literal byte chunks and field names.
+            replacements (Dict): Field names mapped to the values to insert.
+
+        Returns:
+            bytes: The filled XML part.
+        """
+        filled: list[bytes] = []
+        for index, chunk in enumerate(chunks):
+            if index % 2 == 0:
+                filled.append(chunk)
+                continue
+            filled.append(escape_text(replacements.get(chunk), self.line_breaks[filename]))
+        return b"".join(filled)
+
+    def merge(self, replacements: dict[str, str]) -> list[tuple[str, bytes]]:
+        """
+        Fills the merge fields of all parts for the given replacements. Fields without a replacement are
+        left empty, like MailMerge.write does.
+
+        Args:
+            replacements (Dict): Field names mapped to the values to insert.
+
+        Returns:
+            List: The archive members of the merged document (filename, content).
+        """
+        return [(filename, self.fill_part(filename, content, replacements) if isinstance(content, list) else content)
+                for filename, content in self.members]
+
+    def write(self, replacements: dict[str, str], file: Union[str, IO[bytes]]) -> None:
+        """
+        Writes a merged document for the given replacements.
+
+        Args:
+            replacements (Dict): Field names mapped to the values to insert.
+            file (str | IO): Path or binary file object to write the .docx archive to.
+
+        Returns:
+            None
+        """
+        write_members(self.merge(replacements), file)
+
+
+def write_members(members: list[tuple[str, bytes]], file: Union[str, IO[bytes]]) -> None:
+    """
+    Writes the members of a merged document as .docx archive.
+
+    Args:
+        members (List): The archive members (filename, content), see CompiledTemplate.merge.
+        file (str | IO): Path or binary file object to write the .docx archive to.
+
+    Returns:
+        None
+    """
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as output:
+        for filename, content in members:
+            output.writestr(filename, content)
+
+
+def get_line_break(root: etree._Element) -> bytes:
+    """
+    Returns the markup MailMerge uses for a new line inside a merged value, using the namespace
+    prefix of the given part.
+    """
+    prefix: Optional[str] = None
+    for key, namespace in root.nsmap.items():
+        if namespace == NAMESPACES['w']:
+            prefix = key
+            break
+    tag: str = f"{prefix}:" if prefix else ""
+    return f"</{tag}t><{tag}br/><{tag}t>".encode("utf-8")
+
+
+def escape_text(text: Optional[str], line_break: bytes) -> bytes:
+    """
+    Escapes a replacement value for use inside a <w:t> element.
+
+    Args:
+        text (str): The value to escape, None is treated as an empty value.
+        line_break (bytes): Markup to use for new lines.
+
+    Returns:
+        bytes: The escaped value.
+    """
+    text = text or ""
+    if INVALID_XML_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    text = text.replace("\r", "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return line_break.join(part.encode("utf-8") for part in text.split("\n"))
@@ -0,0 +1,43 @@
+# First-party modules
+from benchmark import make_template
+from engine import ContractBatch
+
+# Third-party modules
+import csv
+import os
+import zipfile
+
+
+def make_sheet(path: str, rows: int) -> None:
+    """Creates a sheet in which every row has the same merge values as several other rows."""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Key", "Name", "Salary"])
+    for row in range(rows):
+        ws.append([f"Row {row}", f"Person {row % 3}", 1000 * (row % 2)])
+    wb.save(path)
+
+
+def test_archive_is_the_only_document_in_the_output_folder(tmp_path):
+    word_file: str = str(tmp_path / "template.docx")
+    excel_file: str = str(tmp_path / "data.xlsx")
+    output_folder: str = str(tmp_path / "output")
+    make_template(word_file, ["Name", "Salary"], 1)
+    make_sheet(excel_file, 20)
+
+    batch: ContractBatch = ContractBatch(word_file, excel_file, output_folder, filename_pattern="{Key}",
+                                         workers=1, converter="stub", date_prefix=False, report_format=None,
+                                         archive="contracts.zip")
+    batch.load()
+    batch.auto_map()
+    results = batch.run()
+
+    assert [result.error for result in results] == [None] * 20
+    assert sorted(os.listdir(output_folder)) == ["contracts - Index.csv", "contracts.zip"]
+    with zipfile.ZipFile(os.path.join(output_folder, "contracts.zip")) as archive:
+        assert sorted(archive.namelist()) == sorted(f"Row {row}.pdf" for row in range(20))
+    with open(os.path.join(output_folder, "contracts - Index.csv"), encoding="utf-8", newline="") as file:
+        index = list(csv.DictReader(file))
+    assert [(entry["row"], entry["member"]) for entry in index] == [(str(row + 2), f"Row {row}.pdf") for row in range(20)]
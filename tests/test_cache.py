@@ -0,0 +1,96 @@
+# First-party modules
+from benchmark import make_template
+from cache import RenderCache
+from engine import ContractBatch
+from parallel import RowResult
+
+# Third-party modules
+import os
+
+
+def make_sheet(path: str, rows: int, changed: tuple[int, ...] = ()) -> None:
+    """Creates a sheet in which rows 0, 6, 12, ... (and so on for the other remainders) have the same merge values."""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Key", "Name", "Salary"])
+    for row in range(rows):
+        ws.append([f"Row {row}", "Changed" if row in changed else f"Person {row % 3}", 1000 * (row % 2)])
+    wb.save(path)
+
+
+def run(tmp_path, cache: bool = True) -> list[RowResult]:
+    """Runs the batch of the test folder."""
+    batch: ContractBatch = ContractBatch(str(tmp_path / "template.docx"), str(tmp_path / "data.xlsx"),
+                                         str(tmp_path / "output"), filename_pattern="{Key}", workers=2,
+                                         converter="stub", report_format=None, cache=cache)
+    batch.load()
+    batch.auto_map()
+    results: list[RowResult] = batch.run()
+    assert [result.error for result in results] == [None] * len(results)
+    return results
+
+
+def write_file(path: str, content: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(content)
+    return path
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_cache_hit_is_a_hard_link(tmp_path):
+    document: str = write_file(str(tmp_path / "a.pdf"), b"document")
+    with RenderCache(str(tmp_path / "cache")) as cache:
+        cache.store("key", document)
+        assert cache.restore("key", str(tmp_path / "b.pdf"))
+        assert not cache.restore("other", str(tmp_path / "c.pdf"))
+    assert os.path.samefile(document, str(tmp_path / "b.pdf"))
+    assert cache.hits == 1
+
+
+def test_least_recently_used_documents_are_evicted(tmp_path):
+    with RenderCache(str(tmp_path / "cache"), max_bytes=25) as cache:
+        for key in ("a", "b"):
+            cache.store(key, write_file(str(tmp_path / f"{key}.pdf"), b"0123456789"))
+        # "a" is used again, so "b" is the least recently used document
+        assert cache.restore("a", str(tmp_path / "a2.pdf"))
+        cache.store("c", write_file(str(tmp_path / "c.pdf"), b"0123456789"))
+        assert list(cache.entries) == ["a.pdf", "c.pdf"]
+        assert cache.size == 20
+        assert sorted(os.listdir(str(tmp_path / "cache"))) == ["a.pdf", "c.pdf"]
+        # larger than the whole budget
+        cache.store("d", write_file(str(tmp_path / "d.pdf"), b"x" * 30))
+        assert list(cache.entries) == ["a.pdf", "c.pdf"]
+
+
+def test_rows_with_the_same_values_are_rendered_once(tmp_path):
+    make_template(str(tmp_path / "template.docx"), ["Name", "Salary"], 1)
+    make_sheet(str(tmp_path / "data.xlsx"), 18)
+    results: list[RowResult] = run(tmp_path)
+
+    # 6 distinct documents, the other rows wait for the row with the same values and are copied
+    assert len([result for result in results if not result.cached]) == 6
+    output: str = str(tmp_path / "output")
+    for row in range(6, 18):
+        assert os.path.samefile(os.path.join(output, f"Row {row}.pdf"), os.path.join(output, f"Row {row % 6}.pdf"))
+
+
+def test_rendering_a_row_again_does_not_change_linked_copies(tmp_path):
+    make_template(str(tmp_path / "template.docx"), ["Name", "Salary"], 1)
+    make_sheet(str(tmp_path / "data.xlsx"), 12)
+    run(tmp_path)
+    output: str = str(tmp_path / "output")
+    assert os.path.samefile(os.path.join(output, "Row 0.pdf"), os.path.join(output, "Row 6.pdf"))
+    linked: bytes = read_file(os.path.join(output, "Row 6.pdf"))
+
+    # row 0 changes and is rendered again, without the cache
+    make_sheet(str(tmp_path / "data.xlsx"), 12, changed=(0,))
+    results: list[RowResult] = run(tmp_path, cache=False)
+    assert [result.row_id for result in results if not result.skipped] == [0]
+    assert read_file(os.path.join(output, "Row 6.pdf")) == linked
+    assert read_file(os.path.join(output, "Row 0.pdf")) != linked
@@ -0,0 +1,31 @@
+# First-party modules
+from filenames import FilenamePattern, get_date_file
+
+
+def make_chunks() -> list:
+    """Two chunks of rows whose names collide within and across the chunks (ignoring case)."""
+    import pandas as pd
+
+    return [pd.DataFrame({"Name": ["Ann", "ann", "Bob"], "Team": ["HR", "HR", "IT"]}, index=[0, 1, 2]),
+            pd.DataFrame({"Name": ["Ann", "Bob", "Eve."], "Team": ["HR", "IT", "IT "]}, index=[3, 4, 5])]
+
+
+def test_duplicate_names_are_numbered_in_row_order():
+    columns: list[str] = ["Name", "Team"]
+    runs: list[list[str]] = []
+    for _ in range(2):
+        pattern: FilenamePattern = FilenamePattern(" {Name} {Team}", columns)
+        runs.append([name for chunk in make_chunks() for name in pattern.format(chunk)])
+
+    assert runs[0] == ["Ann HR.docx", "ann HR (2).docx", "Bob IT.docx",
+                       "Ann HR (3).docx", "Bob IT (2).docx", "Eve. IT.docx"]
+    # a rerun gives every row the same name
+    assert runs[1] == runs[0]
+
+
+def test_names_are_stripped_and_dated_on_request():
+    import pandas as pd
+
+    chunk = pd.DataFrame({"Name": [" Ann ", "Smith Ltd.", "a/b"]})
+    assert FilenamePattern("{Name}", ["Name"]).format(chunk) == ["Ann.docx", "Smith Ltd.docx", "ab.docx"]
+    assert FilenamePattern("{Name}", ["Name"], date_prefix=True).format(chunk)[0] == f"{get_date_file()} - Ann.docx"
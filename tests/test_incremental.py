@@ -0,0 +1,54 @@
+# First-party modules
+from benchmark import make_template
+from engine import ContractBatch
+from parallel import RowResult
+
+# Third-party modules
+import os
+
+
+def make_sheet(path: str, salaries: list[int]) -> None:
+    """Creates a sheet with one row per salary."""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Key", "Name", "Salary"])
+    for row, salary in enumerate(salaries):
+        ws.append([f"Row {row}", f"Person {row}", salary])
+    wb.save(path)
+
+
+def run(word_file: str, excel_file: str, output_folder: str) -> dict[str, list[int]]:
+    """Runs an incremental batch and returns the rows that were created and skipped."""
+    batch: ContractBatch = ContractBatch(word_file, excel_file, output_folder, filename_pattern="{Key}", workers=1,
+                                         converter="stub", report_format=None)
+    batch.load()
+    batch.auto_map()
+    results: list[RowResult] = batch.run()
+    assert [result.error for result in results] == [None] * len(results)
+    return {"created": [result.row_id for result in results if not result.skipped],
+            "skipped": [result.row_id for result in results if result.skipped]}
+
+
+def test_rerun_only_generates_changed_and_missing_rows(tmp_path):
+    word_file: str = str(tmp_path / "template.docx")
+    excel_file: str = str(tmp_path / "data.xlsx")
+    output_folder: str = str(tmp_path / "output")
+    make_template(word_file, ["Name", "Salary"], 1)
+    make_sheet(excel_file, [1000, 2000, 3000, 4000])
+
+    assert run(word_file, excel_file, output_folder) == {"created": [0, 1, 2, 3], "skipped": []}
+    assert run(word_file, excel_file, output_folder) == {"created": [], "skipped": [0, 1, 2, 3]}
+
+    # a changed row
+    make_sheet(excel_file, [1000, 2500, 3000, 4000])
+    assert run(word_file, excel_file, output_folder) == {"created": [1], "skipped": [0, 2, 3]}
+
+    # a deleted output file
+    os.remove(os.path.join(output_folder, "Row 3.pdf"))
+    assert run(word_file, excel_file, output_folder) == {"created": [3], "skipped": [0, 1, 2]}
+
+    # a changed template
+    make_template(word_file, ["Name", "Salary"], 2)
+    assert run(word_file, excel_file, output_folder) == {"created": [0, 1, 2, 3], "skipped": []}
@@ -0,0 +1,38 @@
+# First-party modules
+from loader import ExcelLoader, to_text_frame
+
+
+def test_excel_rows_keep_their_sheet_row_number(tmp_path):
+    import openpyxl
+
+    excel_file: str = str(tmp_path / "data.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Name", "Note"])
+    ws.append(["Ann", None])
+    ws.append([None, None])
+    ws.append([None, "only in an unmapped column"])
+    ws.append(["Eve", None])
+    wb.save(excel_file)
+
+    loader: ExcelLoader = ExcelLoader(excel_file)
+    loader.load_headers()
+    chunk = next(loader.iter_chunks(columns=["Name"]))
+
+    # Excel rows 2, 4 and 5, the empty row 3 is skipped
+    assert chunk.index.tolist() == [0, 2, 3]
+    assert chunk["Name"].tolist() == ["Ann", None, "Eve"]
+
+
+def test_text_of_nullable_and_datetime_columns():
+    import pandas as pd
+
+    chunk = pd.DataFrame({
+        "Number": pd.array([1, None], dtype="Int64"),
+        "Flag": pd.array([True, None], dtype="boolean"),
+        "Date": pd.to_datetime(["2024-01-31", None]),
+        "Name": ["Ann", None],
+    })
+    text = to_text_frame(chunk, list(chunk.columns))
+
+    assert text.values.tolist() == [["1", "True", "2024-01-31 00:00:00", "Ann"], ["", "", "", ""]]
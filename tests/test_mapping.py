@@ -0,0 +1,52 @@
+# First-party modules
+from mapping import EMPTY_COLUMN_NAME, LEAVE_EMPTY, ColumnPlan, HeadingIndex, get_date_extra, get_date_field
+
+
+def test_column_plan_resolves_every_field():
+    import pandas as pd
+
+    chunk = pd.DataFrame({
+        "Name": ["Ann", None],
+        "Salary": [1500.5, float("nan")],
+        "Days": pd.array([20, None], dtype="Int64"),
+        "Start": pd.to_datetime(["2024-01-31", None]),
+        "Unused": ["x", "y"],
+    }, index=[4, 7])
+    mappings: dict[str, str] = {"FirstName": "Name", "Greeting": "Name", "Salary": "Salary", "Holidays": "Days",
+                                "StartDate": "Start", "Note": LEAVE_EMPTY, "Department": "Gone",
+                                "Today": get_date_extra()}
+    plan: ColumnPlan = ColumnPlan(mappings, list(chunk.columns))
+
+    assert plan.source_columns == ["Name", "Salary", "Days", "Start"]
+    assert plan.resolve(chunk) == [
+        {"FirstName": "Ann", "Greeting": "Ann", "Salary": "1500.5", "Holidays": "20",
+         "StartDate": "2024-01-31 00:00:00", "Note": "", "Department": "", "Today": get_date_field()},
+        {"FirstName": "", "Greeting": "", "Salary": "", "Holidays": "", "StartDate": "", "Note": "",
+         "Department": "", "Today": get_date_field()},
+    ]
+
+
+def test_fields_are_matched_in_the_order_of_the_stages():
+    headings: list[str] = ["Name", "first name", "Last_Name", "Home Address", "Postal Address", "Date of Birth",
+                           "Salary (monthly)", EMPTY_COLUMN_NAME, LEAVE_EMPTY, get_date_extra()]
+    index: HeadingIndex = HeadingIndex(headings)
+
+    assert index.match("Name") == "Name"
+    assert index.match("First Name") == "first name"
+    assert index.match("LastName") == "Last_Name"
+    # the first heading containing the field
+    assert index.match("address") == "Home Address"
+    assert index.match("BirthDate") == "Date of Birth"
+    assert index.match("Salry Monthly") == "Salary (monthly)"
+    # the extra headings are only matched by name, not by words or similarity
+    assert index.match(LEAVE_EMPTY) == LEAVE_EMPTY
+    assert index.match(" ".join(reversed(LEAVE_EMPTY.split()))) is None
+    assert index.match(LEAVE_EMPTY + "s") is None
+    assert index.match(EMPTY_COLUMN_NAME) is None
+    assert index.match("Phone") is None
+
+
+def test_misspelled_fields_match_among_many_headings():
+    headings: list[str] = [f"Employee Field {number} Value" for number in range(300)]
+    index: HeadingIndex = HeadingIndex(headings)
+    assert [index.match(f"EmployeeFeld{number}Valeu") for number in range(300)] == headings
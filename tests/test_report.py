@@ -0,0 +1,43 @@
+# First-party modules
+from parallel import DocumentJob, DocumentResult, RowJob, RowResult
+from report import PageIndex, RunReport
+
+# Third-party modules
+import csv
+import json
+import os
+
+
+def test_reports_of_the_same_second_are_kept(tmp_path):
+    folder: str = str(tmp_path)
+    reports: list[RunReport] = [RunReport(folder), RunReport(folder)]
+    # both runs start in the same second
+    reports[1].path = reports[0].path
+    for index, report in enumerate(reports):
+        with report:
+            report.record(RowResult(index, f"Row {index}.docx", None, size=10), True)
+
+    assert reports[1].path != reports[0].path
+    assert sorted(os.listdir(folder)) == sorted(os.path.basename(report.path) for report in reports)
+    for index, report in enumerate(reports):
+        with open(report.path, encoding="utf-8") as file:
+            assert json.loads(file.readline())["file"] == f"Row {index}.pdf"
+
+
+def test_page_index_lists_the_document_of_every_row(tmp_path):
+    path: str = str(tmp_path / "Index.csv")
+    index: PageIndex = PageIndex(path, pdf=True)
+    for first in (0, 3):
+        rows: list[RowJob] = [RowJob(row_id, {}, f"Row {row_id}.docx") for row_id in range(first, first + 3)]
+        filename: str = f"Rows {first + 2}-{first + 4}.docx"
+        index.record(DocumentJob(first, rows, filename), DocumentResult(first, filename, [], 7 + first, None))
+    index.record(DocumentJob(6, [RowJob(6, {}, "Row 6.docx")], "Rows 8-8.docx"),
+                 DocumentResult(6, "Rows 8-8.docx", [], None, "Failed"))
+    index.write()
+
+    with open(path, encoding="utf-8", newline="") as file:
+        lines: list[list[str]] = list(csv.reader(file))
+    assert lines == [["row", "name", "document", "position", "document_pages"],
+                     ["2", "Row 0", "Rows 2-4.pdf", "1", "7"], ["3", "Row 1", "Rows 2-4.pdf", "2", "7"],
+                     ["4", "Row 2", "Rows 2-4.pdf", "3", "7"], ["5", "Row 3", "Rows 5-7.pdf", "1", "10"],
+                     ["6", "Row 4", "Rows 5-7.pdf", "2", "10"], ["7", "Row 5", "Rows 5-7.pdf", "3", "10"]]
@@ -0,0 +1,101 @@
+# First-party modules
+from benchmark import make_template
+from shards import DONE_FOLDER, LOCK_FOLDER, ShardQueue, main, write_json
+
+# Third-party modules
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+
+SHARDS_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shards.py")
+
+
+def make_queue(folder: str) -> ShardQueue:
+    """Creates an empty queue folder with a lock and completion record folder."""
+    for subfolder in (LOCK_FOLDER, DONE_FOLDER):
+        os.makedirs(os.path.join(folder, subfolder))
+    return ShardQueue(folder)
+
+
+def test_stale_lock_is_taken_over_and_the_old_owner_loses_it(tmp_path):
+    first: ShardQueue = make_queue(str(tmp_path))
+    second: ShardQueue = ShardQueue(str(tmp_path))
+    assert first.lock("shard-00000", "first", 60)
+    assert not second.lock("shard-00000", "second", 60)
+
+    # the first worker stops updating its lock
+    lock_path: str = first.get_path(LOCK_FOLDER, "shard-00000", ".lock")
+    stale: float = time.time() - 120
+    os.utime(lock_path, (stale, stale))
+    assert second.lock("shard-00000", "second", 60)
+
+    assert not first.heartbeat("shard-00000")
+    assert not first.complete("shard-00000", {"shard": "shard-00000"})
+    first.release("shard-00000")
+    assert os.path.exists(lock_path)
+    assert not os.path.exists(first.get_path(DONE_FOLDER, "shard-00000", ".json"))
+
+    assert second.heartbeat("shard-00000")
+    assert second.complete("shard-00000", {"shard": "shard-00000"})
+    assert not os.path.exists(lock_path)
+    assert sorted(os.listdir(os.path.join(str(tmp_path), LOCK_FOLDER))) == []
+
+
+def make_job(folder: str, rows: int) -> str:
+    """Creates a template, a sheet with one row per contract and a job file rendering them with the stub converter."""
+    import openpyxl
+
+    make_template(os.path.join(folder, "template.docx"), ["Name", "Salary"], 1)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Key", "Name", "Salary"])
+    for row in range(rows):
+        ws.append([f"Row {row}", f"Person {row}", 1000 + row])
+    wb.save(os.path.join(folder, "data.xlsx"))
+    job_file: str = os.path.join(folder, "job.json")
+    with open(job_file, "w", encoding="utf-8") as file:
+        json.dump({"template": "template.docx", "data": "data.xlsx", "output_folder": "output", "filename": "{Key}",
+                   "converter": "stub"}, file)
+    return job_file
+
+
+def test_worker_processes_render_every_row_once(tmp_path):
+    queue_folder: str = str(tmp_path / "queue")
+    assert main(["plan", make_job(str(tmp_path), 20), queue_folder, "--shard-size", "3"]) == 0
+    queue: ShardQueue = ShardQueue(queue_folder)
+    assert len(queue.get_shard_names()) == 7
+
+    # a worker that stopped a while ago left the lock of the first shard
+    lock_path: str = queue.get_path(LOCK_FOLDER, "shard-00000", ".lock")
+    write_json(lock_path, {"token": "stopped", "worker": "stopped"})
+    stale: float = time.time() - 120
+    os.utime(lock_path, (stale, stale))
+
+    process: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, SHARDS_SCRIPT, "work", queue_folder, "--processes", "3", "--workers", "1",
+         "--converter", "stub", "--lock-timeout", "60"], capture_output=True, text=True, timeout=600)
+    assert process.returncode == 0, process.stderr
+
+    expected: list[str] = sorted(f"Row {row}.pdf" for row in range(20))
+    # the workers share the output pipe, so their lines are not always separated
+    created: list[str] = re.findall(r"Created (Row \d+\.pdf)", process.stdout)
+    assert sorted(created) == expected
+    records: list[dict] = [queue.load_record(name) for name in queue.get_shard_names()]
+    assert [record["created"] for record in records] == [3, 3, 3, 3, 3, 3, 2]
+    assert "stopped" not in {record["worker"] for record in records}
+    assert os.listdir(os.path.join(queue_folder, LOCK_FOLDER)) == []
+    assert sorted(os.listdir(str(tmp_path / "output"))) == expected
+
+
+def test_plan_refuses_combined_documents(tmp_path):
+    job_file: str = make_job(str(tmp_path), 2)
+    with open(job_file, encoding="utf-8") as file:
+        job: dict = json.load(file)
+    with open(job_file, "w", encoding="utf-8") as file:
+        json.dump({**job, "combine": 2}, file)
+    assert main(["plan", job_file, str(tmp_path / "queue")]) == 1
+    assert not os.path.exists(str(tmp_path / "queue"))
@@ -0,0 +1,89 @@
+# First-party modules
+from mailmerge import MailMerge
+from template import CompiledTemplate
+
+# Third-party modules
+import io
+import zipfile
+
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+PART_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml."
+VALUES = {"Name": "Smith & Sons <Ltd>", "Address": "Main Street 1\nSpringfield", "Title": "Contract \"A\""}
+
+
+def make_template(path: str) -> None:
+    """
+    Creates a template with a simple field, a complex field whose instruction is split across runs and
+    fields in the header and the footer.
+    """
+    def part(root: str, content: str) -> str:
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:{root} xmlns:w="{WORD_NAMESPACE}">{content}</w:{root}>')
+
+    simple: str = '<w:fldSimple w:instr=" MERGEFIELD {0} \\* MERGEFORMAT "><w:r><w:t>«{0}»</w:t></w:r></w:fldSimple>'
+    split: str = ('<w:r><w:fldChar w:fldCharType="begin"/></w:r>'
+                  '<w:r><w:instrText xml:space="preserve"> MERGE</w:instrText></w:r>'
+                  '<w:r><w:instrText xml:space="preserve">FIELD Address </w:instrText></w:r>'
+                  '<w:r><w:fldChar w:fldCharType="separate"/></w:r><w:r><w:t>«Address»</w:t></w:r>'
+                  '<w:r><w:fldChar w:fldCharType="end"/></w:r>')
+    document: str = part("document", f'<w:body><w:p><w:r><w:t xml:space="preserve">To: </w:t></w:r>{simple.format("Name")}'
+                                     f'</w:p><w:p>{split}</w:p><w:sectPr/></w:body>')
+    header: str = part("hdr", f'<w:p>{simple.format("Title")}</w:p>')
+    footer: str = part("ftr", f'<w:p>{simple.format("Name")}</w:p>')
+    content_types: str = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/word/document.xml" ContentType="{PART_TYPE}document.main+xml"/>'
+        f'<Override PartName="/word/header1.xml" ContentType="{PART_TYPE}header+xml"/>'
+        f'<Override PartName="/word/footer1.xml" ContentType="{PART_TYPE}footer+xml"/></Types>')
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("word/document.xml", document)
+        archive.writestr("word/header1.xml", header)
+        archive.writestr("word/footer1.xml", footer)
+
+
+def read_parts(file: io.BytesIO) -> dict[str, bytes]:
+    """Returns the content of every member of a .docx archive."""
+    with zipfile.ZipFile(file) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_body_matches_merge_templates(tmp_path):
+    word_file: str = str(tmp_path / "template.docx")
+    make_template(word_file)
+    compiled: io.BytesIO = io.BytesIO()
+    CompiledTemplate(word_file).write(VALUES, compiled)
+    expected: io.BytesIO = io.BytesIO()
+    with MailMerge(word_file) as document:
+        document.merge_templates([VALUES], separator="page_break")
+        document.write(expected)
+
+    body: bytes = read_parts(compiled)["word/document.xml"]
+    assert body == read_parts(expected)["word/document.xml"]
+    assert b"Smith &amp; Sons &lt;Ltd&gt;" in body
+    assert b"Main Street 1</w:t><w:br/><w:t>Springfield" in body
+
+
+def test_header_and_footer_fields_are_filled(tmp_path):
+    # merge_templates only fills the body and leaves these fields empty, MailMerge.merge fills every part
+    word_file: str = str(tmp_path / "template.docx")
+    make_template(word_file)
+    template: CompiledTemplate = CompiledTemplate(word_file)
+    assert template.merge_fields == ["Address", "Name", "Title"]
+    compiled: io.BytesIO = io.BytesIO()
+    template.write(VALUES, compiled)
+    expected: io.BytesIO = io.BytesIO()
+    with MailMerge(word_file) as document:
+        document.merge(**VALUES)
+        document.write(expected)
+
+    parts: dict[str, bytes] = read_parts(compiled)
+    expected_parts: dict[str, bytes] = read_parts(expected)
+    for name in ("word/document.xml", "word/header1.xml", "word/footer1.xml"):
+        assert parts[name] == expected_parts[name]
+    assert b"Contract \"A\"" in parts["word/header1.xml"]
+    assert b"Smith &amp; Sons &lt;Ltd&gt;" in parts["word/footer1.xml"]
@@ -0,0 +1,65 @@
+# First-party modules
+from filenames import FilenamePattern
+from mapping import ColumnPlan
+from validation import MAX_NAME_LENGTH, MAX_PATH_LENGTH, DataValidator, ValidationReport
+
+# Third-party modules
+import os
+
+
+def validate(chunks: list, pattern: str, output_folder: str) -> ValidationReport:
+    """Validates the chunks with the Name column mapped to the Name merge field."""
+    columns: list[str] = list(chunks[0].columns)
+    validator: DataValidator = DataValidator(ColumnPlan({"Name": "Name"}, columns),
+                                             FilenamePattern(pattern, columns), output_folder, pdf=True)
+    for chunk in chunks:
+        validator.check_chunk(chunk)
+    return validator.finish()
+
+
+def get_rows(report: ValidationReport) -> dict[str, list[int]]:
+    """The affected rows of every kind of issue."""
+    rows: dict[str, list[int]] = {}
+    for issue in report.issues:
+        rows.setdefault(issue.kind, []).extend(issue.row_ids)
+    return rows
+
+
+def test_issues_are_collected_across_chunks(tmp_path):
+    import pandas as pd
+
+    chunks: list = [pd.DataFrame({"Name": ["Ann", None, "a/b"], "Team": ["HR", "IT", "IT"]}, index=[0, 1, 2]),
+                    pd.DataFrame({"Name": ["ANN", "Bob", "  "], "Team": ["HR", "IT", ""]}, index=[3, 4, 5])]
+    report: ValidationReport = validate(chunks, "{Name}", str(tmp_path))
+
+    assert report.rows == 6
+    assert get_rows(report) == {"Empty value": [1, 5], "Illegal characters removed from the filename": [2],
+                                "Empty filename": [1, 5], "Duplicate filename": [0, 3]}
+    assert [issue.kind for issue in report.errors] == ["Empty filename"]
+    assert [issue.detail for issue in report.issues if issue.kind.startswith("Illegal")] == ["/"]
+
+
+def test_length_includes_the_number_of_duplicates(tmp_path):
+    import pandas as pd
+
+    # ".pdf" makes the name exactly as long as allowed, the numbered duplicates are too long
+    name: str = "x" * (MAX_NAME_LENGTH - len(".pdf"))
+    chunks: list = [pd.DataFrame({"Name": [name, name]}, index=[0, 1]),
+                    pd.DataFrame({"Name": [name, "y"]}, index=[2, 3])]
+    report: ValidationReport = validate(chunks, "{Name}", str(tmp_path))
+
+    assert get_rows(report)["Filename too long"] == [1, 2]
+    assert get_rows(report)["Duplicate filename"] == [0, 1, 2]
+
+
+def test_long_output_paths_are_reported(tmp_path):
+    import pandas as pd
+
+    folder: str = str(tmp_path / ("f" * 100))
+    # the path is exactly as long as allowed, the numbered duplicate is too long
+    name: str = "x" * (MAX_PATH_LENGTH - len(os.path.join(os.path.abspath(folder), "")) - len(".pdf"))
+    chunks: list = [pd.DataFrame({"Name": [name, name, "y"]}, index=[0, 1, 2])]
+    report: ValidationReport = validate(chunks, "{Name}", folder)
+
+    assert get_rows(report)["Path too long"] == [1]
+    assert [issue.error for issue in report.issues if issue.kind == "Path too long"] == [os.name == "nt"]
@@ -0,0 +1,179 @@
+# First-party modules
+from filenames import FILETYPE, ILLEGAL_CHARACTER_REGEX, FilenamePattern, contains_illegal_char, strip_filenames
+from loader import to_text_frame
+from mapping import ColumnPlan
+
+# Third-party modules
+import os
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Longest path Windows can open without the extended path prefix (MAX_PATH without the terminating null)
+MAX_PATH_LENGTH = 259
+# Longest filename allowed by common file systems
+MAX_NAME_LENGTH = 255
+# Number of issues (and rows per issue) listed in the text of a report
+ISSUES_SHOWN = 10
+ROWS_SHOWN = 5
+
+
+class ValidationIssue(NamedTuple):
+    """A problem found in the data, with all rows affected by it."""
+    kind: str
+    detail: str
+    # the run is refused if the issue is an error, warnings only have to be confirmed
+    error: bool
+    row_ids: list[int]
+
+
+class ValidationReport:
+    """The outcome of DataValidator: the issues found in the data."""
+
+    def __init__(self, rows: int, issues: list[ValidationIssue]) -> None:
+        self.rows: int = rows
+        self.issues: list[ValidationIssue] = issues
+
+    @property
+    def errors(self) -> list[ValidationIssue]:
+        """The issues that make the run fail."""
+        return [issue for issue in self.issues if issue.error]
+
+    @property
+    def warnings(self) -> list[ValidationIssue]:
+        """The issues that do not make the run fail."""
+        return [issue for issue in self.issues if not issue.error]
+
+    def format(self, limit: int = ISSUES_SHOWN) -> str:
+        """
+        Describes the issues, one line per issue with the number of the first affected rows.
+
+        Args:
+            limit (int): Maximum number of issues listed.
+
+        Returns:
+            str: The description, empty if there are no issues.
+        """
+        lines: list[str] = []
+        for issue in sorted(self.issues, key=lambda issue: not issue.error)[:limit]:
+            rows: str = ", ".join(str(row_id + 2) for row_id in issue.row_ids[:ROWS_SHOWN])
+            if len(issue.row_ids) > ROWS_SHOWN:
+                rows += f" ... ({len(issue.row_ids)} rows)"
+            lines.append(f"{'Error' if issue.error else 'Warning'}: {issue.kind}: {issue.detail} (row {rows})")
+        if len(self.issues) > limit:
+            lines.append(f"... and {len(self.issues) - limit} more issues.")
+        return "\n".join(lines)
+
+
+class DataValidator:
+    """
+    Checks all rows of the data before any contract is rendered, so problems are reported at once instead
+    of showing up during the run. Every chunk is checked column-wise:
+        - empty values in the columns mapped to merge fields (warning),
+        - illegal characters in the filenames, which are removed (warning),
+        - spaces around the filenames and dots at their end, which are removed (warning),
+        - filenames that are empty once the illegal characters are removed (error),
+        - duplicate filenames, which are numbered " (2)", " (3)", ... (warning),
+        - filenames or output paths that are too long, including the number of a duplicate (error on Windows,
+          warning otherwise).
+    The duplicates are found across all chunks once every chunk has been checked (see finish). Without a
+    filename pattern (combined documents) only the values are checked.
+    """
+
+    def __init__(self, plan: ColumnPlan, filenames: Optional[FilenamePattern], output_folder: str, pdf: bool) -> None:
+        self.plan: ColumnPlan = plan
+        # numbers the duplicate names, so it must not be used to name the files as well
+        self.filenames: Optional[FilenamePattern] = filenames
+        # length of the output folder including the separator in front of the filenames
+        self.folder_length: int = len(os.path.join(os.path.abspath(output_folder), ""))
+        self.extension_length: int = len(".pdf" if pdf else FILETYPE)
+        # (kind, detail) => issue
+        self.issues: dict[tuple[str, str], ValidationIssue] = {}
+        # filename of every row, indexed by the row number
+        self.names: list["pd.Series"] = []
+        self.rows: int = 0
+
+    def add(self, kind: str, detail: str, error: bool, row_ids: list[int]) -> None:
+        """
+        Adds rows to an issue, creating the issue if it has not been found before.
+
+        Args:
+            kind (str): Kind of the issue, e.g. "Empty value".
+            detail (str): The column, filename, ... the issue is about.
+            error (bool): Whether the issue makes the run fail.
+            row_ids (List): The affected rows.
+
+        Returns:
+            None
+        """
+        if row_ids:
+            self.issues.setdefault((kind, detail), ValidationIssue(kind, detail, error, [])).row_ids.extend(row_ids)
+
+    def check_chunk(self, chunk: "pd.DataFrame") -> None:
+        """
+        Checks the merge values and filenames of all rows of a chunk.
+
+        Args:
+            chunk (DataFrame): Rows of the worksheet, the index is the row number.
+
+        Returns:
+            None
+        """
+        import pandas as pd
+
+        self.rows += len(chunk.index)
+
+        # empty values of mapped columns
+        text: pd.DataFrame = to_text_frame(chunk, self.plan.source_columns)
+        empty: pd.DataFrame = text.apply(lambda values: values.str.strip().eq(""))
+        for column in self.plan.source_columns:
+            fields: str = ", ".join(field for field, source in self.plan.fields.items() if source == column)
+            self.add("Empty value", f"column '{column}' (used for {fields})", False,
+                     empty.index[empty[column]].tolist())
+        if self.filenames is None:
+            return
+
+        # illegal characters, grouped by the characters found
+        names: pd.Series = self.filenames.substitute(chunk)
+        illegal: pd.Series = names[names.str.contains(ILLEGAL_CHARACTER_REGEX, regex=True)]
+        for row_id, name in illegal.items():
+            self.add("Illegal characters removed from the filename", " ".join(contains_illegal_char(name)[1]), False,
+                     [row_id])
+
+        names = names.str.replace(ILLEGAL_CHARACTER_REGEX, "", regex=True)
+        stripped: pd.Series = strip_filenames(names)
+        self.add("Filename trimmed", "spaces at the start or end and dots at the end removed", False,
+                 names.index[stripped.ne(names) & stripped.ne("")].tolist())
+        self.add("Empty filename", "no value to name the file after", True, stripped.index[stripped.eq("")].tolist())
+        names = self.filenames.prefix + stripped
+
+        # the names of the files, numbered in row order like the generated files (see FilenamePattern.make_unique)
+        unique: pd.Series = pd.Series([self.filenames.make_unique(name) for name in names.tolist()], index=names.index)
+        lengths: pd.Series = unique.str.len() - len(FILETYPE) + self.extension_length
+        self.add("Filename too long", f"more than {MAX_NAME_LENGTH} characters", True,
+                 lengths.index[lengths > MAX_NAME_LENGTH].tolist())
+        self.add("Path too long", f"more than {MAX_PATH_LENGTH} characters", os.name == "nt",
+                 lengths.index[(lengths <= MAX_NAME_LENGTH) & (lengths + self.folder_length > MAX_PATH_LENGTH)].tolist())
+
+        # the empty names are already an error, not duplicates as well
+        self.names.append(names[stripped.ne("")])
+
+    def finish(self) -> ValidationReport:
+        """
+        Finds the duplicate filenames of all chunks and returns the report.
+
+        Returns:
+            ValidationReport: The issues found.
+        """
+        import pandas as pd
+
+        if self.names:
+            names: pd.Series = pd.concat(self.names)
+            # Windows file names are case-insensitive
+            folded: pd.Series = names.str.lower()
+            duplicates: pd.Series = folded[folded.duplicated(keep=False)]
+            for rows in duplicates.groupby(duplicates, sort=False).groups.values():
+                self.add("Duplicate filename", f"'{names[rows[0]]}' (numbered in row order)", False, rows.tolist())
+        return ValidationReport(self.rows, list(self.issues.values()))